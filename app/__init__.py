@@ -1,12 +1,20 @@
 from flask import Flask
-from flask_pymongo import PyMongo
 from config import DevelopmentConfig, ProductionConfig
-import gridfs
 import os
 from flask_restx import Api
+from pymongo.errors import PyMongoError
 from app.api.routes import api as contracts_ns
-
-mongo = PyMongo()  # Initialize PyMongo outside the factory
+from app.models.indexes import GRIDFS_INDEXES, GRIDFS_QUERY_SHAPES, ensure_indexes, check_query_plans
+from app.services.cache import contract_cache
+from app.services.changes import change_recorder
+from app.services.events import event_feed
+from app.services.expiry import ExpiryService
+from app.services.jobs import JobQueue, job_worker
+from app.services.mongo import mongo_clients
+from app.services.stats import StatsService
+from app.utils import instrumentation
+from app.utils.metrics import metrics
+from app.utils.serialization import json_default, json_output
 
 def create_app(config_class=None):
     if config_class is None:
@@ -18,15 +26,67 @@ def create_app(config_class=None):
 
     app = Flask(__name__)
     app.config.from_object(config_class)
+    # Let the stdlib JSON representation encode datetimes and ObjectIds found in contract details
+    app.config.setdefault('RESTX_JSON', {'default': json_default})
+
+    # Request and Mongo command metrics; has to be set up before the Mongo client exists
+    instrumentation.init_app(app)
+
+    # Mongo clients for this worker process: app.db (contracts, jobs) and app.gridfs, on separate pools
+    mongo_clients.init_app(app)
+
+    # Feed behind /api/contracts/events: a change stream on a replica set, else the contract_events outbox
+    event_feed.init_app(app)
+
+    # Stats rollup writes of each transition, batched off the request path
+    change_recorder.init_app(app)
+
+    # Make sure the lookups in ContractService are served by indexes
+    if app.config.get('MONGO_ENSURE_INDEXES'):
+        ensure_indexes(app.db) # type: ignore
+        ensure_indexes(app.gridfs_db, GRIDFS_INDEXES) # type: ignore
+        event_feed.ensure_outbox(app.db) # type: ignore
+    if app.config.get('MONGO_CHECK_QUERY_PLANS'):
+        check_query_plans(app.db) # type: ignore
+        check_query_plans(app.gridfs_db, GRIDFS_QUERY_SHAPES) # type: ignore
+
+    # Read-through cache for contract lookups
+    contract_cache.init_app(app)
+    metrics.register_collector(contract_cache.metric_lines)
+
+    # Background workers for queued jobs (final document generation, migrations). Threads don't
+    # survive a fork: a worker forked from a preloaded master (gunicorn --preload) starts its own
+    # on its first request, after mongo_clients has replaced the master's clients
+    job_worker.init_app(app)
+    job_worker.start()
+    app.before_request(job_worker.start)
+
+    # Keyword search only sees contracts with search_terms; the one-off backfill of older ones
+    if app.config.get('SEARCH_TERMS_BACKFILL'):
+        try:
+            JobQueue.enqueue(app.db, "rebuild_search_terms", {}, job_key="rebuild_search_terms") # type: ignore
+        except PyMongoError as e:
+            app.logger.error("Could not queue the search_terms backfill: %s", e)
+
+    # Periodic rebuild of the contract_stats rollup behind /api/contracts/stats
+    if app.config.get('STATS_RECONCILE_INTERVAL'):
+        try:
+            StatsService.schedule_reconcile(app.db, app.config['STATS_RECONCILE_INTERVAL']) # type: ignore
+        except PyMongoError as e:
+            app.logger.error("Could not schedule the contract stats reconcile: %s", e)
+
+    # Expiry and auto-renewal of contracts past their end date; it only sees end dates stored as
+    # datetimes, so the one-off backfill of older contracts is queued with it
+    if app.config.get('EXPIRY_INTERVAL'):
+        try:
+            JobQueue.enqueue(app.db, "convert_contract_dates", {}, job_key="convert_contract_dates") # type: ignore
+            ExpiryService.schedule(app.db, app.config['EXPIRY_INTERVAL'], ExpiryService.options(app.config)) # type: ignore
+        except PyMongoError as e:
+            app.logger.error("Could not schedule the contract expiry processor: %s", e)
 
-    # Initialize MongoDB with app context
-    mongo.init_app(app)
-    app.mongo_client = mongo.cx # type: ignore
-    app.db = mongo.db # type: ignore
-    app.gridfs = gridfs.GridFS(app.db) # type: ignore
-    
     # Flask-RESTX API and namespace
     api = Api(app)
+    api.representation('application/json')(instrumentation.timed(json_output(app)))
     api.add_namespace(contracts_ns, path='/api/contracts')
 
     return app
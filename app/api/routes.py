@@ -1,6 +1,19 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request, current_app
-from app.services.contract_service import ContractService
+from flask import Response, request, current_app, stream_with_context, url_for
+from app.services.contract_service import DOCUMENT_FIELDS, ContractService, VersionConflictError
+from app.services.events import event_feed
+from app.services.expiry import ExpiryService
+from app.services.jobs import JobQueue
+from app.services.migration import MigrationService
+from app.services.stats import StatsService
+from app.utils.helpers import contract_etag, version_from_if_match
+from app.utils.metrics import phase
+from app.utils.pagination import parse_fields, parse_limit
+from app.utils.serialization import dumps
+from bson import ObjectId
+from bson.errors import InvalidId
+import mimetypes
+import os
 
 api = Namespace('contracts', description='Contract related operations')
 
@@ -10,8 +23,10 @@ contract_details_model = api.model('ContractDetails', {
     'contract_type': fields.String(required=True, description='Contract type'),
     'party1': fields.String(required=True, description='First party'),
     'party2': fields.String(required=True, description='Second party'),
-    'start_date': fields.String(required=True, description='Contract start date (YYYY-MM-DD)'),
-    'end_date': fields.String(required=True, description='Contract end date (YYYY-MM-DD)')
+    'start_date': fields.String(required=True, description='Contract start date (YYYY-MM-DD), stored as a datetime'),
+    'end_date': fields.String(required=True, description='Contract end date (YYYY-MM-DD), stored as a datetime'),
+    'auto_renew': fields.Boolean(description='Renewed by the expiry processor instead of expiring'),
+    'renewal_term_months': fields.Integer(description='Months added per automatic renewal')
 })
 
 contract_model = api.model('Contract', {
@@ -32,6 +47,34 @@ negotiate_contract_model = api.model('NegotiateContract', {
     'negotiator_notes': fields.String(required=True, description='Negotiator notes')
 })
 
+batch_item_result_model = api.model('BatchItemResult', {
+    'contract_number': fields.String(description='Contract number'),
+    'success': fields.Boolean(description='Whether this item was applied'),
+    'message': fields.String(description='Error message when the item failed')
+})
+
+def _etag_headers(contract):
+    return {'ETag': f'"{contract_etag(contract.version)}"'}
+
+def _expected_version():
+    """Version the client expects to overwrite, from If-Match (None if not sent)."""
+    return version_from_if_match(request.if_match)
+
+def _batch_items():
+    """Reads the JSON array of a batch request, or returns an error response tuple."""
+    with phase("validation"):
+        data = request.get_json(silent=True)
+        if not isinstance(data, list) or not data:
+            return None, ({"message": "Expected a non-empty JSON array"}, 400)
+        max_size = current_app.config.get('BATCH_MAX_SIZE', 5000)
+        if len(data) > max_size:
+            return None, ({"message": f"Batch size exceeds the limit of {max_size}"}, 400)
+        return data, None
+
+def _batch_response(results):
+    succeeded = sum(1 for r in results if r['success'])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}, 200
+
 @api.route('/')
 class ContractList(Resource):
     @api.expect(contract_model)
@@ -40,9 +83,10 @@ class ContractList(Resource):
     @api.response(500, 'Internal server error')
     def post(self):
         """API to create new contracts."""
-        data = request.get_json()
-        if not data or 'contract_number' not in data or 'details' not in data:
-            return {"message": "Missing contract_number or details"}, 400
+        with phase("validation"):
+            data = request.get_json()
+            if not data or 'contract_number' not in data or 'details' not in data:
+                return {"message": "Missing contract_number or details"}, 400
         try:
             contract = ContractService.create_contract(current_app.db, data) # type: ignore
             return contract.to_dict(), 201
@@ -51,44 +95,164 @@ class ContractList(Resource):
         except Exception as e:
             return {"message": "Internal server error"}, 500
 
+@api.route('/batch')
+class ContractBatch(Resource):
+    @api.expect([contract_model])
+    @api.response(200, 'Per-item results', [batch_item_result_model])
+    @api.response(400, 'Validation error')
+    @api.response(500, 'Internal server error')
+    def post(self):
+        """API to create many contracts in one request."""
+        items, error = _batch_items()
+        if error:
+            return error
+        try:
+            results = ContractService.create_contracts_batch(current_app.db, items) # type: ignore
+            return _batch_response(results)
+        except Exception as e:
+            return {"message": "Internal server error"}, 500
+
+@api.route('/batch/<string:action>')
+@api.doc(params={'action': 'One of negotiate, approve, reject, sign, renew'})
+class ContractBatchTransition(Resource):
+    @api.response(200, 'Per-item results', [batch_item_result_model])
+    @api.response(400, 'Validation error')
+    @api.response(500, 'Internal server error')
+    def put(self, action):
+        """API to apply one lifecycle action to many contracts."""
+        items, error = _batch_items()
+        if error:
+            return error
+        try:
+            results = ContractService.transition_contracts_batch(current_app.db, action, items) # type: ignore
+            return _batch_response(results)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        except Exception as e:
+            return {"message": "Internal server error"}, 500
+
 @api.route('/<string:contract_number>')
 class Contract(Resource):
     @api.response(200, 'Success')
     @api.response(404, 'Contract not found')
+    @api.response(304, 'Not modified since the ETag in If-None-Match')
     def get(self, contract_number):
         """API to fetch contract data."""
+        if request.if_none_match:
+            # Answer polling clients from the version alone, without building the body
+            version = ContractService.get_contract_version(current_app.db, contract_number) # type: ignore
+            if version is not None and request.if_none_match.contains_weak(contract_etag(version)):
+                return Response(status=304, headers={'ETag': f'"{contract_etag(version)}"'})
         contract = ContractService.get_contract(current_app.db, contract_number) # type: ignore
         if contract:
-            return contract.to_dict(), 200
+            return contract.to_dict(), 200, _etag_headers(contract)
         return {"message": "Contract not found"}, 404
 
+@api.route('/<string:contract_number>/document')
+@api.doc(params={'variant': "'final' (default) or 'migrated'"})
+class ContractDocument(Resource):
+    @api.response(200, 'Document content')
+    @api.response(206, 'Partial content for a Range request')
+    @api.response(304, 'Not modified since the ETag in If-None-Match')
+    @api.response(400, 'Unknown variant')
+    @api.response(404, 'Contract or document not found')
+    @api.response(416, 'Range not satisfiable')
+    def get(self, contract_number):
+        """API to download a contract's stored document, streamed from GridFS."""
+        variant = request.args.get('variant', 'final')
+        if variant not in DOCUMENT_FIELDS:
+            return {"message": f"Unknown document variant '{variant}'."}, 400
+        try:
+            grid_out = ContractService.get_contract_document(
+                current_app.db, current_app.gridfs, contract_number, variant) # type: ignore
+        except ValueError as e:
+            return {"message": str(e)}, 404
+
+        etag = str(grid_out._id)
+        length = grid_out.length
+        headers = {
+            'ETag': f'"{etag}"',
+            'Accept-Ranges': 'bytes',
+            'Content-Disposition': f'attachment; filename="{grid_out.filename}"',
+        }
+        if request.if_none_match and request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+
+        mimetype = mimetypes.guess_type(grid_out.filename or '')[0] or 'application/octet-stream'
+        start, stop, status = 0, length, 200
+        # A stale If-Range means the client's partial copy is outdated; send the whole file instead
+        if_range = request.if_range
+        if request.range and (if_range.etag is None and if_range.date is None or if_range.etag == etag):
+            byte_range = request.range.range_for_length(length)
+            if byte_range is not None:
+                start, stop = byte_range
+                status = 206
+                headers['Content-Range'] = f'bytes {start}-{stop - 1}/{length}'
+            elif request.range.units == 'bytes' and len(request.range.ranges) == 1:
+                headers['Content-Range'] = f'bytes */{length}'
+                return Response(status=416, headers=headers)
+            # Several ranges aren't served; RFC 9110 lets the server answer with the whole file
+
+        headers['Content-Length'] = str(stop - start)
+        return Response(ContractService.iter_document(grid_out, start, stop), status=status,
+                        mimetype=mimetype, headers=headers, direct_passthrough=True)
+
 @api.route('/<string:contract_number>/negotiate')
 class NegotiateContract(Resource):
     @api.expect(negotiate_contract_model)
     @api.response(200, 'Contract negotiated successfully')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
-        """API to negotiate created contracts."""
+        """API to negotiate created contracts; each call adds a round to the negotiation history."""
         data = request.get_json()
         try:
-            updated_contract = ContractService.negotiate_contract(current_app.db, contract_number, data) # type: ignore
-            return updated_contract.to_dict(), 200
+            updated_contract = ContractService.negotiate_contract(current_app.db, contract_number, data, _expected_version()) # type: ignore
+            return updated_contract.to_dict(), 200, _etag_headers(updated_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
             return {"message": "Internal server error"}, 500
 
+negotiations_parser = api.parser()
+negotiations_parser.add_argument('limit', type=int, location='args', help='Page size')
+negotiations_parser.add_argument('after', type=str, location='args', help='Cursor returned as next_cursor by the previous page')
+
+@api.route('/<string:contract_number>/negotiations')
+class ContractNegotiations(Resource):
+    @api.expect(negotiations_parser)
+    @api.response(200, 'Success')
+    @api.response(400, 'Validation error')
+    @api.response(404, 'Contract not found')
+    def get(self, contract_number):
+        """API to page through a contract's negotiation rounds, newest first."""
+        try:
+            limit = parse_limit(request.args.get('limit'), current_app.config.get('NEGOTIATIONS_DEFAULT_LIMIT', 20),
+                                current_app.config.get('NEGOTIATIONS_MAX_LIMIT', 100))
+            rounds, next_cursor = ContractService.get_negotiations(
+                current_app.db, contract_number, limit, request.args.get('after')) # type: ignore
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        if rounds is None:
+            return {"message": "Contract not found"}, 404
+        return {"items": rounds, "next_cursor": next_cursor}, 200
+
 @api.route('/<string:contract_number>/approve')
 class ApproveContract(Resource):
     @api.response(200, 'Contract approved successfully')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
         """API to approve existing contracts."""
         try:
-            updated_contract = ContractService.approve_reject_contract(current_app.db, contract_number, 'APPROVED') # type: ignore
-            return updated_contract.to_dict(), 200
+            updated_contract = ContractService.approve_reject_contract(current_app.db, contract_number, 'APPROVED', _expected_version()) # type: ignore
+            return updated_contract.to_dict(), 200, _etag_headers(updated_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
@@ -98,12 +262,15 @@ class ApproveContract(Resource):
 class RejectContract(Resource):
     @api.response(200, 'Contract rejected successfully')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
         """API to reject existing contracts."""
         try:
-            updated_contract = ContractService.approve_reject_contract(current_app.db, contract_number, 'REJECTED') # type: ignore
-            return updated_contract.to_dict(), 200
+            updated_contract = ContractService.approve_reject_contract(current_app.db, contract_number, 'REJECTED', _expected_version()) # type: ignore
+            return updated_contract.to_dict(), 200, _etag_headers(updated_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
@@ -113,12 +280,15 @@ class RejectContract(Resource):
 class SignContract(Resource):
     @api.response(200, 'Contract signed successfully')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
         """API to digitally sign contracts."""
         try:
-            updated_contract = ContractService.sign_contract(current_app.db, contract_number) # type: ignore
-            return updated_contract.to_dict(), 200
+            updated_contract = ContractService.sign_contract(current_app.db, contract_number, _expected_version()) # type: ignore
+            return updated_contract.to_dict(), 200, _etag_headers(updated_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
@@ -127,52 +297,279 @@ class SignContract(Resource):
 @api.route('/<string:contract_number>/execute')
 class ExecuteContract(Resource):
     @api.response(200, 'Contract executed successfully')
+    @api.response(202, 'Contract executed, final document queued for generation')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
         """API to execute a contract to form the final contract document."""
         try:
-            updated_contract, document_info = ContractService.execute_contract(current_app.db, current_app.gridfs, contract_number) # type: ignore
+            if current_app.config.get('DOCUMENT_GENERATION_MODE') == 'async':
+                updated_contract, job = ContractService.execute_contract_async(current_app.db, contract_number, _expected_version()) # type: ignore
+                response_data = updated_contract.to_dict()
+                response_data['final_document'] = ContractService.queued_document_info(job)
+                headers = _etag_headers(updated_contract)
+                headers['Location'] = url_for('contracts_job_status', job_id=str(job['_id']))
+                return response_data, 202, headers
+            updated_contract, document_info = ContractService.execute_contract(current_app.db, current_app.gridfs, contract_number, _expected_version()) # type: ignore
             response_data = updated_contract.to_dict()
             response_data['final_document'] = document_info
-            return response_data, 200
+            return response_data, 200, _etag_headers(updated_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
             return {"message": "Internal server error"}, 500
 
+@api.route('/jobs/<string:job_id>')
+class JobStatus(Resource):
+    @api.response(200, 'Success')
+    @api.response(404, 'Job not found')
+    def get(self, job_id):
+        """API to poll a background job, e.g. final document generation."""
+        try:
+            job = JobQueue.get(current_app.db, ObjectId(job_id)) # type: ignore
+        except InvalidId:
+            job = None
+        if not job:
+            return {"message": "Job not found"}, 404
+        return {
+            "job_id": str(job['_id']),
+            "kind": job['kind'],
+            "status": job['status'],
+            "attempts": job['attempts'],
+            "result": job.get('result'),
+            "error": job.get('error'),
+            "created_at": job['created_at'].isoformat(),
+            "updated_at": job['updated_at'].isoformat()
+        }, 200
+
+# Fields a search client may ask for with ?fields=
+SEARCHABLE_FIELDS = ('contract_number', 'status', 'details', 'created_at', 'updated_at')
+
+search_parser = api.parser()
+search_parser.add_argument('keyword', type=str, location='args', help='Words or word prefixes to search for')
+search_parser.add_argument('contract_number', type=str, location='args', help='Exact contract number')
+search_parser.add_argument('mode', type=str, location='args', help="'regex' for the legacy substring match")
+search_parser.add_argument('limit', type=int, location='args', help='Page size; enables cursor pagination')
+search_parser.add_argument('after', type=str, location='args', help='Cursor returned as next_cursor by the previous page')
+search_parser.add_argument('fields', type=str, location='args', help='Comma-separated fields to return, e.g. contract_number,details.party1')
+search_parser.add_argument('format', type=str, location='args', help="'ndjson' to stream one contract per line")
+
 @api.route('/search')
 class SearchExecutedContracts(Resource):
+    @api.expect(search_parser)
     @api.response(200, 'Success')
+    @api.response(400, 'Validation error')
     def get(self):
         """API to search executed contracts."""
         query_params = request.args.to_dict()
+        try:
+            projection = None
+            if query_params.get('fields'):
+                projection = parse_fields(query_params['fields'], SEARCHABLE_FIELDS)
+
+            if query_params.get('format') == 'ndjson':
+                # Streaming is already memory-bounded, so the page cap doesn't apply here
+                limit = parse_limit(query_params.get('limit'), None, None)
+                contracts = ContractService.iter_executed_contracts(
+                    current_app.db, query_params, query_params.get('after'), limit, projection) # type: ignore
+                # Pull the first document now so a bad cursor is still reported as a 400
+                first = next(contracts, None)
+
+                def generate():
+                    if first is None:
+                        return
+                    yield dumps(ContractService.to_response(first, projection)) + "\n"
+                    for contract_data in contracts:
+                        yield dumps(ContractService.to_response(contract_data, projection)) + "\n"
+
+                return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+            if 'limit' in query_params or 'after' in query_params or projection:
+                limit = parse_limit(query_params.get('limit'),
+                                    current_app.config.get('SEARCH_DEFAULT_LIMIT', 100),
+                                    current_app.config.get('SEARCH_MAX_LIMIT', 1000))
+                items, next_cursor = ContractService.search_executed_page(
+                    current_app.db, query_params, limit, query_params.get('after'), projection) # type: ignore
+                return {"items": items, "next_cursor": next_cursor}, 200
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        # No paging parameters: the original response, a plain list ordered by relevance
         contracts = ContractService.search_executed_contracts(current_app.db, query_params) # type: ignore
         return [c.to_dict() for c in contracts], 200
 
+stats_parser = api.parser()
+stats_parser.add_argument('days', type=int, location='args', help="Window for 'expiring_soon', in days")
+stats_parser.add_argument('limit', type=int, location='args', help="Most contracts listed in 'expiring_soon'")
+
+@api.route('/stats')
+class ContractStats(Resource):
+    @api.expect(stats_parser)
+    @api.response(200, 'Success')
+    @api.response(400, 'Validation error')
+    def get(self):
+        """API for dashboard counts by status, category, party and end month, and contracts expiring soon."""
+        try:
+            days = parse_limit(request.args.get('days'), current_app.config.get('STATS_EXPIRING_DAYS', 30), 366, "days")
+            limit = parse_limit(request.args.get('limit'), current_app.config.get('STATS_EXPIRING_LIMIT', 50),
+                                current_app.config.get('SEARCH_MAX_LIMIT', 1000))
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return StatsService.get_stats(current_app.db, days, limit), 200 # type: ignore
+
+events_parser = api.parser()
+events_parser.add_argument('status', type=str, location='args', help='Comma-separated statuses to follow, e.g. SIGNED,EXECUTED')
+events_parser.add_argument('contract_number', type=str, location='args', help='Comma-separated contract numbers to follow')
+events_parser.add_argument('after', type=str, location='args', help="Token of the last event received; Last-Event-ID takes precedence")
+events_parser.add_argument('timeout', type=int, location='args', help='Long poll: seconds to wait for a first event')
+
+def _csv_arg(name):
+    value = request.args.get(name)
+    return [v.strip() for v in value.split(',') if v.strip()] if value else None
+
+@api.route('/events')
+class ContractEvents(Resource):
+    @api.expect(events_parser)
+    @api.response(200, 'text/event-stream with Accept: text/event-stream, else a long-poll JSON page')
+    @api.response(400, 'Validation error')
+    @api.response(404, 'Contract events are disabled')
+    def get(self):
+        """API to follow contract lifecycle transitions, as Server-Sent Events or by long polling."""
+        if not event_feed.enabled:
+            return {"message": "Contract events are disabled"}, 404
+        after = request.headers.get('Last-Event-ID') or request.args.get('after')
+        streaming = request.accept_mimetypes.best_match(['application/json', 'text/event-stream']) == 'text/event-stream'
+        try:
+            max_wait = current_app.config.get('CONTRACT_EVENTS_POLL_TIMEOUT', 25)
+            timeout = parse_limit(request.args.get('timeout'), max_wait, max_wait, "timeout")
+            # Where a long poll that gets no events tells the client to resume from
+            position = after
+            if position is None and not streaming:
+                position = event_feed.current_token(current_app.db) # type: ignore
+            subscriber = event_feed.subscribe(current_app.db, _csv_arg('status'), _csv_arg('contract_number'), after) # type: ignore
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        except Exception as e:
+            return {"message": "Internal server error"}, 500
+
+        if streaming:
+            heartbeat = current_app.config.get('CONTRACT_EVENTS_HEARTBEAT', 15)
+
+            def generate():
+                try:
+                    while True:
+                        item = subscriber.get(heartbeat)
+                        if item is None:
+                            if subscriber.lagged:
+                                return # The client reconnects with Last-Event-ID
+                            yield ": keepalive\n\n"
+                            continue
+                        token, event = item
+                        yield f"id: {token}\ndata: {dumps(event)}\n\n"
+                finally:
+                    event_feed.unsubscribe(subscriber)
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        # Long poll: wait for a first event, then return it with whatever else is already queued
+        try:
+            events = []
+            item = subscriber.get(timeout)
+            while item is not None:
+                events.append(item)
+                if len(events) >= 100:
+                    break
+                item = subscriber.get(0)
+        finally:
+            event_feed.unsubscribe(subscriber)
+        next_token = events[-1][0] if events else position
+        return {"events": [dict(event, id=token) for token, event in events], "next": next_token}, 200
+
+expiry_request_model = api.model('ExpiryRequest', {
+    'dry_run': fields.Boolean(description='Only report what would change (default true)')
+})
+
+@api.route('/expiry')
+class ContractExpiry(Resource):
+    @api.expect(expiry_request_model)
+    @api.response(200, 'Run summary; planned changes for a dry run')
+    @api.response(409, 'Another worker is processing expiries')
+    def post(self):
+        """API to run the expiry and auto-renewal processor now, as a dry run unless dry_run is false."""
+        data = request.get_json(silent=True) or {}
+        options = ExpiryService.options(current_app.config)
+        options["dry_run"] = data.get('dry_run') is not False
+        summary = ExpiryService.run(current_app.db, **options) # type: ignore
+        if summary["result"] == "locked":
+            return {"message": "Another worker is processing expiries."}, 409
+        return summary, 200
+
 @api.route('/<string:contract_number>/renew')
 class RenewContract(Resource):
     @api.response(200, 'Contract renewed successfully')
     @api.response(400, 'Validation error')
+    @api.response(412, 'If-Match does not match the current contract version')
     @api.response(500, 'Internal server error')
     def put(self, contract_number):
         """API to renew executed contracts if expired."""
         try:
-            renewed_contract = ContractService.renew_contract(current_app.db, contract_number) # type: ignore
-            return renewed_contract.to_dict(), 200
+            renewed_contract = ContractService.renew_contract(current_app.db, contract_number, _expected_version()) # type: ignore
+            return renewed_contract.to_dict(), 200, _etag_headers(renewed_contract)
+        except VersionConflictError as e:
+            return {"message": str(e)}, 412
         except ValueError as e:
             return {"message": str(e)}, 400
         except Exception as e:
             return {"message": "Internal server error"}, 500
 
+migration_request_model = api.model('MigrationRequest', {
+    'source': fields.String(description='Legacy export (CSV, NDJSON or SQLite) relative to MIGRATION_SOURCE_DIR'),
+    'format': fields.String(description="csv, ndjson or sqlite; taken from the file extension if omitted")
+})
+
 @api.route('/migrate')
 class MigrateOldContracts(Resource):
+    @api.expect(migration_request_model)
     @api.response(200, 'Migration successful')
+    @api.response(202, 'Migration of the source file started')
+    @api.response(400, 'Validation error')
     @api.response(500, 'Migration failed')
     def post(self):
         """API to migrate older contracts stored in SQL to new system."""
+        data = request.get_json(silent=True) or {}
+        if data.get('source'):
+            source_dir = os.path.realpath(current_app.config['MIGRATION_SOURCE_DIR'])
+            source = os.path.realpath(os.path.join(source_dir, data['source']))
+            if os.path.commonpath([source_dir, source]) != source_dir or not os.path.isfile(source):
+                return {"message": "Source file not found."}, 400
+            try:
+                run = MigrationService.start(current_app.db, source, data.get('format'), # type: ignore
+                                             current_app.config.get('MIGRATION_CHUNK_SIZE', 1000),
+                                             current_app.config.get('MIGRATION_UPLOAD_THREADS', 8))
+            except ValueError as e:
+                return {"message": str(e)}, 400
+            status = MigrationService.get_run(current_app.db, run['_id']) # type: ignore
+            return status, 202, {'Location': url_for('contracts_migration_status', run_id=status['run_id'])}
         try:
             migration_summary = ContractService.migrate_older_contracts(current_app.db, current_app.gridfs) # type: ignore
             return migration_summary, 200
         except Exception as e:
-            return {"message": f"Migration failed: {str(e)}"}, 500
\ No newline at end of file
+            return {"message": f"Migration failed: {str(e)}"}, 500
+
+@api.route('/migrate/<string:run_id>')
+class MigrationStatus(Resource):
+    @api.response(200, 'Success')
+    @api.response(404, 'Migration run not found')
+    def get(self, run_id):
+        """API to follow the progress of a migration run."""
+        try:
+            status = MigrationService.get_run(current_app.db, ObjectId(run_id)) # type: ignore
+        except InvalidId:
+            status = None
+        if not status:
+            return {"message": "Migration run not found"}, 404
+        return status, 200
@@ -0,0 +1,301 @@
+# app/asgi.py
+import json
+import os
+import time
+from urllib.parse import parse_qsl
+from gridfs import AsyncGridFS
+from pymongo import AsyncMongoClient
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags
+from werkzeug.routing import Map, Rule
+from app import create_app
+from app.api.routes import SEARCHABLE_FIELDS
+from app.services.async_contract_service import AsyncContractService
+from app.services.contract_service import ContractService, VersionConflictError
+from app.services.mongo import client_options
+from app.utils.helpers import contract_etag, version_from_if_match
+from app.utils.instrumentation import record_request
+from app.utils.metrics import MongoPoolMetrics, end_request_timings, phase, start_request_timings
+from app.utils.pagination import parse_fields, parse_limit
+from app.utils.serialization import dumps
+
+try:
+    from asgiref.wsgi import WsgiToAsgi # Runs the remaining Flask routes in a thread pool
+except ImportError: # pragma: no cover - depends on the environment
+    WsgiToAsgi = None
+
+# Flask endpoint -> (method, handler name) served natively on async PyMongo; the rest go to Flask
+NATIVE_ENDPOINTS = {
+    'contracts_contract_list': ('POST', '_create'),
+    'contracts_contract_batch': ('POST', '_create_batch'),
+    'contracts_contract_batch_transition': ('PUT', '_transition_batch'),
+    'contracts_contract': ('GET', '_get'),
+    'contracts_negotiate_contract': ('PUT', '_negotiate'),
+    'contracts_approve_contract': ('PUT', '_approve'),
+    'contracts_reject_contract': ('PUT', '_reject'),
+    'contracts_sign_contract': ('PUT', '_sign'),
+    'contracts_execute_contract': ('PUT', '_execute'),
+    'contracts_renew_contract': ('PUT', '_renew'),
+    'contracts_search_executed_contracts': ('GET', '_search'),
+}
+
+class _Request:
+    """The parts of an ASGI request the native handlers need."""
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope.get('headers', [])])
+        self.body = body
+
+    def get_json(self):
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return None
+
+    def expected_version(self):
+        return version_from_if_match(parse_etags(self.headers.get('If-Match')) if 'If-Match' in self.headers else None)
+
+class ContractsASGI:
+    """
+    ASGI application for `uvicorn asgi:app`.
+    The contract read, transition, execute, search and batch routes run as coroutines on an
+    AsyncMongoClient, so a worker keeps serving while they wait on Mongo. Every other route
+    (documents, jobs, migrations, /metrics, the Swagger UI) is handed to the Flask app.
+    """
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.wsgi = WsgiToAsgi(flask_app) if WsgiToAsgi is not None else None
+        # Every Flask route, so a static path like /api/contracts/stats matches its own rule rather than
+        # /api/contracts/<contract_number>; only the NATIVE_ENDPOINTS matches are served here
+        self.url_map = Map([Rule(rule.rule, endpoint=rule.endpoint, methods=rule.methods)
+                            for rule in flask_app.url_map.iter_rules()])
+        self.sample_rate = self.config.get('REQUEST_LOG_SAMPLE_RATE', 0.01)
+        self.slow_seconds = self.config.get('REQUEST_LOG_SLOW_MS', 1000) / 1000
+        self.db = None
+        self.gridfs = None
+        self._client = None
+        self._gridfs_client = None
+        self._pid = None
+
+    def _connect(self):
+        # Async clients are bound to the event loop and process they were created in, so each worker makes its own
+        if self._pid == os.getpid():
+            return
+        self._client = AsyncMongoClient(self.config['MONGO_URI'],
+                                        **client_options(self.config, 'MONGO', MongoPoolMetrics('contracts_async')))
+        self._gridfs_client = AsyncMongoClient(self.config.get('GRIDFS_URI') or self.config['MONGO_URI'],
+                                               **client_options(self.config, 'GRIDFS', MongoPoolMetrics('gridfs_async')))
+        self.db = self._client.get_default_database()
+        self.gridfs = AsyncGridFS(self._gridfs_client.get_default_database())
+        self._pid = os.getpid()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http':
+            try:
+                rule, view_args = self.url_map.bind('', url_scheme=scope.get('scheme', 'http')).match(
+                    scope['path'], method=scope['method'], return_rule=True)
+            except HTTPException:
+                rule = None
+            native = NATIVE_ENDPOINTS.get(rule.endpoint) if rule is not None else None
+            if native is not None and scope['method'] == native[0]:
+                return await self._dispatch(rule, view_args, scope, receive, send)
+        if self.wsgi is None:
+            raise RuntimeError("asgiref is required to serve the Flask routes under ASGI.")
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._client is not None and self._pid == os.getpid():
+                    await self._client.close()
+                    await self._gridfs_client.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _dispatch(self, rule, view_args, scope, receive, send):
+        start = time.perf_counter()
+        timings = start_request_timings()
+        status = 500
+        try:
+            body = b''
+            more_body = True
+            while more_body:
+                message = await receive()
+                body += message.get('body', b'')
+                more_body = message.get('more_body', False)
+            request = _Request(scope, body)
+            self._connect()
+
+            handler = getattr(self, NATIVE_ENDPOINTS[rule.endpoint][1])
+            try:
+                result = await handler(request, **view_args)
+            except VersionConflictError as e:
+                result = {"message": str(e)}, 412
+            except ValueError as e:
+                result = {"message": str(e)}, 400
+            except Exception:
+                self.flask_app.logger.exception("Unhandled error on %s %s", request.method, request.path)
+                result = {"message": "Internal server error"}, 500
+
+            status = result[1]
+            headers = result[2] if len(result) > 2 else {}
+            if hasattr(result[0], '__aiter__'):
+                await self._send_stream(send, status, headers, result[0])
+            else:
+                await self._send_json(send, status, headers, result[0])
+        finally:
+            record_request(scope['method'], rule.rule, scope['path'], status, time.perf_counter() - start,
+                           timings, self.sample_rate, self.slow_seconds)
+            end_request_timings()
+
+    async def _send_json(self, send, status, headers, data):
+        with phase("serialization"):
+            body = b'' if data is None else (dumps(data) + "\n").encode('utf-8')
+        raw_headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in headers.items()]
+        if data is not None:
+            raw_headers.append((b'content-type', b'application/json'))
+        raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_stream(self, send, status, headers, lines):
+        raw_headers = [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in headers.items()]
+        raw_headers.append((b'content-type', b'application/x-ndjson'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        async for line in lines:
+            await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def _batch_items(self, request):
+        with phase("validation"):
+            data = request.get_json()
+            if not isinstance(data, list) or not data:
+                raise ValueError("Expected a non-empty JSON array")
+            max_size = self.config.get('BATCH_MAX_SIZE', 5000)
+            if len(data) > max_size:
+                raise ValueError(f"Batch size exceeds the limit of {max_size}")
+            return data
+
+    @staticmethod
+    def _batch_response(results):
+        succeeded = sum(1 for r in results if r['success'])
+        return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}, 200
+
+    @staticmethod
+    def _contract_response(contract, status=200):
+        return contract.to_dict(), status, {'ETag': f'"{contract_etag(contract.version)}"'}
+
+    async def _create(self, request):
+        with phase("validation"):
+            data = request.get_json()
+            if not data or 'contract_number' not in data or 'details' not in data:
+                return {"message": "Missing contract_number or details"}, 400
+        contract = await AsyncContractService.create_contract(self.db, data)
+        return contract.to_dict(), 201
+
+    async def _create_batch(self, request):
+        results = await AsyncContractService.create_contracts_batch(
+            self.db, self._batch_items(request), self.config.get('ASGI_BATCH_CHUNK_SIZE', 500))
+        return self._batch_response(results)
+
+    async def _transition_batch(self, request, action):
+        results = await AsyncContractService.transition_contracts_batch(
+            self.db, action, self._batch_items(request), self.config.get('ASGI_BATCH_CHUNK_SIZE', 500))
+        return self._batch_response(results)
+
+    async def _get(self, request, contract_number):
+        if 'If-None-Match' in request.headers:
+            if_none_match = parse_etags(request.headers['If-None-Match'])
+            version = await AsyncContractService.get_contract_version(self.db, contract_number)
+            if version is not None and if_none_match.contains_weak(contract_etag(version)):
+                return None, 304, {'ETag': f'"{contract_etag(version)}"'}
+        contract = await AsyncContractService.get_contract(self.db, contract_number)
+        if contract:
+            return self._contract_response(contract)
+        return {"message": "Contract not found"}, 404
+
+    async def _negotiate(self, request, contract_number):
+        contract = await AsyncContractService.negotiate_contract(
+            self.db, contract_number, request.get_json(), request.expected_version())
+        return self._contract_response(contract)
+
+    async def _approve(self, request, contract_number):
+        contract = await AsyncContractService.approve_reject_contract(
+            self.db, contract_number, 'APPROVED', request.expected_version())
+        return self._contract_response(contract)
+
+    async def _reject(self, request, contract_number):
+        contract = await AsyncContractService.approve_reject_contract(
+            self.db, contract_number, 'REJECTED', request.expected_version())
+        return self._contract_response(contract)
+
+    async def _sign(self, request, contract_number):
+        contract = await AsyncContractService.sign_contract(self.db, contract_number, request.expected_version())
+        return self._contract_response(contract)
+
+    async def _renew(self, request, contract_number):
+        contract = await AsyncContractService.renew_contract(self.db, contract_number, request.expected_version())
+        return self._contract_response(contract)
+
+    async def _execute(self, request, contract_number):
+        if self.config.get('DOCUMENT_GENERATION_MODE') == 'async':
+            contract, job = await AsyncContractService.execute_contract_async(
+                self.db, contract_number, request.expected_version())
+            data, _, headers = self._contract_response(contract)
+            data['final_document'] = ContractService.queued_document_info(job)
+            headers['Location'] = self.flask_app.url_map.bind('').build(
+                'contracts_job_status', {'job_id': str(job['_id'])})
+            return data, 202, headers
+        contract, document_info = await AsyncContractService.execute_contract(
+            self.db, self.gridfs, contract_number, request.expected_version())
+        data, status, headers = self._contract_response(contract)
+        data['final_document'] = document_info
+        return data, status, headers
+
+    async def _search(self, request):
+        query_params = request.args.to_dict()
+        projection = None
+        if query_params.get('fields'):
+            projection = parse_fields(query_params['fields'], SEARCHABLE_FIELDS)
+
+        if query_params.get('format') == 'ndjson':
+            limit = parse_limit(query_params.get('limit'), None, None)
+            contracts = AsyncContractService.iter_executed_contracts(
+                self.db, query_params, query_params.get('after'), limit, projection)
+            # Pull the first document now so a bad cursor is still reported as a 400
+            first = await anext(contracts, None)
+
+            async def generate():
+                if first is None:
+                    return
+                yield dumps(ContractService.to_response(first, projection)) + "\n"
+                async for contract_data in contracts:
+                    yield dumps(ContractService.to_response(contract_data, projection)) + "\n"
+
+            return generate(), 200
+
+        if 'limit' in query_params or 'after' in query_params or projection:
+            limit = parse_limit(query_params.get('limit'),
+                                self.config.get('SEARCH_DEFAULT_LIMIT', 100),
+                                self.config.get('SEARCH_MAX_LIMIT', 1000))
+            items, next_cursor = await AsyncContractService.search_executed_page(
+                self.db, query_params, limit, query_params.get('after'), projection)
+            return {"items": items, "next_cursor": next_cursor}, 200
+
+        contracts = await AsyncContractService.search_executed_contracts(self.db, query_params)
+        return [c.to_dict() for c in contracts], 200
+
+def create_asgi_app(config_class=None):
+    """Async-capable variant of create_app: same config, cache, workers and routes, served over ASGI."""
+    return ContractsASGI(create_app(config_class))
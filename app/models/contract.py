@@ -1,43 +1,89 @@
-from datetime import datetime
+from datetime import date, datetime, timezone
+
+# Details fields stored as datetimes, so range queries on them can use an index
+CONTRACT_DATE_FIELDS = ("start_date", "end_date")
+
+def _to_datetime(value):
+    # Raw BSON gives datetimes; documents written through to_dict hold ISO strings
+    if type(value) is datetime:
+        return value
+    if type(value) is str:
+        return datetime.fromisoformat(value)
+    return None
+
+def parse_contract_dates(details):
+    """
+    Copy of details with the contract dates as naive UTC datetimes. Accepts YYYY-MM-DD or ISO 8601
+    strings, dates and datetimes; raises ValueError for anything else. Missing fields stay missing.
+    """
+    if not isinstance(details, dict):
+        return details
+    parsed = dict(details)
+    for field in CONTRACT_DATE_FIELDS:
+        value = parsed.get(field)
+        if value is None or type(value) is datetime and value.tzinfo is None:
+            continue
+        try:
+            if type(value) is date:
+                value = datetime(value.year, value.month, value.day)
+            elif type(value) is not datetime:
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {field} '{value}', expected YYYY-MM-DD.")
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        parsed[field] = value
+    return parsed
+
+def format_contract_date(value):
+    # API form of a stored contract date: YYYY-MM-DD as documented, with the time only when it isn't midnight
+    if type(value) is not datetime:
+        return value
+    if value.time() == datetime.min.time():
+        return value.date().isoformat()
+    return value.isoformat()
+
+def response_details(details):
+    """details with the contract dates in their API form; details itself when there is nothing to format."""
+    if not isinstance(details, dict) or not any(type(details.get(f)) is datetime for f in CONTRACT_DATE_FIELDS):
+        return details
+    return dict(details, **{f: format_contract_date(details[f]) for f in CONTRACT_DATE_FIELDS if f in details})
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
 
 class Contract:
+    # Slotted: no per-instance __dict__, which matters for large search results and bulk ingest
+    __slots__ = ('contract_number', 'status', 'details', 'created_at', 'updated_at', 'version')
+
     def __init__(self, contract_number, status, details):
         self.contract_number = contract_number # Primary key
         self.status = status # e.g., NEW, NEGOTIATION, APPROVED, SIGNED, EXECUTED, EXPIRED, RENEWED
         self.details = details # A dictionary to hold other contract specific data
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self.created_at = self.updated_at = datetime.utcnow()
+        self.version = 1 # Incremented on every write, used as the ETag
 
     def to_dict(self):
+        # API form. details is shared, not copied, unless it holds dates to format; callers that mutate
+        # the result must copy it themselves
         return {
             "contract_number": self.contract_number,
             "status": self.status,
-            "details": self.details,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
+            "details": response_details(self.details),
+            "created_at": _isoformat(self.created_at),
+            "updated_at": _isoformat(self.updated_at),
+            "version": self.version
         }
 
     @staticmethod
     def from_dict(data):
-        contract = Contract(
-            data.get('contract_number'),
-            data.get('status'),
-            data.get('details', {})
-        )
-        created_at_data = data.get('created_at')
-        if isinstance(created_at_data, str):
-            contract.created_at = datetime.fromisoformat(created_at_data)
-        elif isinstance(created_at_data, datetime):
-            contract.created_at = created_at_data
-        else:
-            contract.created_at = None
-
-        updated_at_data = data.get('updated_at')
-        if isinstance(updated_at_data, str):
-            contract.updated_at = datetime.fromisoformat(updated_at_data)
-        elif isinstance(updated_at_data, datetime):
-            contract.updated_at = updated_at_data
-        else:
-            contract.updated_at = None
-
-        return contract
\ No newline at end of file
+        # Fills the slots directly instead of going through __init__, which would stamp and discard two timestamps
+        contract = Contract.__new__(Contract)
+        get = data.get
+        contract.contract_number = get('contract_number')
+        contract.status = get('status')
+        contract.details = get('details') or {}
+        contract.created_at = _to_datetime(get('created_at'))
+        contract.updated_at = _to_datetime(get('updated_at'))
+        contract.version = get('version', 0) # Documents stored before versioning count as 0
+        return contract
@@ -0,0 +1,95 @@
+# app/models/indexes.py
+import logging
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection name -> indexes that must exist.
+INDEXES = {
+    "contracts": [
+        IndexModel([("contract_number", ASCENDING)], name="contract_number_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], name="status_updated_at_id"),
+        IndexModel([("status", ASCENDING), ("search_terms", ASCENDING)], name="status_search_terms"),
+        IndexModel([("status", ASCENDING), ("details.end_date", ASCENDING)], name="status_end_date"),
+    ],
+    "contract_negotiations": [
+        IndexModel([("contract_number", ASCENDING), ("version", DESCENDING)], name="contract_number_version_unique", unique=True),
+    ],
+    "jobs": [
+        IndexModel([("job_key", ASCENDING)], name="job_key_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("next_run_at", ASCENDING)], name="status_next_run_at"),
+    ],
+}
+
+# Indexes in the GridFS database (GRIDFS_URI).
+# GridFS stores the extra put() kwargs (contract_number, migrated) on the fs.files document.
+GRIDFS_INDEXES = {
+    "fs.files": [
+        IndexModel([("contract_number", ASCENDING)], name="contract_number"),
+    ],
+}
+
+# Query shapes issued by ContractService, checked with explain() in development.
+# Values are placeholders; only the shape matters to the planner.
+QUERY_SHAPES = [
+    ("contracts", {"contract_number": "__probe__"}, None),
+    ("contracts", {"status": "EXECUTED"}, [("updated_at", DESCENDING), ("_id", DESCENDING)]),
+    ("contracts", {"status": "EXECUTED", "search_terms": {"$all": ["__probe__"]}}, None),
+    ("contracts", {"contract_number": {"$in": ["__probe__"]}}, None),
+    ("contracts", {"contract_number": "__probe__", "status": {"$in": ["NEW"]}}, None),
+    ("contracts", {"status": {"$in": ["EXECUTED"]}, "details.end_date": {"$gte": datetime(2000, 1, 1)}}, [("details.end_date", ASCENDING)]),
+    ("contracts", {"status": {"$in": ["EXECUTED"]}, "details.end_date": {"$lt": datetime(2000, 1, 1)}}, [("details.end_date", ASCENDING)]),
+    ("contract_negotiations", {"contract_number": "__probe__", "version": {"$lt": 1}}, [("version", DESCENDING)]),
+]
+
+GRIDFS_QUERY_SHAPES = [
+    ("fs.files", {"contract_number": "__probe__"}, None),
+]
+
+def ensure_indexes(db, registry=None):
+    """
+    Creates every registered index. create_indexes is a no-op for indexes that already exist.
+    A unique index that can't be built raises, so the app doesn't start: the writes rely on it to
+    reject duplicates instead of checking first. Any other index only costs speed and is logged.
+    """
+    for collection_name, indexes in (registry or INDEXES).items():
+        unique = [index for index in indexes if index.document.get("unique")]
+        if unique:
+            try:
+                db[collection_name].create_indexes(unique)
+            except PyMongoError as e:
+                logger.critical("Could not create the unique indexes on '%s', duplicates may exist: %s", collection_name, e)
+                raise
+        others = [index for index in indexes if not index.document.get("unique")]
+        if others:
+            try:
+                db[collection_name].create_indexes(others)
+            except PyMongoError as e:
+                logger.error("Could not ensure indexes on '%s': %s", collection_name, e)
+
+def _stages(plan):
+    # Walks a winning plan tree and yields every stage name
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+def check_query_plans(db, shapes=None):
+    """Runs explain() on each registered query shape and warns when the planner picks a COLLSCAN."""
+    collscans = []
+    for collection_name, query, sort in (shapes or QUERY_SHAPES):
+        try:
+            cursor = db[collection_name].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        except PyMongoError as e:
+            logger.warning("Could not explain query on '%s' %s: %s", collection_name, query, e)
+            continue
+        if "COLLSCAN" in _stages(plan):
+            logger.warning("Query on '%s' %s uses a COLLSCAN.", collection_name, query)
+            collscans.append((collection_name, query))
+    return collscans
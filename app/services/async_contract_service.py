@@ -0,0 +1,322 @@
+# app/services/async_contract_service.py
+import asyncio
+import logging
+from datetime import datetime
+from itertools import islice
+from bson import ObjectId
+from gridfs.errors import FileExists
+from pymongo import DESCENDING, InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from app.models.contract import Contract, parse_contract_dates
+from app.services.cache import contract_cache
+from app.services.changes import change_recorder
+from app.services.events import event_feed
+from app.services.contract_service import CONTRACT_PROJECTION, CONTRACT_TRANSITIONS, ContractService
+from app.services.jobs import JobQueue
+from app.services.stats import ROLLUP_PROJECTION, StatsService
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.search import score
+
+logger = logging.getLogger(__name__)
+
+async def _cached(method, *args):
+    # contract_cache calls; a shared cache is a network round trip, run on the default executor so the
+    # event loop keeps serving. The per-process LRU is only a dict lookup and stays inline.
+    if contract_cache.shared:
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+    return method(*args)
+
+def _chunks(mapping, size):
+    # Splits {contract_number: index} into dicts of at most size entries
+    items = iter(mapping.items())
+    while True:
+        chunk = dict(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+class AsyncContractService:
+    """
+    ContractService for the ASGI app, on async PyMongo (AsyncDatabase / AsyncGridFS).
+    Same documents, cache entries and error messages as ContractService; the validation
+    and batch planning helpers are shared with it, only the Mongo round trips differ.
+    """
+    @staticmethod
+    async def _record_changes(db, changes):
+        # ContractService._record_changes on the async client. Deferred stats are queued for change_recorder's
+        # thread, which writes them on the sync client; the ASGI app runs the Flask app alongside
+        if change_recorder.deferred:
+            change_recorder.record_stats(change_recorder.app.db, changes)
+        else:
+            operations = StatsService.operations(StatsService.deltas(changes))
+            if operations:
+                try:
+                    await db.contract_stats.bulk_write(operations, ordered=False)
+                except PyMongoError as e:
+                    logger.warning("Could not update contract_stats, the next reconcile will correct it: %s", e)
+        events = event_feed.documents(changes)
+        if events and event_feed.outbox_pending:
+            # Created with the sync client; the ASGI app runs the Flask app alongside
+            if not await asyncio.to_thread(event_feed.ensure_outbox, event_feed.app.db):
+                logger.warning("Dropped %d contract events, the outbox doesn't exist yet.", len(events))
+                return
+        if events:
+            try:
+                await db.contract_events.insert_many(events, ordered=False)
+            except PyMongoError as e:
+                logger.warning("Could not write %d contract events to the outbox: %s", len(events), e)
+
+    @staticmethod
+    async def create_contract(db, data):
+        contract_number = data.get('contract_number')
+        details = parse_contract_dates(data['details'])
+        try:
+            contract = Contract(data['contract_number'], "NEW", details)
+            document = ContractService._to_document(contract)
+            await db.contracts.insert_one(document)
+            await _cached(contract_cache.invalidate, db, contract_number)
+            await AsyncContractService._record_changes(db, [(document, None, contract.status)])
+            return contract
+        except DuplicateKeyError:
+            logger.info("Contract with number %s already exists.", contract_number)
+            raise ValueError(f"Contract with number {contract_number} already exists.")
+
+    @staticmethod
+    async def get_contract(db, contract_number):
+        contract_data = await _cached(contract_cache.get, db, contract_number)
+        if contract_data is None:
+            contract_data = await db.contracts.find_one({"contract_number": contract_number}, CONTRACT_PROJECTION)
+            await _cached(contract_cache.set, db, contract_data)
+        if contract_data:
+            return Contract.from_dict(contract_data)
+        return None
+
+    @staticmethod
+    async def get_contract_version(db, contract_number):
+        contract_data = await _cached(contract_cache.get, db, contract_number) if contract_cache.shared else None
+        if contract_data is None:
+            contract_data = await db.contracts.find_one({"contract_number": contract_number}, {"version": 1, "_id": 0})
+            if contract_data is None:
+                return None
+        return contract_data.get('version', 0)
+
+    @staticmethod
+    async def _update_contract_status(db, contract_number, new_status, extra_fields=None, expected_version=None):
+        """Async ContractService._update_contract_status: one guarded find_one_and_update."""
+        allowed_previous_statuses = CONTRACT_TRANSITIONS.get(new_status)
+        if allowed_previous_statuses is None:
+            raise ValueError(f"Unknown contract status '{new_status}'.")
+
+        update_fields = {"status": new_status, "updated_at": datetime.utcnow()}
+        if extra_fields:
+            update_fields.update(extra_fields)
+
+        query = {"contract_number": contract_number, "status": {"$in": list(allowed_previous_statuses)}}
+        if expected_version is not None:
+            query.update(ContractService._version_filter(expected_version))
+
+        contract_data = await db.contracts.find_one_and_update(
+            query,
+            {"$set": update_fields, "$inc": {"version": 1}},
+            projection=CONTRACT_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if contract_data:
+            await _cached(contract_cache.set, db, contract_data)
+            await AsyncContractService._record_changes(db, [(contract_data, allowed_previous_statuses[0], new_status)])
+            return Contract.from_dict(contract_data)
+
+        current = await db.contracts.find_one({"contract_number": contract_number}, {"status": 1, "version": 1})
+        ContractService._transition_error(current, new_status, expected_version)
+
+    @staticmethod
+    async def negotiate_contract(db, contract_number, negotiation_data, expected_version=None):
+        """Async ContractService.negotiate_contract: one guarded find_one_and_update per round."""
+        query, update = ContractService._negotiation_update(contract_number, negotiation_data, expected_version)
+        previous = await db.contracts.find_one_and_update(query, update, projection=CONTRACT_PROJECTION,
+                                                          return_document=ReturnDocument.BEFORE)
+        if previous is None:
+            current = await db.contracts.find_one({"contract_number": contract_number}, {"status": 1, "version": 1})
+            ContractService._transition_error(current, "NEGOTIATION", expected_version)
+        contract_data = ContractService._negotiated_document(previous, update)
+        await _cached(contract_cache.set, db, contract_data)
+        if previous['status'] != "NEGOTIATION":
+            await AsyncContractService._record_changes(db, [(contract_data, previous['status'], "NEGOTIATION")])
+        await AsyncContractService._record_negotiations(db, [(contract_number, contract_data['version'], negotiation_data)])
+        return Contract.from_dict(contract_data)
+
+    @staticmethod
+    async def _record_negotiations(db, rounds):
+        # ContractService._record_negotiations on the async client
+        documents = ContractService._negotiation_documents(rounds)
+        if not documents:
+            return
+        try:
+            await db.contract_negotiations.insert_many(documents, ordered=False)
+        except PyMongoError as e:
+            logger.warning("Could not record %d negotiation rounds: %s", len(documents), e)
+
+    @staticmethod
+    async def approve_reject_contract(db, contract_number, status, expected_version=None):
+        if status not in ("APPROVED", "REJECTED"):
+            raise ValueError("Invalid approval status.")
+        return await AsyncContractService._update_contract_status(db, contract_number, status, expected_version=expected_version)
+
+    @staticmethod
+    async def sign_contract(db, contract_number, expected_version=None):
+        return await AsyncContractService._update_contract_status(db, contract_number, "SIGNED", expected_version=expected_version)
+
+    @staticmethod
+    async def renew_contract(db, contract_number, expected_version=None):
+        return await AsyncContractService._update_contract_status(
+            db, contract_number, "RENEWED", {"details.last_renewal_date": datetime.utcnow()}, expected_version
+        )
+
+    @staticmethod
+    async def execute_contract(db, gridfs, contract_number, expected_version=None):
+        """Transition to EXECUTED and store the final document on the AsyncGridFS instance."""
+        file_id = ObjectId()
+        filename = f"{contract_number}_final_contract.txt"
+        contract = await AsyncContractService._update_contract_status(
+            db, contract_number, "EXECUTED", {"final_document_id": str(file_id)}, expected_version
+        )
+        try:
+            await gridfs.put(ContractService._final_document_content(contract), _id=file_id,
+                             filename=filename, contract_number=contract_number)
+        except FileExists:
+            pass
+
+        contract.details['final_document_id'] = str(file_id) # Add to contract object for response
+        return contract, {"document_id": str(file_id), "filename": filename}
+
+    @staticmethod
+    async def execute_contract_async(db, contract_number, expected_version=None):
+        """Async ContractService.execute_contract_async; the job is picked up by the same JobWorker."""
+        file_id = ObjectId()
+        filename = f"{contract_number}_final_contract.txt"
+        contract = await AsyncContractService._update_contract_status(
+            db, contract_number, "EXECUTED", {"final_document_id": str(file_id)}, expected_version
+        )
+        job_key = f"final_document:{file_id}"
+        job = JobQueue.new_job("generate_final_document",
+                               {"contract_number": contract_number, "file_id": str(file_id), "filename": filename},
+                               job_key)
+        try:
+            await db.jobs.insert_one(job)
+        except DuplicateKeyError:
+            job = await db.jobs.find_one({"job_key": job_key})
+        contract.details['final_document_id'] = str(file_id) # Add to contract object for response
+        return contract, job
+
+    @staticmethod
+    async def create_contracts_batch(db, items, chunk_size=500):
+        """
+        ContractService.create_contracts_batch, with the duplicate check and insert of each
+        chunk_size slice running concurrently. In-batch duplicates are still found across the whole batch.
+        """
+        results, candidates = ContractService._plan_batch_create(items)
+
+        async def create_chunk(chunk):
+            existing = {c['contract_number'] async for c in db.contracts.find(
+                {"contract_number": {"$in": list(chunk)}}, {"contract_number": 1, "_id": 0})}
+            to_insert = ContractService._batch_inserts(items, chunk, existing, results)
+            failed_positions = {}
+            if to_insert:
+                try:
+                    await db.contracts.bulk_write([InsertOne(ContractService._to_document(c)) for _, c in to_insert],
+                                                  ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get('writeErrors', []):
+                        failed_positions[error['index']] = error
+                await _cached(contract_cache.invalidate, db, *[c.contract_number for _, c in to_insert])
+                await AsyncContractService._record_changes(db, ContractService._batch_insert_changes(to_insert, failed_positions))
+            ContractService._record_batch_inserts(to_insert, failed_positions, results)
+
+        await asyncio.gather(*(create_chunk(chunk) for chunk in _chunks(candidates, chunk_size)))
+        return results
+
+    @staticmethod
+    async def transition_contracts_batch(db, action, items, chunk_size=500):
+        """ContractService.transition_contracts_batch, one concurrent read-then-bulk_write per chunk_size slice."""
+        new_status, results, requested = ContractService._plan_batch_transition(action, items)
+        now = datetime.utcnow()
+
+        async def transition_chunk(chunk):
+            current = {c['contract_number']: c async for c in db.contracts.find(
+                {"contract_number": {"$in": list(chunk)}}, dict(ROLLUP_PROJECTION, contract_number=1, status=1, version=1, _id=0))}
+            operations, eligible = ContractService._batch_transition_operations(new_status, items, chunk, current, now, results)
+            applied = set(eligible)
+            if operations:
+                try:
+                    matched = (await db.contracts.bulk_write(operations, ordered=False)).matched_count
+                except BulkWriteError as e:
+                    matched = e.details.get('nMatched', 0)
+                await _cached(contract_cache.invalidate, db, *eligible)
+                if matched < len(eligible):
+                    applied = {c['contract_number'] async for c in db.contracts.find(
+                        {"contract_number": {"$in": eligible}, "status": new_status, "updated_at": now},
+                        {"contract_number": 1, "_id": 0})}
+                await AsyncContractService._record_changes(
+                    db, ContractService._batch_transition_changes(new_status, current, applied))
+                if new_status == "NEGOTIATION":
+                    await AsyncContractService._record_negotiations(
+                        db, ContractService._batch_negotiation_rounds(items, chunk, current, applied))
+            ContractService._record_batch_transitions(new_status, chunk, eligible, applied, results)
+
+        await asyncio.gather(*(transition_chunk(chunk) for chunk in _chunks(requested, chunk_size)))
+        return results
+
+    @staticmethod
+    async def search_executed_contracts(db, query_params):
+        search_query, terms = ContractService._search_filter(query_params)
+        if search_query is None:
+            return []
+
+        contracts_data = await db.contracts.find(search_query, CONTRACT_PROJECTION).to_list()
+        if not terms:
+            return [Contract.from_dict(c) for c in contracts_data]
+
+        scored = [(score(c.get('details'), terms), c) for c in contracts_data]
+        scored = [item for item in scored if item[0] > 0]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [Contract.from_dict(c) for _, c in scored]
+
+    @staticmethod
+    async def iter_executed_contracts(db, query_params, after=None, limit=None, projection=None, batch_size=500):
+        """Async generator over ContractService.iter_executed_contracts' keyset-ordered results."""
+        search_query, terms = ContractService._search_filter(query_params)
+        if search_query is None:
+            return
+        unverified, projection, extra = ContractService._verification(terms, projection)
+        if after:
+            updated_at, object_id = decode_cursor(after)
+            search_query = {"$and": [search_query, {"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": object_id}}
+            ]}]}
+
+        cursor = db.contracts.find(search_query, projection).sort(
+            [("updated_at", DESCENDING), ("_id", DESCENDING)]
+        ).batch_size(batch_size)
+        if limit and not unverified:
+            cursor = cursor.limit(limit)
+        count = 0
+        async for contract_data in cursor:
+            if unverified and not ContractService._verified(contract_data, unverified, extra):
+                continue
+            yield contract_data
+            count += 1
+            if count == limit:
+                return
+
+    @staticmethod
+    async def search_executed_page(db, query_params, limit, after=None, projection=None):
+        items = []
+        last = None
+        async for contract_data in AsyncContractService.iter_executed_contracts(db, query_params, after, limit, projection):
+            last = contract_data
+            items.append(ContractService.to_response(contract_data, projection))
+        next_cursor = None
+        if last is not None and len(items) == limit:
+            next_cursor = encode_cursor(last.get('updated_at'), last['_id'])
+        return items, next_cursor
@@ -0,0 +1,242 @@
+# app/services/cache.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+import bson
+
+class LRUCache:
+    """In-process LRU with a per-entry TTL. Thread safe; values are deep-copied in and out."""
+    def __init__(self, max_size=10000, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value, ttl=None, keep=None):
+        """
+        Stores value for ttl seconds (the cache's TTL by default). keep is called with the live entry, if
+        any, under the lock; when it returns True the entry stays and value is dropped.
+        """
+        value = copy.deepcopy(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if keep is not None and entry is not None and entry[0] >= time.monotonic() and keep(entry[1]):
+                return
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SharedCache:
+    """
+    Cache shared by every worker, on a redis-style client (get / set with ex= / delete).
+    Values are stored as BSON so datetimes and ObjectIds survive the round trip.
+    """
+    def __init__(self, client, ttl=30, prefix="contract:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0 # evictions happen server side and aren't visible here
+        self.expirations = 0
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return bson.decode(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None, keep=None):
+        """
+        LRUCache.set on the shared client. keep is checked with a read before the write, not atomically:
+        a write to the same key between the two round trips is the one it can miss.
+        """
+        if keep is not None:
+            current = self.get(key)
+            if current is not None and keep(current):
+                return
+        self.client.set(self.prefix + key, bson.encode(value), ex=self.ttl if ttl is None else ttl)
+
+    def set_many(self, keys, value, ttl=None):
+        # One round trip for the lot, like delete
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(self.prefix + key, bson.encode(value), ex=self.ttl if ttl is None else ttl)
+        pipeline.execute()
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+class LocalSharedClient:
+    """In-process stand-in for a redis client, implementing only what SharedCache uses."""
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+    def scan_iter(self, match="*"):
+        prefix = match.rstrip("*")
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+        return iter(keys)
+
+class LocalPipeline:
+    """The pipeline of LocalSharedClient: commands are queued and run by execute()."""
+    def __init__(self, client):
+        self.client = client
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append((key, value, ex))
+
+    def execute(self):
+        return [self.client.set(key, value, ex) for key, value, ex in self._commands]
+
+class ContractCache:
+    """
+    Read-through cache in front of ContractService.get_contract, keyed by database and contract number.
+    Configured from the app with init_app(); disabled until then.
+
+    Entries only move forward: set keeps a newer cached version, and invalidate leaves a marker for
+    invalidation_hold seconds that set doesn't overwrite either. So a read that started before a
+    write can't put the document it read back into the cache after the write.
+    """
+    def __init__(self, backend=None, invalidation_hold=5):
+        self.backend = backend
+        self.invalidation_hold = invalidation_hold
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        backend = app.config.get('CONTRACT_CACHE_BACKEND', 'none')
+        ttl = app.config.get('CONTRACT_CACHE_TTL', 30)
+        self.invalidation_hold = min(app.config.get('CONTRACT_CACHE_INVALIDATION_HOLD', 5), ttl)
+        if backend == 'memory':
+            self.backend = LRUCache(app.config.get('CONTRACT_CACHE_MAX_SIZE', 10000), ttl)
+        elif backend == 'redis':
+            url = app.config.get('CONTRACT_CACHE_REDIS_URL')
+            if url == 'local://':
+                client = LocalSharedClient()
+            else:
+                import redis # Optional dependency, only needed for a shared cache
+                client = redis.Redis.from_url(url)
+            self.backend = SharedCache(client, ttl)
+        else:
+            self.backend = None
+
+    @property
+    def shared(self):
+        """True when every worker process sees the same entries, so a write anywhere is visible here."""
+        return isinstance(self.backend, SharedCache)
+
+    @staticmethod
+    def _key(db, contract_number):
+        return f"{db.name}:{contract_number}"
+
+    def get(self, db, contract_number):
+        if self.backend is None:
+            return None
+        value = self.backend.get(self._key(db, contract_number))
+        if not value: # Missing, or the empty marker invalidate leaves
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, db, contract_data):
+        """Caches a contract document read from or written to Mongo, unless the entry is newer or invalidated."""
+        if self.backend is not None and contract_data:
+            version = contract_data.get('version', 0)
+            self.backend.set(self._key(db, contract_data['contract_number']), contract_data,
+                             keep=lambda current: not current or current.get('version', 0) > version)
+
+    def invalidate(self, db, *contract_numbers):
+        if self.backend is None or not contract_numbers:
+            return
+        keys = [self._key(db, n) for n in contract_numbers]
+        if self.invalidation_hold <= 0:
+            self.backend.delete(*keys)
+        elif isinstance(self.backend, SharedCache):
+            self.backend.set_many(keys, {}, self.invalidation_hold)
+        else:
+            for key in keys:
+                self.backend.set(key, {}, self.invalidation_hold)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": getattr(self.backend, 'evictions', 0),
+            "expirations": getattr(self.backend, 'expirations', 0),
+            "size": len(self.backend) if isinstance(self.backend, LRUCache) else None,
+        }
+
+    def metric_lines(self):
+        """Cache counters in the Prometheus text format, for /metrics."""
+        lines = []
+        for name, value in self.stats().items():
+            if value is None:
+                continue
+            kind = "gauge" if name == "size" else "counter"
+            metric = f"contract_cache_{name}" if kind == "gauge" else f"contract_cache_{name}_total"
+            lines += [f"# TYPE {metric} {kind}", f"{metric} {value}"]
+        return lines
+
+# Shared instance, configured in create_app like the Mongo client
+contract_cache = ContractCache()
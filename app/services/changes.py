@@ -0,0 +1,104 @@
+# app/services/changes.py
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from app.services.events import event_feed
+from app.services.stats import StatsService
+
+logger = logging.getLogger(__name__)
+
+class ChangeRecorder:
+    """
+    Side effects of committed contract writes: the event outbox and the contract_stats rollup.
+    Outbox events are written in the request, right after the write, so they are stored before
+    the client hears of it. Stats are only counters the reconcile repairs: with a flush interval
+    their deltas are folded in memory and written by a background thread, one bulk_write per
+    interval. Without one (the default until init_app) they are written in the request too.
+    """
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.max_pending = 5000
+        # id(db) -> [db, stats deltas]
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._atexit = False
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('CONTRACT_CHANGES_FLUSH_INTERVAL', 0)
+        self.max_pending = app.config.get('CONTRACT_CHANGES_MAX_PENDING', 5000)
+
+    @property
+    def deferred(self):
+        return self.interval > 0
+
+    def record(self, db, changes, events=None):
+        """
+        Records (contract document, old status, new status) changes; events are the changes published
+        to the outbox, the same ones unless given. Never raises: failures are logged, the write itself
+        already happened.
+        """
+        event_feed.publish(db, changes if events is None else events)
+        self.record_stats(db, changes)
+
+    def record_stats(self, db, changes):
+        """Moves the stats buckets of changes, now or at the next flush."""
+        deltas = StatsService.deltas(changes)
+        if not deltas:
+            return
+        if not self.deferred:
+            StatsService.apply(db, deltas)
+            return
+        with self._lock:
+            self._start()
+            entry = self._pending.setdefault(id(db), [db, Counter()])
+            entry[1].update(deltas)
+            full = len(entry[1]) >= self.max_pending
+        if full:
+            # The flush thread has fallen behind: this request writes the queue itself
+            self.flush()
+
+    def flush(self):
+        """Writes the stats deltas queued so far."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for db, deltas in pending.values():
+            StatsService.apply(db, deltas)
+
+    def _start(self):
+        # Called with the lock held. Threads don't survive a fork, so each worker starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        # Queued by the parent before the fork; the parent writes those
+        self._pending = {}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="contract-changes", daemon=True)
+        self._thread.start()
+        if not self._atexit:
+            atexit.register(self.stop)
+            self._atexit = True
+
+    def stop(self, timeout=None):
+        """Stops the flush thread and writes what is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pid = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Contract change recorder error: %s", e, exc_info=True)
+
+# Shared instance, configured in create_app
+change_recorder = ChangeRecorder()
@@ -1,191 +1,775 @@
 # app/services/contract_service.py
 import logging
-from app.models.contract import Contract
+from app.models.contract import CONTRACT_DATE_FIELDS, Contract, parse_contract_dates, response_details
+from app.services.cache import contract_cache
+from app.services.changes import change_recorder
+from app.services.jobs import JobQueue, register_job_handler
+from app.services.stats import ROLLUP_PROJECTION
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.search import MAX_PREFIX_LENGTH, SEARCH_FIELDS, build_search_terms, query_terms, score
 from datetime import datetime
 from gridfs import GridFS
+from gridfs.errors import FileExists, NoFile
+from bson import ObjectId
+from pymongo import DESCENDING, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 import io
+import re
 
-# Configure basic logging (add this at the top of the file for quick debugging)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Module logger; handlers and levels are left to the app / gunicorn configuration
+logger = logging.getLogger(__name__)
+
+# Lifecycle state machine: target status -> statuses it may be entered from
+CONTRACT_TRANSITIONS = {
+    "NEGOTIATION": ("NEW",),
+    "APPROVED": ("NEGOTIATION",),
+    "REJECTED": ("NEGOTIATION",),
+    "SIGNED": ("APPROVED",),
+    "EXECUTED": ("SIGNED",),
+    "RENEWED": ("EXECUTED",),
+}
+
+# Statuses a negotiation round is accepted in: the first moves a NEW contract to NEGOTIATION, later ones keep it there
+NEGOTIABLE_STATUSES = CONTRACT_TRANSITIONS["NEGOTIATION"] + ("NEGOTIATION",)
+
+class VersionConflictError(ValueError):
+    """Raised when an If-Match precondition doesn't hold; a ValueError so existing handlers still catch it."""
+
+# Fields returned when reading a whole contract; search_terms is only for the index
+CONTRACT_PROJECTION = {"search_terms": 0}
+
+# GridFS document variants -> contract field holding the file id
+DOCUMENT_FIELDS = {
+    "final": "final_document_id",
+    "migrated": "migrated_document_id",
+}
+
+# Batch endpoint actions -> target status
+BATCH_ACTIONS = {
+    "negotiate": "NEGOTIATION",
+    "approve": "APPROVED",
+    "reject": "REJECTED",
+    "sign": "SIGNED",
+    "renew": "RENEWED",
+}
 
 class ContractService:
     @staticmethod
     def create_contract(db, data):
-        logging.info(f"Attempting to create contract with data: {data}")
+        contract_number = data.get('contract_number')
+        logger.debug("Creating contract %s with details %s", contract_number, data.get('details'))
+        details = parse_contract_dates(data['details'])
         try:
-            contract_number = data['contract_number']
-            logging.info(f"Checking for existing contract: {contract_number}")
-            if db.contracts.find_one({"contract_number": contract_number}):
-                logging.warning(f"Contract with number {contract_number} already exists.")
-                raise ValueError(f"Contract with number {contract_number} already exists.")
-
-            logging.info(f"Creating Contract object for {contract_number} with status 'NEW' and details: {data['details']}")
-            contract = Contract(contract_number, "NEW", data['details'])
-
-            logging.info(f"Converting contract object to dictionary: {contract.to_dict()}")
-            contract_dict = contract.to_dict()
-
-            logging.info(f"Inserting contract into MongoDB collection 'contracts'.")
-            db.contracts.insert_one(contract_dict)
-            logging.info(f"Contract {contract_number} successfully inserted.")
+            contract = Contract(data['contract_number'], "NEW", details)
+            # The unique index on contract_number rejects duplicates, no need to read first
+            document = ContractService._to_document(contract)
+            db.contracts.insert_one(document)
+            contract_cache.invalidate(db, contract_number)
+            ContractService._record_changes(db, [(document, None, contract.status)])
             return contract
-        except Exception as e:
-            logging.error(f"Error during contract creation: {e}", exc_info=True) # exc_info=True prints traceback
+        except DuplicateKeyError:
+            logger.info("Contract with number %s already exists.", contract_number)
+            raise ValueError(f"Contract with number {contract_number} already exists.")
+        except Exception:
+            logger.exception("Error during contract creation for %s", contract_number)
             raise # Re-raise the exception so Flask's error handler can catch it
 
+    @staticmethod
+    def _record_changes(db, changes):
+        # Side effects of committed transitions, as (contract document, old status, new status): the event
+        # outbox, written now, and the stats rollup, possibly at change_recorder's next flush. Neither raises.
+        change_recorder.record(db, changes)
+
+    @staticmethod
+    def _to_document(contract):
+        # Stored form of a contract: the API dict with the dates kept as datetimes, plus the keyword search terms
+        contract_dict = contract.to_dict()
+        contract_dict['details'] = contract.details
+        contract_dict['search_terms'] = build_search_terms(contract.details)
+        return contract_dict
+
     @staticmethod
     def get_contract(db, contract_number):
-        contract_data = db.contracts.find_one({"contract_number": contract_number})
+        # Read-through: only misses go to Mongo, and every write path below refreshes or drops the entry
+        contract_data = contract_cache.get(db, contract_number)
+        if contract_data is None:
+            contract_data = db.contracts.find_one({"contract_number": contract_number}, CONTRACT_PROJECTION)
+            contract_cache.set(db, contract_data)
         if contract_data:
             return Contract.from_dict(contract_data)
         return None
 
     @staticmethod
-    def _update_contract_status(db, contract_number, new_status, allowed_previous_statuses):
-        contract = ContractService.get_contract(db, contract_number)
-        if not contract:
-            raise ValueError("Contract not found.")
-        if contract.status not in allowed_previous_statuses:
-            raise ValueError(f"Cannot transition from '{contract.status}' to '{new_status}'.")
+    def get_contract_version(db, contract_number):
+        """
+        Current version of a contract, or None if it doesn't exist.
+        Answered from a shared cache when possible, otherwise from a projection-only query. A per-worker
+        cache can lag behind another worker's write, which would turn If-None-Match into a false 304.
+        """
+        contract_data = contract_cache.get(db, contract_number) if contract_cache.shared else None
+        if contract_data is None:
+            contract_data = db.contracts.find_one({"contract_number": contract_number}, {"version": 1, "_id": 0})
+            if contract_data is None:
+                return None
+        return contract_data.get('version', 0)
 
-        db.contracts.update_one(
-            {"contract_number": contract_number},
-            {"$set": {"status": new_status, "updated_at": datetime.utcnow()}}
-        )
-        contract.status = new_status
-        contract.updated_at = datetime.utcnow()
-        return contract
+    @staticmethod
+    def _version_filter(expected_version):
+        # Documents written before versioning have no version field and count as 0
+        if expected_version == 0:
+            return {"version": {"$exists": False}}
+        return {"version": expected_version}
 
     @staticmethod
-    def negotiate_contract(db, contract_number, negotiation_data):
-        contract = ContractService._update_contract_status(db, contract_number, "NEGOTIATION", ["NEW"])
-        # Update negotiation details
-        db.contracts.update_one(
-            {"contract_number": contract_number},
-            {"$set": {"details.negotiation": negotiation_data, "updated_at": datetime.utcnow()}}
+    def _update_contract_status(db, contract_number, new_status, extra_fields=None, expected_version=None):
+        """
+        Applies a lifecycle transition in a single round trip.
+        The status guard and every field change go into one conditional
+        find_one_and_update, so two workers can't both win the same transition.
+        With expected_version (from If-Match) the version is guarded in the same filter.
+        """
+        allowed_previous_statuses = CONTRACT_TRANSITIONS.get(new_status)
+        if allowed_previous_statuses is None:
+            raise ValueError(f"Unknown contract status '{new_status}'.")
+
+        update_fields = {"status": new_status, "updated_at": datetime.utcnow()}
+        if extra_fields:
+            update_fields.update(extra_fields)
+
+        query = {"contract_number": contract_number, "status": {"$in": list(allowed_previous_statuses)}}
+        if expected_version is not None:
+            query.update(ContractService._version_filter(expected_version))
+
+        contract_data = db.contracts.find_one_and_update(
+            query,
+            {"$set": update_fields, "$inc": {"version": 1}},
+            projection=CONTRACT_PROJECTION,
+            return_document=ReturnDocument.AFTER
         )
-        contract.details['negotiation'] = negotiation_data
-        return contract
+        if contract_data:
+            # The update hands back the new document, so refresh the cache instead of dropping it
+            contract_cache.set(db, contract_data)
+            # Every target status has a single source status, so the guard says what it was
+            ContractService._record_changes(db, [(contract_data, allowed_previous_statuses[0], new_status)])
+            return Contract.from_dict(contract_data)
+
+        ContractService._raise_transition_error(db, contract_number, new_status, expected_version)
+
+    @staticmethod
+    def _raise_transition_error(db, contract_number, new_status, expected_version):
+        # Only the failure path pays for a second read, to tell "not found" apart from "wrong state"
+        current = db.contracts.find_one({"contract_number": contract_number}, {"status": 1, "version": 1})
+        ContractService._transition_error(current, new_status, expected_version)
 
     @staticmethod
-    def approve_reject_contract(db, contract_number, status):
+    def _transition_error(current, new_status, expected_version):
+        # Raises the error for a guarded update that matched nothing, given the contract's status and version
+        if not current:
+            raise ValueError("Contract not found.")
+        if expected_version is not None and current.get('version', 0) != expected_version:
+            raise VersionConflictError("Contract was modified by another request.")
+        raise ValueError(f"Cannot transition from '{current.get('status')}' to '{new_status}'.")
+
+    @staticmethod
+    def negotiate_contract(db, contract_number, negotiation_data, expected_version=None):
+        """
+        Records a negotiation round: the first one moves a NEW contract to NEGOTIATION, later ones
+        keep it there. details.negotiation holds the latest round only; every round is appended to
+        contract_negotiations, so the contract document doesn't grow with the history.
+        """
+        query, update = ContractService._negotiation_update(contract_number, negotiation_data, expected_version)
+        # The document before the update says whether this round was the transition
+        previous = db.contracts.find_one_and_update(query, update, projection=CONTRACT_PROJECTION,
+                                                    return_document=ReturnDocument.BEFORE)
+        if previous is None:
+            ContractService._raise_transition_error(db, contract_number, "NEGOTIATION", expected_version)
+        contract_data = ContractService._negotiated_document(previous, update)
+        contract_cache.set(db, contract_data)
+        if previous['status'] != "NEGOTIATION":
+            ContractService._record_changes(db, [(contract_data, previous['status'], "NEGOTIATION")])
+        ContractService._record_negotiations(db, [(contract_number, contract_data['version'], negotiation_data)])
+        return Contract.from_dict(contract_data)
+
+    @staticmethod
+    def _negotiation_update(contract_number, negotiation_data, expected_version):
+        # Filter and update of a negotiation round; shared with the async service
+        query = {"contract_number": contract_number, "status": {"$in": list(NEGOTIABLE_STATUSES)}}
+        if expected_version is not None:
+            query.update(ContractService._version_filter(expected_version))
+        update = {"$set": {"status": "NEGOTIATION", "details.negotiation": negotiation_data,
+                           "updated_at": datetime.utcnow()}, "$inc": {"version": 1}}
+        return query, update
+
+    @staticmethod
+    def _negotiated_document(previous, update):
+        # The contract after a negotiation round, from the document before it
+        fields = update["$set"]
+        contract_data = dict(previous, status=fields["status"], updated_at=fields["updated_at"],
+                             version=previous.get('version', 0) + 1)
+        contract_data['details'] = dict(previous.get('details') or {}, negotiation=fields["details.negotiation"])
+        return contract_data
+
+    @staticmethod
+    def _negotiation_documents(rounds):
+        # contract_negotiations documents for (contract_number, contract version, negotiation) rounds
+        now = datetime.utcnow()
+        return [{"contract_number": contract_number, "version": version, "negotiation": negotiation, "created_at": now}
+                for contract_number, version, negotiation in rounds]
+
+    @staticmethod
+    def _record_negotiations(db, rounds):
+        """Appends rounds to the history. Failures are logged, not raised: the round is already on the contract."""
+        documents = ContractService._negotiation_documents(rounds)
+        if not documents:
+            return
+        try:
+            db.contract_negotiations.insert_many(documents, ordered=False)
+        except PyMongoError as e:
+            logger.warning("Could not record %d negotiation rounds: %s", len(documents), e)
+
+    @staticmethod
+    def get_negotiations(db, contract_number, limit, after=None):
+        """
+        A page of a contract's negotiation rounds, newest first, and the cursor of the next page.
+        Served by the (contract_number, version) index; the cursor is the version of the last round returned.
+        Returns (None, None) when the contract doesn't exist.
+        """
+        query = {"contract_number": contract_number}
+        if after is not None:
+            try:
+                query["version"] = {"$lt": int(after)}
+            except (TypeError, ValueError):
+                raise ValueError("Invalid pagination cursor.")
+        rounds = list(db.contract_negotiations.find(query, {"_id": 0, "contract_number": 0})
+                      .sort("version", DESCENDING).limit(limit))
+        if not rounds and after is None and ContractService.get_contract_version(db, contract_number) is None:
+            return None, None
+        next_cursor = str(rounds[-1]["version"]) if len(rounds) == limit else None
+        return rounds, next_cursor
+
+    @staticmethod
+    def approve_reject_contract(db, contract_number, status, expected_version=None):
         # Contract cannot jump intermediate stages
-        if status == "APPROVED":
-            return ContractService._update_contract_status(db, contract_number, "APPROVED", ["NEGOTIATION"])
-        elif status == "REJECTED":
-            return ContractService._update_contract_status(db, contract_number, "REJECTED", ["NEGOTIATION"])
-        else:
+        if status not in ("APPROVED", "REJECTED"):
             raise ValueError("Invalid approval status.")
+        return ContractService._update_contract_status(db, contract_number, status, expected_version=expected_version)
 
     @staticmethod
-    def sign_contract(db, contract_number):
-        return ContractService._update_contract_status(db, contract_number, "SIGNED", ["APPROVED"])
+    def sign_contract(db, contract_number, expected_version=None):
+        return ContractService._update_contract_status(db, contract_number, "SIGNED", expected_version=expected_version)
 
     @staticmethod
-    def execute_contract(db, gridfs, contract_number):
-        contract = ContractService._update_contract_status(db, contract_number, "EXECUTED", ["SIGNED"])
+    def execute_contract(db, gridfs, contract_number, expected_version=None):
+        # Reserve the file id up front so the status change and the document link land in one update
+        file_id = ObjectId()
+        filename = f"{contract_number}_final_contract.txt"
+        contract = ContractService._update_contract_status(
+            db, contract_number, "EXECUTED", {"final_document_id": str(file_id)}, expected_version
+        )
 
-        # Simulate creating a final contract document
-        document_content = f"Final Contract Document for {contract_number}\n\nDetails: {contract.details}"
+        ContractService._store_final_document(gridfs, contract, file_id, filename)
 
-        # Store the document in GridFS
-        file_id = gridfs.put(io.BytesIO(document_content.encode('utf-8')), filename=f"{contract_number}_final_contract.txt", contract_number=contract_number)
+        contract.details['final_document_id'] = str(file_id) # Add to contract object for response
+        return contract, {"document_id": str(file_id), "filename": filename}
 
-        # Update contract in MongoDB with document ID
-        db.contracts.update_one(
-            {"contract_number": contract_number},
-            {"$set": {"final_document_id": str(file_id), "updated_at": datetime.utcnow()}}
+    @staticmethod
+    def execute_contract_async(db, contract_number, expected_version=None):
+        """
+        Commits the EXECUTED status and queues the document build instead of doing it in the request.
+        Returns the contract and the generation job.
+        """
+        file_id = ObjectId()
+        filename = f"{contract_number}_final_contract.txt"
+        contract = ContractService._update_contract_status(
+            db, contract_number, "EXECUTED", {"final_document_id": str(file_id)}, expected_version
+        )
+        # Keyed on the reserved file id: one job per execution however often it's enqueued
+        job = JobQueue.enqueue(
+            db, "generate_final_document",
+            {"contract_number": contract_number, "file_id": str(file_id), "filename": filename},
+            job_key=f"final_document:{file_id}"
         )
         contract.details['final_document_id'] = str(file_id) # Add to contract object for response
-        return contract, {"document_id": str(file_id), "filename": f"{contract_number}_final_contract.txt"}
+        return contract, job
 
     @staticmethod
-    def search_executed_contracts(db, query_params):
+    def queued_document_info(job):
+        """final_document of a 202 execute response: the reserved document and the job building it."""
+        return {"document_id": job["payload"]["file_id"], "filename": job["payload"]["filename"],
+                "job_id": str(job["_id"]), "job_status": job["status"]}
+
+    @staticmethod
+    def _store_final_document(gridfs, contract, file_id, filename):
+        """Renders the final document and stores it under file_id. A file that already exists is left alone."""
+        if gridfs.exists(file_id):
+            return
+        try:
+            gridfs.put(io.BytesIO(ContractService._final_document_content(contract)), _id=file_id, filename=filename, contract_number=contract.contract_number)
+        except FileExists:
+            pass # A previous attempt got there first
+
+    @staticmethod
+    def _final_document_content(contract):
+        # Simulate creating a final contract document
+        document_content = f"Final Contract Document for {contract.contract_number}\n\nDetails: {contract.details}"
+        return document_content.encode('utf-8')
+
+    @staticmethod
+    def generate_final_document_job(db, gridfs, payload, job):
+        """Job handler for execute_contract_async. Safe to re-run: the file id is fixed by the payload."""
+        contract = ContractService.get_contract(db, payload["contract_number"])
+        if not contract:
+            raise ValueError("Contract not found.")
+        file_id = ObjectId(payload["file_id"])
+        ContractService._store_final_document(gridfs, contract, file_id, payload["filename"])
+        return {"document_id": payload["file_id"], "filename": payload["filename"]}
+
+    @staticmethod
+    def get_contract_document(db, gridfs, contract_number, variant="final"):
+        """
+        Opens the stored GridFS file for a contract ('final' from execute, 'migrated' from migration).
+        Returns a GridOut, which reads chunk by chunk, so the file is never loaded whole.
+        """
+        field = DOCUMENT_FIELDS.get(variant)
+        if field is None:
+            raise ValueError(f"Unknown document variant '{variant}'.")
+        contract_data = contract_cache.get(db, contract_number)
+        if contract_data is None:
+            contract_data = db.contracts.find_one({"contract_number": contract_number}, {field: 1})
+        if not contract_data:
+            raise ValueError("Contract not found.")
+        if not contract_data.get(field):
+            raise ValueError(f"Contract has no {variant} document.")
+        try:
+            return gridfs.get(ObjectId(contract_data[field]))
+        except NoFile:
+            raise ValueError(f"Contract has no {variant} document.")
+
+    @staticmethod
+    def iter_document(grid_out, start=0, stop=None, chunk_size=None):
+        """Yields the bytes of grid_out between start and stop, one GridFS chunk at a time."""
+        stop = grid_out.length if stop is None else stop
+        chunk_size = chunk_size or grid_out.chunk_size
+        grid_out.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            data = grid_out.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    @staticmethod
+    def create_contracts_batch(db, items):
+        """
+        Creates many contracts with one $in duplicate check and one unordered bulk_write.
+        Returns a per-item result list in the same order as the input.
+        """
+        results, candidates = ContractService._plan_batch_create(items)
+
+        existing = set()
+        if candidates:
+            existing = {c['contract_number'] for c in db.contracts.find(
+                {"contract_number": {"$in": list(candidates)}}, {"contract_number": 1, "_id": 0})}
+
+        to_insert = ContractService._batch_inserts(items, candidates, existing, results)
+        failed_positions = {}
+        if to_insert:
+            try:
+                db.contracts.bulk_write([InsertOne(ContractService._to_document(c)) for _, c in to_insert], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    failed_positions[error['index']] = error
+            contract_cache.invalidate(db, *[c.contract_number for _, c in to_insert])
+            ContractService._record_changes(db, ContractService._batch_insert_changes(to_insert, failed_positions))
+
+        ContractService._record_batch_inserts(to_insert, failed_positions, results)
+        return results
+
+    @staticmethod
+    def _plan_batch_create(items):
+        # Rejects malformed items and in-batch duplicates; returns (results, {contract_number: index})
+        results = [None] * len(items)
+        candidates = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or 'contract_number' not in item or 'details' not in item:
+                results[index] = {"contract_number": item.get('contract_number') if isinstance(item, dict) else None,
+                                  "success": False, "message": "Missing contract_number or details"}
+            elif item['contract_number'] in candidates:
+                results[index] = {"contract_number": item['contract_number'], "success": False,
+                                  "message": f"Contract with number {item['contract_number']} is duplicated in the batch."}
+            else:
+                candidates[item['contract_number']] = index
+        return results, candidates
+
+    @staticmethod
+    def _batch_inserts(items, candidates, existing, results):
+        # Contracts to insert as (index, Contract); records the ones that already exist
+        to_insert = []
+        for contract_number, index in candidates.items():
+            if contract_number in existing:
+                results[index] = {"contract_number": contract_number, "success": False,
+                                  "message": f"Contract with number {contract_number} already exists."}
+                continue
+            try:
+                details = parse_contract_dates(items[index]['details'])
+            except ValueError as e:
+                results[index] = {"contract_number": contract_number, "success": False, "message": str(e)}
+                continue
+            to_insert.append((index, Contract(contract_number, "NEW", details)))
+        return to_insert
+
+    @staticmethod
+    def _batch_insert_changes(to_insert, failed_positions):
+        # Rollup and event changes for the inserts that went through
+        return [({"contract_number": contract.contract_number, "details": contract.details, "version": contract.version},
+                 None, contract.status)
+                for position, (_, contract) in enumerate(to_insert) if position not in failed_positions]
+
+    @staticmethod
+    def _record_batch_inserts(to_insert, failed_positions, results):
+        for position, (index, contract) in enumerate(to_insert):
+            error = failed_positions.get(position)
+            if error is None:
+                results[index] = {"contract_number": contract.contract_number, "success": True,
+                                  "contract": contract.to_dict()}
+            elif error.get('code') == 11000:
+                results[index] = {"contract_number": contract.contract_number, "success": False,
+                                  "message": f"Contract with number {contract.contract_number} already exists."}
+            else:
+                results[index] = {"contract_number": contract.contract_number, "success": False,
+                                  "message": error.get('errmsg', "Write failed.")}
+
+    @staticmethod
+    def transition_contracts_batch(db, action, items):
+        """
+        Applies one lifecycle action to many contracts: one $in read to classify the
+        items, then one unordered bulk_write of status-guarded updates.
+        Items are contract numbers, or objects with a contract_number
+        (and a 'negotiation' payload for the negotiate action).
+        """
+        new_status, results, requested = ContractService._plan_batch_transition(action, items)
+
+        current = {}
+        if requested:
+            current = {c['contract_number']: c for c in db.contracts.find(
+                {"contract_number": {"$in": list(requested)}},
+                dict(ROLLUP_PROJECTION, contract_number=1, status=1, version=1, _id=0))}
+
+        now = datetime.utcnow()
+        operations, eligible = ContractService._batch_transition_operations(new_status, items, requested, current, now, results)
+
+        applied = set(eligible)
+        if operations:
+            try:
+                matched = db.contracts.bulk_write(operations, ordered=False).matched_count
+            except BulkWriteError as e:
+                matched = e.details.get('nMatched', 0)
+            contract_cache.invalidate(db, *eligible)
+            if matched < len(eligible):
+                # Someone else moved a contract between the read and the write; find out who won
+                applied = {c['contract_number'] for c in db.contracts.find(
+                    {"contract_number": {"$in": eligible}, "status": new_status, "updated_at": now},
+                    {"contract_number": 1, "_id": 0})}
+            ContractService._record_changes(db, ContractService._batch_transition_changes(new_status, current, applied))
+            if new_status == "NEGOTIATION":
+                ContractService._record_negotiations(db, ContractService._batch_negotiation_rounds(items, requested, current, applied))
+
+        ContractService._record_batch_transitions(new_status, requested, eligible, applied, results)
+        return results
+
+    @staticmethod
+    def _plan_batch_transition(action, items):
+        # Validates the action and items; returns (new_status, results, {contract_number: index})
+        new_status = BATCH_ACTIONS.get(action)
+        if new_status is None:
+            raise ValueError(f"Invalid batch action '{action}'.")
+        results = [None] * len(items)
+        requested = {}
+        for index, item in enumerate(items):
+            contract_number = item.get('contract_number') if isinstance(item, dict) else item
+            if not isinstance(contract_number, str):
+                results[index] = {"contract_number": None, "success": False, "message": "Missing contract_number"}
+            elif contract_number in requested:
+                results[index] = {"contract_number": contract_number, "success": False,
+                                  "message": f"Contract with number {contract_number} is duplicated in the batch."}
+            else:
+                requested[contract_number] = index
+        return new_status, results, requested
+
+    @staticmethod
+    def _batch_transition_operations(new_status, items, requested, current, now, results):
+        # UpdateOnes for the contracts in an allowed state, guarded by the status and version read; records the rest
+        allowed_previous_statuses = NEGOTIABLE_STATUSES if new_status == "NEGOTIATION" else CONTRACT_TRANSITIONS[new_status]
+        operations = []
+        eligible = []
+        for contract_number, index in requested.items():
+            status = current[contract_number]['status'] if contract_number in current else None
+            if status is None:
+                results[index] = {"contract_number": contract_number, "success": False, "message": "Contract not found."}
+                continue
+            if status not in allowed_previous_statuses:
+                results[index] = {"contract_number": contract_number, "success": False,
+                                  "message": f"Cannot transition from '{status}' to '{new_status}'."}
+                continue
+            update_fields = {"status": new_status, "updated_at": now}
+            if new_status == "NEGOTIATION":
+                update_fields["details.negotiation"] = items[index].get('negotiation') if isinstance(items[index], dict) else None
+            elif new_status == "RENEWED":
+                update_fields["details.last_renewal_date"] = now
+            # The version guard catches a concurrent round on a contract already in NEGOTIATION too
+            operations.append(UpdateOne(
+                dict({"contract_number": contract_number, "status": status},
+                     **ContractService._version_filter(current[contract_number].get('version', 0))),
+                {"$set": update_fields, "$inc": {"version": 1}}
+            ))
+            eligible.append(contract_number)
+        return operations, eligible
+
+    @staticmethod
+    def _batch_transition_changes(new_status, current, applied):
+        # The version guard means an applied contract still had the version read before the write.
+        # Later negotiation rounds don't change the status, so they aren't transitions.
+        return [(dict(current[cn], version=current[cn].get('version', 0) + 1), current[cn]['status'], new_status)
+                for cn in applied if current[cn]['status'] != new_status]
+
+    @staticmethod
+    def _batch_negotiation_rounds(items, requested, current, applied):
+        # History rounds for a batch negotiate, at the version each contract was moved to
+        return [(cn, current[cn].get('version', 0) + 1,
+                 items[requested[cn]].get('negotiation') if isinstance(items[requested[cn]], dict) else None)
+                for cn in applied]
+
+    @staticmethod
+    def _record_batch_transitions(new_status, requested, eligible, applied, results):
+        for contract_number in eligible:
+            index = requested[contract_number]
+            if contract_number in applied:
+                results[index] = {"contract_number": contract_number, "success": True, "status": new_status}
+            else:
+                results[index] = {"contract_number": contract_number, "success": False,
+                                  "message": "Contract changed state concurrently."}
+
+    @staticmethod
+    def _search_filter(query_params):
+        """
+        Builds the Mongo filter for an executed-contract search.
+        Returns (filter, terms); filter is None when the keyword can never match.
+        """
         # Example: search by contract_number or keywords in details
         search_query = {"status": "EXECUTED"}
         if 'contract_number' in query_params:
             search_query["contract_number"] = query_params['contract_number']
-        if 'keyword' in query_params:
-            # Create a list of conditions for the $or operator
-            # This will search for the keyword in multiple fields
-            keyword = query_params['keyword']
-            regex_query = {"$regex": keyword, "$options": "i"}
-            
-            # Build the list of search conditions for the $or clause
-            or_conditions = [
+
+        terms = query_terms(query_params.get('keyword', ''))
+        if 'keyword' in query_params and query_params.get('mode') == 'regex':
+            # Legacy substring match; can't use an index, kept for documents without search_terms
+            regex_query = {"$regex": re.escape(query_params['keyword']), "$options": "i"}
+            search_query["$or"] = [ # type: ignore
                 {"details.contract_name": regex_query},
                 {"details.contract_category": regex_query},
                 {"details.party1": regex_query},
-                {"details.party2": regex_query} # You can add as many fields as you need
+                {"details.party2": regex_query}
             ]
-            
-            # Add the $or operator to the main search_query
-            # This will find documents matching any of the conditions in or_conditions
-            search_query["$or"] = or_conditions # type: ignore
+            return search_query, []
+        if terms:
+            # Every term must be a word prefix in one of the searchable fields (served by status_search_terms)
+            search_query["search_terms"] = {"$all": [t[:MAX_PREFIX_LENGTH] for t in terms]} # type: ignore
+        elif 'keyword' in query_params:
+            return None, []
+        return search_query, terms
 
-        contracts_data = db.contracts.find(search_query)
-        return [Contract.from_dict(c) for c in contracts_data]
+    @staticmethod
+    def search_executed_contracts(db, query_params):
+        search_query, terms = ContractService._search_filter(query_params)
+        if search_query is None:
+            return []
+
+        contracts_data = db.contracts.find(search_query, CONTRACT_PROJECTION)
+        if not terms:
+            return [Contract.from_dict(c) for c in contracts_data]
+
+        # Order by relevance, dropping matches that only hit the truncated stored prefix
+        scored = [(score(c.get('details'), terms), c) for c in contracts_data]
+        scored = [item for item in scored if item[0] > 0]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [Contract.from_dict(c) for _, c in scored]
 
     @staticmethod
-    def renew_contract(db, contract_number):
-        contract = ContractService.get_contract(db, contract_number)
-        if not contract:
-            raise ValueError("Contract not found.")
-        # Assuming an 'expiration_date' in details
-        if contract.status == "EXECUTED": # You might also want to check if it's "EXPIRED"
-            # For simplicity, we just mark as RENEWED.
-            # In a real system, you'd create a new contract version or update expiration date.
-            db.contracts.update_one(
-                {"contract_number": contract_number},
-                {"$set": {"status": "RENEWED", "updated_at": datetime.utcnow(), "details.last_renewal_date": datetime.utcnow()}}
-            )
-            contract.status = "RENEWED"
-            contract.updated_at = datetime.utcnow()
-            contract.details['last_renewal_date'] = datetime.utcnow()
-            return contract
-        else:
-            raise ValueError(f"Contract status must be 'EXECUTED' to be renewed. Current status: {contract.status}")
+    def iter_executed_contracts(db, query_params, after=None, limit=None, projection=None, batch_size=500):
+        """
+        Yields raw executed contracts newest first, ordered by (updated_at, _id) so a
+        page can resume from an opaque cursor. Documents come straight off the
+        Mongo cursor, so memory stays bounded however many match.
+        The projection is pushed down to Mongo; updated_at and _id are always kept for the cursor.
+        Keyword matches are verified like search_executed_contracts does, without the ranking.
+        """
+        search_query, terms = ContractService._search_filter(query_params)
+        if search_query is None:
+            return
+        unverified, projection, extra = ContractService._verification(terms, projection)
+        if after:
+            updated_at, object_id = decode_cursor(after)
+            search_query = {"$and": [search_query, {"$or": [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": object_id}}
+            ]}]}
+
+        cursor = db.contracts.find(search_query, projection).sort(
+            [("updated_at", DESCENDING), ("_id", DESCENDING)]
+        ).batch_size(batch_size)
+        # Candidates that only share a long term's stored prefix are skipped, so then the limit is counted here
+        if limit and not unverified:
+            cursor = cursor.limit(limit)
+        count = 0
+        for contract_data in cursor:
+            if unverified and not ContractService._verified(contract_data, unverified, extra):
+                continue
+            yield contract_data
+            count += 1
+            if count == limit:
+                return
+
+    @staticmethod
+    def _verification(terms, projection):
+        """
+        (terms to verify, Mongo projection, details fields fetched only to verify) of a keyset search.
+        search_terms holds the first MAX_PREFIX_LENGTH characters of each token, so longer terms are
+        checked with score() on the searchable details fields. Shared with the async service.
+        """
+        unverified = [term for term in terms if len(term) > MAX_PREFIX_LENGTH]
+        if not projection:
+            return unverified, CONTRACT_PROJECTION, []
+        mongo_projection = dict(projection, updated_at=1, _id=1)
+        extra = []
+        if unverified and 'details' not in projection:
+            extra = [field for field in SEARCH_FIELDS if f"details.{field}" not in projection]
+            mongo_projection.update({f"details.{field}": 1 for field in extra})
+        return unverified, mongo_projection, extra
+
+    @staticmethod
+    def _verified(contract_data, unverified, extra):
+        # True when the contract matches the long terms in full; drops the details the client didn't ask for
+        details = contract_data.get('details') or {}
+        if not score(details, unverified):
+            return False
+        for field in extra:
+            details.pop(field, None)
+        if extra and not details:
+            contract_data.pop('details', None)
+        return True
+
+    @staticmethod
+    def search_executed_page(db, query_params, limit, after=None, projection=None):
+        """Returns one page of search results and the cursor for the next page (None on the last page)."""
+        items = []
+        last = None
+        for contract_data in ContractService.iter_executed_contracts(db, query_params, after, limit, projection):
+            last = contract_data
+            items.append(ContractService.to_response(contract_data, projection))
+        next_cursor = None
+        if last is not None and len(items) == limit:
+            next_cursor = encode_cursor(last.get('updated_at'), last['_id'])
+        return items, next_cursor
+
+    @staticmethod
+    def to_response(contract_data, projection=None):
+        """Raw contract document -> API dict. With a projection only the requested fields are returned."""
+        if not projection:
+            return Contract.from_dict(contract_data).to_dict()
+        response = {}
+        for field in projection:
+            root = field.split('.', 1)[0]
+            if root in contract_data and root not in response:
+                value = contract_data[root]
+                if root == 'details':
+                    value = response_details(value)
+                response[root] = value.isoformat() if isinstance(value, datetime) else value
+        return response
+
+    @staticmethod
+    def rebuild_search_terms(db, batch_size=1000):
+        """Backfills search_terms on contracts stored before keyword indexing existed."""
+        updated = 0
+        operations = []
+        for c in db.contracts.find({"search_terms": {"$exists": False}}, {"contract_number": 1, "details": 1}):
+            operations.append(UpdateOne({"_id": c["_id"]}, {"$set": {"search_terms": build_search_terms(c.get('details'))}}))
+            if len(operations) >= batch_size:
+                updated += db.contracts.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += db.contracts.bulk_write(operations, ordered=False).modified_count
+        return updated
+
+    @staticmethod
+    def rebuild_search_terms_job(db, gridfs, payload, job):
+        """Job handler for rebuild_search_terms, queued once at startup."""
+        return {"updated": ContractService.rebuild_search_terms(db, payload.get("batch_size", 1000))}
+
+    @staticmethod
+    def convert_contract_dates(db, batch_size=1000):
+        """
+        Backfills details.start_date / end_date as datetimes on contracts stored with date strings,
+        which the end date range queries can't match. Contracts with unparsable dates are left as they are.
+        The version is bumped, so ETags taken before the change no longer match.
+        """
+        converted = invalid = 0
+        operations = []
+        contract_numbers = []
+        query = {"$or": [{f"details.{field}": {"$type": "string"}} for field in CONTRACT_DATE_FIELDS]}
+        projection = dict({f"details.{field}": 1 for field in CONTRACT_DATE_FIELDS}, contract_number=1)
+        for c in db.contracts.find(query, projection):
+            details = c.get('details') or {}
+            try:
+                dates = parse_contract_dates(details)
+            except ValueError as e:
+                logger.warning("Contract %s keeps its date strings: %s", c.get('contract_number'), e)
+                invalid += 1
+                continue
+            fields = [field for field in CONTRACT_DATE_FIELDS if isinstance(details.get(field), str)]
+            # Guarded by the old values, so a concurrent edit isn't overwritten
+            operations.append(UpdateOne(dict({f"details.{f}": details[f] for f in fields}, _id=c["_id"]),
+                                        {"$set": {f"details.{f}": dates[f] for f in fields}, "$inc": {"version": 1}}))
+            contract_numbers.append(c.get('contract_number'))
+            if len(operations) >= batch_size:
+                converted += db.contracts.bulk_write(operations, ordered=False).modified_count
+                contract_cache.invalidate(db, *contract_numbers)
+                operations, contract_numbers = [], []
+        if operations:
+            converted += db.contracts.bulk_write(operations, ordered=False).modified_count
+            contract_cache.invalidate(db, *contract_numbers)
+        return {"converted": converted, "invalid": invalid}
+
+    @staticmethod
+    def convert_contract_dates_job(db, gridfs, payload, job):
+        """Job handler for convert_contract_dates, queued once at startup."""
+        return ContractService.convert_contract_dates(db, payload.get("batch_size", 1000))
+
+    @staticmethod
+    def renew_contract(db, contract_number, expected_version=None):
+        # For simplicity, we just mark as RENEWED.
+        # In a real system, you'd create a new contract version or update expiration date.
+        return ContractService._update_contract_status(
+            db, contract_number, "RENEWED", {"details.last_renewal_date": datetime.utcnow()}, expected_version
+        )
 
     @staticmethod
     def migrate_older_contracts(db, gridfs_db):
         """
         Simulates migration from an older SQL-based system.
-        In a real scenario, this would connect to the SQL DB, fetch data,
-        and insert into MongoDB/GridFS.
+        Real exports go through MigrationService.start, which streams the
+        source file in chunks on the job workers.
         """
-        # Placeholder for connecting to old SQL DB
-        # For demonstration, we'll just create some dummy old contracts
-        migrated_count = 0
+        from app.services.migration import MigrationService # Imported here, migration builds on this module
 
         # Simulate fetching old contract data (e.g., from an SQL query result)
         old_contracts_data = [
             {"contract_number": "OLD-001", "old_status": "COMPLETED", "old_text": "This is an old contract text 1."},
             {"contract_number": "OLD-002", "old_status": "ARCHIVED", "old_text": "This is another old contract text 2."}
         ]
+        totals = MigrationService.migrate_rows(db, gridfs_db, old_contracts_data)
+        return {"status": "success", "migrated_count": totals["migrated"], "message": "Migration simulated successfully."}
 
-        for old_contract in old_contracts_data:
-            contract_number = old_contract["contract_number"]
-            if not db.contracts.find_one({"contract_number": contract_number}):
-                # Create new contract entry
-                new_contract_details = {
-                    "migrated_from_sql": True,
-                    "old_system_status": old_contract["old_status"],
-                    "original_content_summary": old_contract["old_text"]
-                }
-                new_contract = Contract(contract_number, "MIGRATED", new_contract_details)
-                db.contracts.insert_one(new_contract.to_dict())
-
-                # Store old document content in GridFS if applicable
-                old_document_content = f"Original content of old contract {contract_number}: {old_contract['old_text']}"
-                file_id = gridfs_db.put(io.BytesIO(old_document_content.encode('utf-8')), 
-                                            filename=f"{contract_number}_old_document.txt", 
-                                            contract_number=contract_number, 
-                                            migrated=True)
-
-                db.contracts.update_one(
-                    {"contract_number": contract_number},
-                    {"$set": {"migrated_document_id": str(file_id), "updated_at": datetime.utcnow()}}
-                )
-                migrated_count += 1
-
-        return {"status": "success", "migrated_count": migrated_count, "message": "Migration simulated successfully."}
\ No newline at end of file
+register_job_handler("generate_final_document", ContractService.generate_final_document_job)
+register_job_handler("convert_contract_dates", ContractService.convert_contract_dates_job)
+register_job_handler("rebuild_search_terms", ContractService.rebuild_search_terms_job)
@@ -0,0 +1,363 @@
+# app/services/events.py
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Change stream stages: contract creations and the updates that change a status
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": "insert"},
+        {"updateDescription.updatedFields.status": {"$exists": True}},
+    ]}},
+]
+
+# Resume tokens of a change stream are hex strings; outbox tokens are ObjectIds
+CHANGE_STREAM_TOKEN = re.compile(r"^[0-9A-Fa-f]+$")
+
+# How far back an outbox cursor reopens before the last event it saw, for writers with skewed clocks
+OUTBOX_SLACK = timedelta(seconds=5)
+
+def _change_event(change):
+    # Event for one change stream notification, in the same shape as the outbox documents
+    document = change.get("fullDocument") or {}
+    updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+    return {
+        "contract_number": document.get("contract_number"),
+        "status": updated.get("status", document.get("status")),
+        "version": updated.get("version", document.get("version")),
+        "at": updated.get("updated_at", document.get("updated_at")),
+    }
+
+def _outbox_event(document):
+    return {key: document.get(key) for key in ("contract_number", "status", "version", "at")}
+
+class ChangeStreamSource:
+    """Contract transitions from a change stream on contracts; needs a replica set or sharded cluster."""
+    def __init__(self, db, await_ms=1000, retry_seconds=1.0):
+        self.db = db
+        self.await_ms = await_ms
+        self.retry_seconds = retry_seconds
+
+    def events(self, after=None):
+        """
+        Yields (token, event) for every transition after the token (from now if None), and None
+        when nothing arrived for about await_ms. Reopens from the last token after a server error.
+        """
+        while True:
+            try:
+                with self.db.contracts.watch(CHANGE_STREAM_PIPELINE, full_document="updateLookup",
+                                             max_await_time_ms=self.await_ms,
+                                             resume_after={"_data": after} if after else None) as stream:
+                    while stream.alive:
+                        change = stream.try_next()
+                        if change is None:
+                            yield None
+                            continue
+                        after = change["_id"]["_data"]
+                        yield after, _change_event(change)
+            except PyMongoError as e:
+                logger.error("Contract change stream failed, reopening: %s", e)
+                time.sleep(self.retry_seconds)
+                yield None
+
+class OutboxSource:
+    """
+    Contract transitions from the contract_events outbox, a capped collection ContractService
+    appends to, read with a tailable cursor. For deployments without a replica set.
+    """
+    def __init__(self, db, await_ms=1000, retry_seconds=1.0):
+        self.db = db
+        self.await_ms = await_ms
+        self.retry_seconds = retry_seconds
+
+    def _position(self, token):
+        # (time to read from, event id to skip to) for a resume token
+        event_id = ObjectId(token)
+        document = self.db.contract_events.find_one({"_id": event_id}, {"at": 1})
+        if document is not None:
+            return document["at"], event_id
+        # Rolled out of the capped collection: every event still there comes after it
+        return None, None
+
+    def events(self, after=None):
+        """Same contract as ChangeStreamSource.events; tokens are outbox event ids."""
+        since, skip_to = (datetime.utcnow(), None) if after is None else self._position(after)
+        while True:
+            try:
+                query = {"at": {"$gte": since - OUTBOX_SLACK}} if since is not None else {}
+                cursor = self.db.contract_events.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                cursor.max_await_time_ms(self.await_ms)
+                # Events read again after reopening, up to the last one delivered
+                held = [] if skip_to is not None else None
+                while cursor.alive:
+                    try:
+                        document = cursor.next()
+                    except StopIteration:
+                        if held:
+                            # Caught up without seeing the token: deliver rather than drop
+                            for item in held:
+                                yield item
+                        held = None
+                        yield None
+                        continue
+                    if held is not None:
+                        if document["_id"] == skip_to:
+                            held = None
+                        else:
+                            held.append((str(document["_id"]), _outbox_event(document)))
+                        continue
+                    since, skip_to = document["at"], document["_id"]
+                    yield str(document["_id"]), _outbox_event(document)
+            except PyMongoError as e:
+                logger.error("Contract event outbox cursor failed, reopening: %s", e)
+            # A tailable cursor dies on an empty collection; wait before asking again
+            time.sleep(self.retry_seconds)
+            yield None
+
+class Subscriber:
+    """One client of the feed: its filters and a bounded queue of (token, event) pairs."""
+    def __init__(self, statuses=None, contract_numbers=None, max_queue=1000):
+        self.statuses = set(statuses) if statuses else None
+        self.contract_numbers = set(contract_numbers) if contract_numbers else None
+        self.queue = queue.Queue(max_queue)
+        self.lagged = False
+        # Set when resuming from a token the shared buffer no longer holds
+        self.source = None
+
+    def matches(self, event):
+        return ((self.statuses is None or event["status"] in self.statuses) and
+                (self.contract_numbers is None or event["contract_number"] in self.contract_numbers))
+
+    def offer(self, token, event):
+        """Queues a matching event; False when the queue is full and the subscriber has fallen behind."""
+        if not self.matches(event):
+            return True
+        try:
+            self.queue.put_nowait((token, event))
+            return True
+        except queue.Full:
+            self.lagged = True
+            return False
+
+    def get(self, timeout):
+        """Next matching (token, event), or None after timeout seconds."""
+        if self.source is None:
+            try:
+                return self.queue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        deadline = time.monotonic() + timeout
+        for item in self.source:
+            if item is not None and self.matches(item[1]):
+                return item
+            if time.monotonic() >= deadline:
+                return None
+        return None
+
+class EventFeed:
+    """
+    GET /api/contracts/events backend: one source per worker process (change stream or outbox),
+    read by a background thread and fanned out to the subscribers' queues. The last events are kept
+    so a client reconnecting with its last token is served from memory. Disabled until init_app().
+    """
+    def __init__(self):
+        self.app = None
+        self.configured = "none"
+        self.backend = "none"
+        self._recent = deque()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        # Set when the outbox couldn't be created at startup; publish tries again
+        self._outbox_pending = False
+
+    def init_app(self, app):
+        # Needs app.db: 'auto' is resolved against the server once, here
+        self.app = app
+        self.configured = app.config.get('CONTRACT_EVENTS_BACKEND', 'auto')
+        self.backend = self._detect(app.db) if self.configured == 'auto' else self.configured
+        self.outbox_bytes = app.config.get('CONTRACT_EVENTS_OUTBOX_BYTES', 64 * 1024 * 1024)
+        self.queue_size = app.config.get('CONTRACT_EVENTS_QUEUE_SIZE', 1000)
+        self._recent = deque(maxlen=app.config.get('CONTRACT_EVENTS_BUFFER', 1000))
+        self._subscribers = set()
+        self._pid = None
+        self._outbox_pending = False
+
+    @staticmethod
+    def _detect(db):
+        # Change streams need a replica set or mongos; anything else gets the outbox
+        try:
+            hello = db.client.admin.command('hello')
+        except PyMongoError as e:
+            logger.warning("Could not detect the deployment type, using the contract event outbox: %s", e)
+            return 'outbox'
+        return 'change_stream' if hello.get('setName') or hello.get('msg') == 'isdbgrid' else 'outbox'
+
+    @property
+    def enabled(self):
+        return self.backend in ('change_stream', 'outbox')
+
+    def ensure_outbox(self, db):
+        """
+        Creates the capped contract_events collection when the outbox backend is in use. Returns False
+        when the server couldn't be reached; publish tries again before its next write, so the app
+        still starts while Mongo is down.
+        """
+        if self.backend != 'outbox':
+            return True
+        try:
+            db.create_collection('contract_events', capped=True, size=self.outbox_bytes)
+        except CollectionInvalid:
+            pass # Already there
+        except PyMongoError as e:
+            logger.error("Could not create the contract_events outbox: %s", e)
+            self._outbox_pending = True
+            return False
+        self._outbox_pending = False
+        return True
+
+    @property
+    def outbox_pending(self):
+        """True while the outbox couldn't be created; events are only written once it exists."""
+        return self._outbox_pending
+
+    def publish(self, db, changes):
+        """
+        Appends (contract document, old status, new status) changes to the outbox. Only written
+        with the outbox backend; failures are logged, the transition itself already happened.
+        """
+        self.write(db, self.documents(changes))
+
+    def write(self, db, documents):
+        """Inserts outbox documents from documents(), built when the changes happened."""
+        if not documents:
+            return
+        # An insert would create contract_events as a plain collection, which can't be tailed
+        if self.outbox_pending and not self.ensure_outbox(db):
+            logger.warning("Dropped %d contract events, the outbox doesn't exist yet.", len(documents))
+            return
+        try:
+            db.contract_events.insert_many(documents, ordered=False)
+        except PyMongoError as e:
+            logger.warning("Could not write %d contract events to the outbox: %s", len(documents), e)
+
+    def documents(self, changes):
+        # Outbox documents for write, shared with the async service; none unless the outbox is in use
+        if not changes or self.backend != 'outbox':
+            return []
+        now = datetime.utcnow()
+        return [{"contract_number": contract_data.get('contract_number'), "status": new_status,
+                 "version": contract_data.get('version'), "at": now}
+                for contract_data, _, new_status in changes]
+
+    def is_valid_token(self, token):
+        if self.backend == 'outbox':
+            return ObjectId.is_valid(token)
+        return bool(CHANGE_STREAM_TOKEN.match(token))
+
+    def _source(self, db):
+        if self.backend == 'change_stream':
+            return ChangeStreamSource(db)
+        return OutboxSource(db)
+
+    def subscribe(self, db, statuses=None, contract_numbers=None, after=None):
+        """
+        Registers a subscriber for the events after the token (from now if None). A token older than
+        the shared buffer gets a source of its own, read in the subscriber's request thread.
+        """
+        if not self.enabled:
+            raise ValueError("Contract events are disabled.")
+        if after is not None and not self.is_valid_token(after):
+            raise ValueError("Invalid event token.")
+        subscriber = Subscriber(statuses, contract_numbers, self.queue_size)
+        with self._lock:
+            self._start(db)
+            if after is not None:
+                tokens = [token for token, _ in self._recent]
+                if after not in tokens:
+                    subscriber.source = self._source(db).events(after)
+                    return subscriber
+                for token, event in list(self._recent)[tokens.index(after) + 1:]:
+                    subscriber.offer(token, event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        if subscriber.source is not None:
+            subscriber.source.close()
+
+    def last_token(self):
+        """Token of the newest event this worker has seen, None before the first one."""
+        with self._lock:
+            return self._recent[-1][0] if self._recent else None
+
+    def current_token(self, db):
+        """
+        Token of the end of the feed: the newest event this worker has seen, else the newest on the
+        server. Taken before subscribing, resuming from it skips nothing that comes after.
+        """
+        token = self.last_token()
+        if token is not None:
+            return token
+        if self.backend == 'change_stream':
+            with db.contracts.watch(CHANGE_STREAM_PIPELINE, max_await_time_ms=1) as stream:
+                stream.try_next()
+                return stream.resume_token["_data"]
+        newest = db.contract_events.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        # Empty outbox: an id found nowhere resumes from the oldest event, which all come later
+        return str(newest["_id"]) if newest is not None else str(ObjectId(b"\0" * 12))
+
+    def _start(self, db):
+        # Called with the lock held. Threads don't survive a fork, so each worker starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._recent.clear()
+        self._subscribers = set()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(self._source(db),), name="contract-events", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pid = None
+
+    def _run(self, source):
+        after = None
+        while not self._stop.is_set():
+            try:
+                for item in source.events(after):
+                    if self._stop.is_set():
+                        return
+                    if item is None:
+                        continue
+                    token, event = item
+                    after = token
+                    with self._lock:
+                        self._recent.append(item)
+                        for subscriber in list(self._subscribers):
+                            if not subscriber.offer(token, event):
+                                # Too far behind; its stream ends and the client resumes from its last token
+                                self._subscribers.discard(subscriber)
+            except Exception as e:
+                logger.error("Contract event feed error: %s", e, exc_info=True)
+                self._stop.wait(1.0)
+
+# Shared instance, configured in create_app
+event_feed = EventFeed()
@@ -0,0 +1,242 @@
+# app/services/expiry.py
+import calendar
+import logging
+import time
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.models.contract import format_contract_date
+from app.services.cache import contract_cache
+from app.services.changes import change_recorder
+from app.services.contract_service import ContractService
+from app.services.jobs import JobQueue, register_job_handler
+from app.services.locks import LeaseLock
+from app.services.stats import ACTIVE_STATUSES, ROLLUP_PROJECTION
+from app.utils.metrics import CONTRACT_EXPIRY_BATCH_SECONDS, CONTRACT_EXPIRY_CONTRACTS, CONTRACT_EXPIRY_RUNS
+
+logger = logging.getLogger(__name__)
+
+# Fields read to decide what happens to a past-due contract and to move its stats buckets
+EXPIRY_PROJECTION = dict(ROLLUP_PROJECTION, **{"contract_number": 1, "status": 1, "version": 1,
+                                                "details.auto_renew": 1, "details.renewal_term_months": 1})
+
+# Lock document held while a worker processes expiries
+LOCK_NAME = "contract_expiry"
+
+# Most planned changes listed in a dry-run summary
+DRY_RUN_SAMPLE = 100
+
+# Summary counters by dry_run: a dry run reports what it would do, so it can't pass for applied changes
+OUTCOMES = {
+    False: ("expired", "renewed", "conflicts"),
+    True: ("would_expire", "would_renew", "conflicts"),
+}
+
+def add_months(value, months):
+    # Same day of the month, clamped to the length of the target month (Jan 31 + 1 month = Feb 28)
+    month = value.month - 1 + months
+    year, month = value.year + month // 12, month % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+def renewal_end_date(details, cutoff, default_term_months):
+    """
+    End date an auto-renewing contract moves to: its end date plus as many renewal terms as it takes
+    to reach cutoff. None when the contract doesn't renew automatically.
+    """
+    if details.get('auto_renew') is not True:
+        return None
+    term = details.get('renewal_term_months')
+    if type(term) is not int or term < 1:
+        term = default_term_months
+    end_date = details['end_date']
+    elapsed = (cutoff.year - end_date.year) * 12 + cutoff.month - end_date.month
+    periods = max(1, elapsed // term)
+    # Computed from the original end date each time, so clamped days don't drift
+    while add_months(end_date, term * periods) < cutoff:
+        periods += 1
+    return add_months(end_date, term * periods)
+
+class ExpiryService:
+    """
+    Expiry processor: active contracts (EXECUTED, RENEWED) whose end date has passed become EXPIRED,
+    or RENEWED with a later end date when details.auto_renew is set. Runs on the job workers every
+    EXPIRY_INTERVAL seconds, in bounded batches, under a lease lock so one worker processes at a time.
+    """
+    @staticmethod
+    def options(config):
+        """ExpiryService.run keyword arguments from the EXPIRY_* settings."""
+        return {
+            "batch_size": config.get('EXPIRY_BATCH_SIZE', 500),
+            "max_batches": config.get('EXPIRY_MAX_BATCHES', 200),
+            "term_months": config.get('EXPIRY_RENEWAL_TERM_MONTHS', 12),
+            "lease_seconds": config.get('EXPIRY_LEASE_SECONDS', 120),
+            "dry_run": config.get('EXPIRY_DRY_RUN', False),
+        }
+
+    @staticmethod
+    def _plan(contract_data, cutoff, now, term_months):
+        # (new status, $set fields, new end date or None) for one past-due contract
+        details = contract_data.get('details') or {}
+        new_end_date = renewal_end_date(details, cutoff, term_months)
+        if new_end_date is None:
+            return "EXPIRED", {"status": "EXPIRED", "updated_at": now, "expired_at": now}, None
+        return "RENEWED", {"status": "RENEWED", "updated_at": now, "details.end_date": new_end_date,
+                           "details.last_renewal_date": now}, new_end_date
+
+    @staticmethod
+    def process_batch(db, cutoff, now, batch_size=500, term_months=12, dry_run=False, after=None):
+        """
+        Handles up to batch_size contracts that ended before cutoff, with one read and one unordered
+        bulk_write of status- and version-guarded updates. A dry run writes nothing, counts under
+        would_expire / would_renew instead of expired / renewed, and pages through with after, the
+        (end_date, _id) of the last contract read.
+        Returns (counts, planned changes, contracts read, position of the last one).
+        """
+        query = {"status": {"$in": list(ACTIVE_STATUSES)}, "details.end_date": {"$lt": cutoff}}
+        if dry_run:
+            if after is not None:
+                end_date, object_id = after
+                query["$or"] = [{"details.end_date": {"$gt": end_date}},
+                                {"details.end_date": end_date, "_id": {"$gt": object_id}}]
+            sort = [("details.end_date", ASCENDING), ("_id", ASCENDING)]
+        else:
+            # Applied contracts drop out of the query, so every batch starts from the oldest left
+            sort = [("details.end_date", ASCENDING)]
+        documents = list(db.contracts.find(query, EXPIRY_PROJECTION).sort(sort).limit(batch_size))
+        if not documents:
+            return {}, [], 0, None
+        last = (documents[-1]['details']['end_date'], documents[-1]['_id'])
+
+        counts = dict.fromkeys(OUTCOMES[dry_run], 0)
+        planned = {}
+        operations = []
+        for contract_data in documents:
+            new_status, update_fields, new_end_date = ExpiryService._plan(contract_data, cutoff, now, term_months)
+            planned[contract_data['_id']] = (contract_data, new_status, new_end_date)
+            operations.append(UpdateOne(
+                dict({"_id": contract_data['_id'], "status": contract_data['status']},
+                     **ContractService._version_filter(contract_data.get('version', 0))),
+                {"$set": update_fields, "$inc": {"version": 1}}
+            ))
+
+        applied = set(planned)
+        if not dry_run:
+            try:
+                matched = db.contracts.bulk_write(operations, ordered=False).matched_count
+            except BulkWriteError as e:
+                matched = e.details.get('nMatched', 0)
+            contract_cache.invalidate(db, *[c['contract_number'] for c, _, _ in planned.values()])
+            if matched < len(operations):
+                # Changed by someone else since the read; those are picked up again next batch
+                applied = {c['_id'] for c in db.contracts.find({"_id": {"$in": list(planned)}, "updated_at": now}, {"_id": 1})}
+            ExpiryService._record(db, [planned[object_id] for object_id in applied])
+
+        expired, renewed = OUTCOMES[dry_run][:2]
+        entries = []
+        for object_id, (contract_data, new_status, new_end_date) in planned.items():
+            if object_id in applied:
+                counts[expired if new_status == "EXPIRED" else renewed] += 1
+            else:
+                counts["conflicts"] += 1
+            entries.append({"contract_number": contract_data.get('contract_number'), "from": contract_data['status'],
+                            "to": new_status, "end_date": format_contract_date(contract_data['details']['end_date']),
+                            "new_end_date": format_contract_date(new_end_date)})
+        return counts, entries, len(documents), last
+
+    @staticmethod
+    def _record(db, applied):
+        # Stats and events for applied (contract document, new status, new end date) changes.
+        # A renewal moves the contract to another end_month bucket, so it leaves the old ones first.
+        stats_changes = []
+        event_changes = []
+        for contract_data, new_status, new_end_date in applied:
+            event_data = dict(contract_data, version=contract_data.get('version', 0) + 1)
+            if new_end_date is None:
+                stats_changes.append((contract_data, contract_data['status'], new_status))
+            else:
+                renewed = dict(contract_data, details=dict(contract_data['details'], end_date=new_end_date))
+                stats_changes += [(contract_data, contract_data['status'], None), (renewed, None, new_status)]
+            event_changes.append((event_data, contract_data['status'], new_status))
+        change_recorder.record(db, stats_changes, event_changes)
+
+    @staticmethod
+    def run(db, batch_size=500, max_batches=200, term_months=12, lease_seconds=120, dry_run=False, now=None):
+        """
+        One pass over the contracts that ended before today, at most max_batches batches; what is left
+        is picked up by the next run. Returns a summary, with the planned changes for a dry run.
+        """
+        lock = None
+        if not dry_run:
+            lock = LeaseLock(db, LOCK_NAME, lease_seconds)
+            if not lock.acquire():
+                CONTRACT_EXPIRY_RUNS.inc("locked")
+                return {"result": "locked"}
+
+        now = now or datetime.utcnow()
+        cutoff = datetime(now.year, now.month, now.day)
+        mode = "dry_run" if dry_run else "apply"
+        summary = dict({"dry_run": dry_run}, **dict.fromkeys(OUTCOMES[dry_run], 0), batches=0)
+        planned = []
+        result = "completed"
+        started = time.perf_counter()
+        after = None
+        try:
+            while summary["batches"] < max_batches:
+                batch_started = time.perf_counter()
+                counts, entries, read, after = ExpiryService.process_batch(
+                    db, cutoff, now, batch_size, term_months, dry_run, after)
+                if not read:
+                    break
+                CONTRACT_EXPIRY_BATCH_SECONDS.observe(time.perf_counter() - batch_started, mode)
+                summary["batches"] += 1
+                for outcome, count in counts.items():
+                    summary[outcome] += count
+                    if count:
+                        CONTRACT_EXPIRY_CONTRACTS.inc(outcome, mode, amount=count)
+                if dry_run:
+                    planned += entries[:DRY_RUN_SAMPLE - len(planned)]
+                if read < batch_size:
+                    break
+                if lock is not None and not lock.renew():
+                    result = "lost_lock"
+                    break
+        finally:
+            if lock is not None and result != "lost_lock":
+                lock.release()
+
+        elapsed = time.perf_counter() - started
+        expired, renewed = (summary[outcome] for outcome in OUTCOMES[dry_run][:2])
+        processed = expired + renewed
+        summary.update(result=result, seconds=round(elapsed, 3),
+                       contracts_per_second=round(processed / elapsed, 1) if elapsed else None)
+        if dry_run:
+            summary["planned"] = planned
+        CONTRACT_EXPIRY_RUNS.inc(result)
+        logger.info("Contract expiry %s: %d %s, %d %s, %d conflicts in %d batches (%.1fs)",
+                    result, expired, OUTCOMES[dry_run][0], renewed, OUTCOMES[dry_run][1], summary["conflicts"],
+                    summary["batches"], elapsed)
+        return summary
+
+    @staticmethod
+    def schedule(db, interval_seconds, options):
+        """Queues the run for the current interval; the job key makes this a no-op once queued."""
+        period = int(time.time()) // interval_seconds
+        return JobQueue.enqueue(db, "expire_contracts", dict(options, interval=interval_seconds),
+                                job_key=f"contract_expiry:{period}")
+
+    @staticmethod
+    def run_job(db, gridfs, payload, job):
+        """
+        Job handler: queues the run for the next interval, then runs the processor. Queued first,
+        so a run that fails for good doesn't stop the ones after it.
+        """
+        options = dict(payload)
+        interval = options.pop("interval")
+        next_period = int(time.time()) // interval + 1
+        JobQueue.enqueue(db, "expire_contracts", payload, job_key=f"contract_expiry:{next_period}",
+                         run_at=datetime.utcfromtimestamp(next_period * interval))
+        summary = ExpiryService.run(db, **options)
+        summary.pop("planned", None) # Keeps the job result small; POST /api/contracts/expiry lists them
+        return summary
+
+register_job_handler("expire_contracts", ExpiryService.run_job)
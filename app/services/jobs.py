@@ -0,0 +1,190 @@
+# app/services/jobs.py
+import logging
+import socket
+import threading
+import os
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> callable(db, gridfs, payload, job) returning a result dict. Registered by the services.
+JOB_HANDLERS = {}
+
+# Job kind -> callable(db, payload, error), called once a job of that kind has failed for good
+JOB_FAILURE_HANDLERS = {}
+
+def register_job_handler(kind, handler, on_failure=None):
+    JOB_HANDLERS[kind] = handler
+    if on_failure is not None:
+        JOB_FAILURE_HANDLERS[kind] = on_failure
+
+class LeaseLost(Exception):
+    """Raised by a handler whose job was claimed by another worker after its lease ran out."""
+
+class JobQueue:
+    """
+    Durable job queue on the Mongo 'jobs' collection.
+    A job_key makes enqueue idempotent: enqueuing the same key again returns the existing job.
+    """
+    @staticmethod
+    def enqueue(db, kind, payload, job_key, max_attempts=5, run_at=None):
+        job = JobQueue.new_job(kind, payload, job_key, max_attempts, run_at)
+        try:
+            db.jobs.insert_one(job)
+            return job
+        except DuplicateKeyError:
+            return db.jobs.find_one({"job_key": job_key})
+
+    @staticmethod
+    def new_job(kind, payload, job_key, max_attempts=5, run_at=None):
+        """The queued job document; shared with the async enqueue in AsyncContractService. run_at delays it."""
+        now = datetime.utcnow()
+        return {
+            "job_key": job_key,
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "next_run_at": run_at or now,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def get(db, job_id):
+        return db.jobs.find_one({"_id": job_id})
+
+    @staticmethod
+    def claim(db, worker_id, lease_seconds=60):
+        """
+        Atomically takes the next due job, or one whose worker died (lease expired).
+        """
+        now = datetime.utcnow()
+        return db.jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "next_run_at": {"$lte": now}},
+                {"status": "running", "lease_expires_at": {"$lte": now}},
+            ]},
+            {"$set": {"status": "running", "worker_id": worker_id, "updated_at": now, "lease_seconds": lease_seconds,
+                      "lease_expires_at": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"attempts": 1}},
+            sort=[("next_run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def extend_lease(db, job):
+        """
+        Heartbeat for long jobs, so the lease doesn't expire while the job is still making progress.
+        Renews the lease the job was claimed with, for the worker holding it. False when another
+        worker has claimed the job since; the caller must stop without writing anything more.
+        """
+        now = datetime.utcnow()
+        result = db.jobs.update_one(
+            {"_id": job["_id"], "worker_id": job.get("worker_id"), "status": "running"},
+            {"$set": {"updated_at": now,
+                      "lease_expires_at": now + timedelta(seconds=job.get("lease_seconds", 60))}})
+        return result.matched_count == 1
+
+    @staticmethod
+    def complete(db, job, result):
+        db.jobs.update_one(
+            {"_id": job["_id"], "worker_id": job.get("worker_id")},
+            {"$set": {"status": "succeeded", "result": result, "error": None, "updated_at": datetime.utcnow()},
+             "$unset": {"lease_expires_at": ""}}
+        )
+
+    @staticmethod
+    def fail(db, job, error, backoff_seconds=2):
+        """
+        Schedules a retry with exponential backoff, or marks the job failed after max_attempts.
+        Returns True when this marked the job failed for good.
+        """
+        now = datetime.utcnow()
+        final = job["attempts"] >= job.get("max_attempts", 5)
+        if final:
+            update = {"status": "failed", "error": error, "updated_at": now}
+        else:
+            delay = backoff_seconds * (2 ** (job["attempts"] - 1))
+            update = {"status": "queued", "error": error, "updated_at": now,
+                      "next_run_at": now + timedelta(seconds=delay)}
+        result = db.jobs.update_one({"_id": job["_id"], "worker_id": job.get("worker_id")},
+                                    {"$set": update, "$unset": {"lease_expires_at": ""}})
+        return final and result.matched_count == 1
+
+    @staticmethod
+    def run_one(db, gridfs, worker_id, lease_seconds=60, backoff_seconds=2):
+        """Claims and runs a single job. Returns False when nothing was due."""
+        job = JobQueue.claim(db, worker_id, lease_seconds)
+        if job is None:
+            return False
+        handler = JOB_HANDLERS.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{job['kind']}'.")
+            result = handler(db, gridfs, job["payload"], job)
+        except LeaseLost:
+            # The worker that claimed it next owns the job now, retries included
+            logger.warning("Job %s (%s) was taken over by another worker.", job['_id'], job['kind'])
+        except Exception as e:
+            logger.error("Job %s (%s) attempt %s failed: %s", job['_id'], job['kind'], job['attempts'], e, exc_info=True)
+            if JobQueue.fail(db, job, str(e), backoff_seconds):
+                on_failure = JOB_FAILURE_HANDLERS.get(job["kind"])
+                if on_failure is not None:
+                    try:
+                        on_failure(db, job["payload"], str(e))
+                    except Exception as hook_error:
+                        logger.error("Failure handler of job %s (%s) failed: %s", job['_id'], job['kind'], hook_error)
+        else:
+            JobQueue.complete(db, job, result)
+        return True
+
+class JobWorker:
+    """Background threads that drain the job queue (document generation, migrations). One set per process."""
+    def __init__(self):
+        self._threads = []
+        self._stop = threading.Event()
+        self._pid = None
+
+    def init_app(self, app):
+        # db and gridfs are looked up on the app at run time, so later overrides are picked up
+        self.app = app
+        self.threads = app.config.get('JOB_WORKER_THREADS', 2)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', 1.0)
+        self.lease_seconds = app.config.get('JOB_LEASE_SECONDS', 60)
+        self.backoff_seconds = app.config.get('JOB_RETRY_BACKOFF', 2)
+
+    def start(self):
+        # Called by create_app and before every request; a no-op once this process runs its threads.
+        # Threads don't survive a fork, so a forked worker process starts its own
+        if self._pid == os.getpid() or self.threads <= 0:
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._threads = []
+        for n in range(self.threads):
+            worker_id = f"{socket.gethostname()}:{self._pid}:{n}"
+            thread = threading.Thread(target=self._run, args=(worker_id,), name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._pid = None
+
+    def _run(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                ran = JobQueue.run_one(self.app.db, self.app.gridfs, worker_id, self.lease_seconds, self.backoff_seconds)
+            except Exception as e:
+                logger.error("Job worker %s error: %s", worker_id, e, exc_info=True)
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+job_worker = JobWorker()
@@ -0,0 +1,47 @@
+# app/services/locks.py
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+
+class LeaseLock:
+    """
+    Lock shared by every worker and host, on one document of the 'locks' collection.
+    It is held for lease_seconds and must be renewed by long holders; a holder that dies
+    loses it when the lease runs out, so nothing has to clean up after a crash.
+    The owner is unique to each instance, so two runs in the same process exclude each other too.
+    """
+    def __init__(self, db, name, lease_seconds=60, owner=None):
+        self.db = db
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    def acquire(self):
+        """Takes the lock if it is free or its lease expired. Returns False when someone else holds it."""
+        now = datetime.utcnow()
+        try:
+            # Matches a free or own lock; when another owner holds it the upsert hits the _id and fails
+            self.db.locks.update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lte": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "acquired_at": now,
+                          "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def renew(self):
+        """Extends the lease. False if it was lost, e.g. after a pause longer than the lease."""
+        now = datetime.utcnow()
+        result = self.db.locks.update_one(
+            {"_id": self.name, "owner": self.owner, "expires_at": {"$gt": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count == 1
+
+    def release(self):
+        # Only while this instance holds it
+        self.db.locks.delete_one({"_id": self.name, "owner": self.owner})
@@ -0,0 +1,250 @@
+# app/services/migration.py
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.models.contract import Contract
+from app.services.cache import contract_cache
+from app.services.contract_service import ContractService
+from app.services.jobs import JobQueue, LeaseLost, register_job_handler
+
+logger = logging.getLogger(__name__)
+
+# Table read from SQLite exports of the old SQL system
+SQLITE_TABLE = "contracts"
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return "sqlite"
+    raise ValueError(f"Cannot tell the format of '{path}'; pass csv, ndjson or sqlite.")
+
+def read_source(path, fmt, skip=0):
+    """
+    Streams rows (dicts with contract_number, old_status, old_text) from a legacy export,
+    starting after the first `skip` rows. Only one row is held in memory at a time.
+    """
+    if fmt == "sqlite":
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        try:
+            cursor = connection.execute(
+                f"SELECT contract_number, old_status, old_text FROM {SQLITE_TABLE} ORDER BY rowid LIMIT -1 OFFSET ?", (skip,))
+            for row in cursor:
+                yield dict(row)
+        finally:
+            connection.close()
+        return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+        elif fmt == "ndjson":
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            raise ValueError(f"Unknown source format '{fmt}'.")
+        yield from itertools.islice(rows, skip, None)
+
+def chunked(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class MigrationService:
+    @staticmethod
+    def migrate_chunk(db, gridfs, rows, executor):
+        """
+        Migrates one chunk: a single $in existence check, parallel GridFS uploads on the
+        executor, then one unordered insert_many. Safe to repeat after a crash: existing
+        contracts are skipped and documents already uploaded for the chunk are reused.
+        Returns (migrated, skipped, failed).
+        """
+        rows_by_number = {}
+        failed = 0
+        for row in rows:
+            if not row.get("contract_number"):
+                failed += 1
+            else:
+                rows_by_number.setdefault(row["contract_number"], row)
+        skipped = len(rows) - failed - len(rows_by_number) # Repeated numbers within the chunk
+
+        existing = {c["contract_number"] for c in db.contracts.find(
+            {"contract_number": {"$in": list(rows_by_number)}}, {"contract_number": 1, "_id": 0})}
+        skipped += len(existing)
+        pending = [row for number, row in rows_by_number.items() if number not in existing]
+        if not pending:
+            return 0, skipped, failed
+
+        # Files left by an interrupted run of this chunk
+        uploaded = {f.contract_number: f._id for f in gridfs.find(
+            {"contract_number": {"$in": [row["contract_number"] for row in pending]}, "migrated": True})}
+
+        def upload(row):
+            contract_number = row["contract_number"]
+            if contract_number in uploaded:
+                return uploaded[contract_number], False
+            old_document_content = f"Original content of old contract {contract_number}: {row.get('old_text')}"
+            return gridfs.put(io.BytesIO(old_document_content.encode('utf-8')),
+                              filename=f"{contract_number}_old_document.txt",
+                              contract_number=contract_number,
+                              migrated=True), True
+
+        documents = []
+        new_files = set()
+        for row, future in [(row, executor.submit(upload, row)) for row in pending]:
+            try:
+                file_id, is_new = future.result()
+            except Exception as e:
+                logger.error("Upload failed for migrated contract %s: %s", row['contract_number'], e)
+                failed += 1
+                continue
+            contract = Contract(row["contract_number"], "MIGRATED", {
+                "migrated_from_sql": True,
+                "old_system_status": row.get("old_status"),
+                "original_content_summary": row.get("old_text")
+            })
+            document = ContractService._to_document(contract)
+            document["migrated_document_id"] = str(file_id)
+            documents.append(document)
+            if is_new:
+                new_files.add(file_id)
+
+        migrated = len(documents)
+        if documents:
+            failed_positions = set()
+            try:
+                db.contracts.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed_positions.add(error["index"])
+                    migrated -= 1
+                    if error.get("code") == 11000:
+                        skipped += 1 # Created concurrently by someone else
+                    else:
+                        failed += 1
+                    # Don't leave a file behind that no contract points to
+                    file_id = ObjectId(documents[error["index"]]["migrated_document_id"])
+                    if file_id in new_files:
+                        gridfs.delete(file_id)
+            contract_cache.invalidate(db, *[d["contract_number"] for d in documents])
+            ContractService._record_changes(db, [(d, None, d["status"]) for i, d in enumerate(documents) if i not in failed_positions])
+        return migrated, skipped, failed
+
+    @staticmethod
+    def migrate_rows(db, gridfs, rows, chunk_size=1000, upload_threads=8):
+        """Migrates an in-memory or streamed iterable of rows synchronously. Returns the totals."""
+        totals = {"migrated": 0, "skipped": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=upload_threads) as executor:
+            for chunk in chunked(rows, chunk_size):
+                migrated, skipped, failed = MigrationService.migrate_chunk(db, gridfs, chunk, executor)
+                totals["migrated"] += migrated
+                totals["skipped"] += skipped
+                totals["failed"] += failed
+        return totals
+
+    @staticmethod
+    def start(db, source, fmt=None, chunk_size=1000, upload_threads=8):
+        """Records a migration run and queues it on the job workers. Returns the run document."""
+        fmt = fmt or detect_format(source)
+        now = datetime.utcnow()
+        run = {
+            "_id": ObjectId(),
+            "source": source,
+            "format": fmt,
+            "chunk_size": chunk_size,
+            "upload_threads": upload_threads,
+            "status": "queued",
+            "checkpoint": 0, # Source rows fully processed; a resumed run starts here
+            "migrated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        db.migrations.insert_one(run)
+        JobQueue.enqueue(db, "migrate_contracts", {"run_id": str(run["_id"])}, job_key=f"migration:{run['_id']}")
+        return run
+
+    @staticmethod
+    def run_job(db, gridfs, payload, job):
+        """
+        Job handler: streams the source from the run's checkpoint in chunks, checkpointing
+        after each one. If the worker dies, the job lease expires and another worker resumes.
+        Checkpoints are only written by the worker holding the job, so a worker that lost its
+        lease stops instead of counting its chunk twice.
+        """
+        run_id = ObjectId(payload["run_id"])
+        run = db.migrations.find_one({"_id": run_id})
+        if run is None:
+            raise ValueError("Migration run not found.")
+        owner = job.get("worker_id")
+        db.migrations.update_one({"_id": run_id}, {"$set": {
+            "status": "running", "worker_id": owner, "error": None, "updated_at": datetime.utcnow(),
+            "resumed_at": datetime.utcnow(), "resumed_from": run["checkpoint"]}})
+
+        rows = read_source(run["source"], run["format"], skip=run["checkpoint"])
+        with ThreadPoolExecutor(max_workers=run["upload_threads"]) as executor:
+            for chunk in chunked(rows, run["chunk_size"]):
+                migrated, skipped, failed = MigrationService.migrate_chunk(db, gridfs, chunk, executor)
+                # The new owner restarts from the last checkpoint; migrate_chunk is safe to repeat
+                if not JobQueue.extend_lease(db, job):
+                    raise LeaseLost(f"Migration run {run_id} was taken over by another worker.")
+                result = db.migrations.update_one({"_id": run_id, "worker_id": owner}, {
+                    "$inc": {"checkpoint": len(chunk), "migrated": migrated, "skipped": skipped, "failed": failed},
+                    "$set": {"updated_at": datetime.utcnow()}
+                })
+                if result.matched_count == 0:
+                    raise LeaseLost(f"Migration run {run_id} was taken over by another worker.")
+
+        db.migrations.update_one(
+            {"_id": run_id, "worker_id": owner},
+            {"$set": {"status": "completed", "updated_at": datetime.utcnow(), "completed_at": datetime.utcnow()}})
+        return {"run_id": str(run_id)}
+
+    @staticmethod
+    def fail_run(db, payload, error):
+        """Failure handler: the job ran out of attempts, so the run stops at its last checkpoint."""
+        now = datetime.utcnow()
+        db.migrations.update_one({"_id": ObjectId(payload["run_id"])},
+                                 {"$set": {"status": "failed", "error": error, "updated_at": now, "completed_at": now}})
+
+    @staticmethod
+    def get_run(db, run_id):
+        """Migration progress, including throughput since the run last (re)started."""
+        run = db.migrations.find_one({"_id": run_id})
+        if run is None:
+            return None
+        started = run.get("resumed_at") or run["created_at"]
+        finished = run.get("completed_at") or datetime.utcnow()
+        elapsed = max((finished - started).total_seconds(), 1e-6)
+        rows_since_start = run["checkpoint"] - run.get("resumed_from", 0)
+        return {
+            "run_id": str(run["_id"]),
+            "source": run["source"],
+            "format": run["format"],
+            "status": run["status"],
+            "rows_processed": run["checkpoint"],
+            "migrated": run["migrated"],
+            "skipped": run["skipped"],
+            "failed": run["failed"],
+            "error": run.get("error"),
+            "rows_per_sec": round(rows_since_start / elapsed, 1) if run["status"] != "queued" else 0.0,
+            "created_at": run["created_at"].isoformat(),
+            "updated_at": run["updated_at"].isoformat()
+        }
+
+register_job_handler("migrate_contracts", MigrationService.run_job, on_failure=MigrationService.fail_run)
@@ -0,0 +1,62 @@
+# app/services/mongo.py
+import os
+import gridfs
+from pymongo import MongoClient
+from app.utils.metrics import MongoPoolMetrics
+
+def client_options(config, prefix, pool_metrics):
+    """MongoClient / AsyncMongoClient keyword arguments for the MONGO_* or GRIDFS_* pool settings."""
+    return {
+        "maxPoolSize": config.get(f'{prefix}_MAX_POOL_SIZE', 100),
+        "minPoolSize": config.get(f'{prefix}_MIN_POOL_SIZE', 0),
+        "waitQueueTimeoutMS": config.get(f'{prefix}_WAIT_QUEUE_TIMEOUT_MS'),
+        "socketTimeoutMS": config.get(f'{prefix}_SOCKET_TIMEOUT_MS'),
+        "readPreference": config.get(f'{prefix}_READ_PREFERENCE', 'primary'),
+        "connectTimeoutMS": config.get('MONGO_CONNECT_TIMEOUT_MS', 20000),
+        "serverSelectionTimeoutMS": config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000),
+        "event_listeners": [pool_metrics],
+    }
+
+class MongoClients:
+    """
+    The Mongo clients of one worker process: MONGO_URI for contracts and jobs, GRIDFS_URI for
+    documents, each with its own connection pool. MongoClient isn't fork-safe, so clients created
+    before a fork (create_app in the gunicorn master with --preload) are replaced in each worker
+    before it serves its first request.
+    """
+    def __init__(self):
+        self.app = None
+        self._pid = None
+        self.pool_metrics = {"contracts": MongoPoolMetrics("contracts"), "gridfs": MongoPoolMetrics("gridfs")}
+
+    def init_app(self, app):
+        self.app = app
+        self._pid = None
+        self.connect()
+        app.before_request(self.connect)
+
+    def connect(self):
+        if self._pid == os.getpid():
+            return
+        config = self.app.config
+        for pool_metrics in self.pool_metrics.values():
+            pool_metrics.reset()
+        # The parent's clients are dropped, not closed: their sockets are shared with the parent
+        client = MongoClient(config['MONGO_URI'], **client_options(config, 'MONGO', self.pool_metrics["contracts"]))
+        gridfs_client = MongoClient(config.get('GRIDFS_URI') or config['MONGO_URI'],
+                                    **client_options(config, 'GRIDFS', self.pool_metrics["gridfs"]))
+        self.app.mongo_client = client
+        self.app.db = client.get_default_database()
+        self.app.gridfs_client = gridfs_client
+        self.app.gridfs_db = gridfs_client.get_default_database()
+        self.app.gridfs = gridfs.GridFS(self.app.gridfs_db)
+        self._pid = os.getpid()
+
+    def close(self):
+        if self._pid == os.getpid():
+            self.app.mongo_client.close()
+            self.app.gridfs_client.close()
+        self._pid = None
+
+# Shared instance, configured in create_app
+mongo_clients = MongoClients()
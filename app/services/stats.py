@@ -0,0 +1,173 @@
+# app/services/stats.py
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+from pymongo.errors import PyMongoError
+from app.models.contract import response_details
+from app.services.jobs import JobQueue, register_job_handler
+
+logger = logging.getLogger(__name__)
+
+# Statuses of contracts in force, the ones that can expire
+ACTIVE_STATUSES = ("EXECUTED", "RENEWED")
+
+# Contract fields bucket_keys reads; enough to move a contract's buckets on a transition
+ROLLUP_PROJECTION = {"details.contract_category": 1, "details.party1": 1, "details.party2": 1, "details.end_date": 1}
+
+# Fields of an expiring-soon entry
+EXPIRING_PROJECTION = {"_id": 0, "contract_number": 1, "status": 1, "details.end_date": 1,
+                       "details.contract_name": 1, "details.party1": 1, "details.party2": 1}
+
+def bucket_keys(details):
+    """
+    Rollup buckets a contract counts in, besides its status: (dimension, key) pairs for its
+    category, each party and the month it ends in. Must agree with the reconcile pipeline below.
+    """
+    details = details or {}
+    keys = [("total", "all")]
+    for dimension, value in (("category", details.get('contract_category')),
+                             ("party", details.get('party1')),
+                             ("party", details.get('party2'))):
+        if isinstance(value, str) and value:
+            keys.append((dimension, value))
+    end_date = details.get('end_date')
+    if isinstance(end_date, datetime):
+        keys.append(("end_month", end_date.strftime("%Y-%m")))
+    elif isinstance(end_date, str) and end_date:
+        # Stored before the dates were converted to datetimes
+        keys.append(("end_month", end_date[:7]))
+    return keys
+
+# Same buckets as bucket_keys, computed server side for the reconcile
+RECONCILE_PIPELINE = [
+    {"$project": {"_id": 0, "status": 1, "buckets": [
+        {"dimension": "total", "key": "all"},
+        {"dimension": "category", "key": "$details.contract_category"},
+        {"dimension": "party", "key": "$details.party1"},
+        {"dimension": "party", "key": "$details.party2"},
+        {"dimension": "end_month", "key": {"$switch": {"branches": [
+            {"case": {"$eq": [{"$type": "$details.end_date"}, "date"]},
+             "then": {"$dateToString": {"format": "%Y-%m", "date": "$details.end_date"}}},
+            {"case": {"$eq": [{"$type": "$details.end_date"}, "string"]},
+             "then": {"$substrCP": ["$details.end_date", 0, 7]}},
+        ], "default": None}}},
+    ]}},
+    {"$unwind": "$buckets"},
+    {"$match": {"buckets.key": {"$type": "string", "$ne": ""}}},
+    {"$group": {"_id": {"dimension": "$buckets.dimension", "key": "$buckets.key", "status": "$status"},
+                "count": {"$sum": 1}}},
+]
+
+class StatsService:
+    """
+    Contract counts for dashboards, kept in the contract_stats rollup collection: one document
+    per (dimension, key, status) bucket, moved with $inc by every ContractService write path
+    (through change_recorder, so possibly a flush interval later), so reading the stats costs one
+    document per bucket whatever the number of contracts. The reconcile job rebuilds the rollup
+    from the contracts to correct any drift.
+    """
+    @staticmethod
+    def deltas(changes):
+        """
+        Bucket count changes for a list of (contract document, old status, new status) changes.
+        old status is None for a new contract, new status None for one leaving its buckets
+        (a change to its details is recorded as leaving the old buckets and entering the new).
+        """
+        deltas = Counter()
+        for contract_data, old_status, new_status in changes:
+            for dimension, key in bucket_keys(contract_data.get('details')):
+                if old_status is not None:
+                    deltas[(dimension, key, old_status)] -= 1
+                if new_status is not None:
+                    deltas[(dimension, key, new_status)] += 1
+        return deltas
+
+    @staticmethod
+    def operations(deltas):
+        """$inc upserts for bucket count changes from deltas(); buckets left unchanged are skipped."""
+        now = datetime.utcnow()
+        return [UpdateOne({"_id": {"dimension": dimension, "key": key, "status": status}},
+                          {"$inc": {"count": delta}, "$set": {"updated_at": now}}, upsert=True)
+                for (dimension, key, status), delta in deltas.items() if delta]
+
+    @staticmethod
+    def record(db, changes):
+        """Applies changes to the rollup."""
+        StatsService.apply(db, StatsService.deltas(changes))
+
+    @staticmethod
+    def apply(db, deltas):
+        """Applies bucket count changes in one bulk_write. Failures are logged, not raised: the write itself succeeded and the reconcile repairs the rollup."""
+        operations = StatsService.operations(deltas)
+        if not operations:
+            return
+        try:
+            db.contract_stats.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.warning("Could not update contract_stats, the next reconcile will correct it: %s", e)
+
+    @staticmethod
+    def get_stats(db, expiring_days=30, expiring_limit=50, today=None):
+        """Dashboard counts from the rollup, plus the active contracts ending within expiring_days."""
+        stats = {"by_status": {}, "by_category": {}, "by_party": {}, "by_end_month": {}}
+        sections = {"category": "by_category", "party": "by_party", "end_month": "by_end_month"}
+        for bucket in db.contract_stats.find({"count": {"$gt": 0}}):
+            dimension, key, status = bucket["_id"]["dimension"], bucket["_id"]["key"], bucket["_id"]["status"]
+            if dimension == "total":
+                stats["by_status"][status] = bucket["count"]
+            elif dimension in sections:
+                entry = stats[sections[dimension]].setdefault(key, {"total": 0, "by_status": {}})
+                entry["total"] += bucket["count"]
+                entry["by_status"][status] = bucket["count"]
+        stats["total"] = sum(stats["by_status"].values())
+
+        # Served by the status_end_date index; the window covers the whole of its last day
+        today = today or datetime.utcnow().date()
+        start = datetime(today.year, today.month, today.day)
+        window = {"$gte": start, "$lt": start + timedelta(days=expiring_days + 1)}
+        contracts = list(db.contracts.find(
+            {"status": {"$in": list(ACTIVE_STATUSES)}, "details.end_date": window}, EXPIRING_PROJECTION
+        ).sort("details.end_date", ASCENDING).limit(expiring_limit))
+        for contract_data in contracts:
+            contract_data["details"] = response_details(contract_data.get("details"))
+        stats["expiring_soon"] = {"days": expiring_days, "contracts": contracts}
+        return stats
+
+    @staticmethod
+    def reconcile(db):
+        """
+        Rebuilds the rollup with one aggregation over contracts. Buckets that no longer have
+        contracts are dropped. A write racing the reconcile, or still queued
+        in change_recorder, can leave its bucket off by one until the next run.
+        """
+        started = datetime.utcnow()
+        operations = [ReplaceOne({"_id": bucket["_id"]}, {"count": bucket["count"], "updated_at": started}, upsert=True)
+                      for bucket in db.contracts.aggregate(RECONCILE_PIPELINE, allowDiskUse=True)]
+        if operations:
+            db.contract_stats.bulk_write(operations, ordered=False)
+        # Neither rebuilt nor written to since the reconcile started
+        removed = db.contract_stats.delete_many({"updated_at": {"$lt": started}}).deleted_count
+        return {"buckets": len(operations), "removed": removed}
+
+    @staticmethod
+    def schedule_reconcile(db, interval_seconds):
+        """Queues the reconcile for the current interval; the job key makes this a no-op once queued."""
+        period = int(time.time()) // interval_seconds
+        return JobQueue.enqueue(db, "reconcile_contract_stats", {"interval": interval_seconds},
+                                job_key=f"contract_stats:{period}")
+
+    @staticmethod
+    def reconcile_job(db, gridfs, payload, job):
+        """
+        Job handler: queues the run for the next interval, then reconciles. Queued first, so a run
+        that fails for good doesn't stop the ones after it.
+        """
+        interval = payload["interval"]
+        next_period = int(time.time()) // interval + 1
+        JobQueue.enqueue(db, "reconcile_contract_stats", payload, job_key=f"contract_stats:{next_period}",
+                         run_at=datetime.utcfromtimestamp(next_period * interval))
+        return StatsService.reconcile(db)
+
+register_job_handler("reconcile_contract_stats", StatsService.reconcile_job)
@@ -4,4 +4,21 @@ def json_response(data, status_code=200):
     return jsonify(data), status_code
 
 def error_response(message, status_code=400):
-    return jsonify({"error": message}), status_code
\ No newline at end of file
+    return jsonify({"error": message}), status_code
+
+def contract_etag(version):
+    """ETag value for a contract version (without quotes; werkzeug adds them)."""
+    return f"v{version}"
+
+def version_from_if_match(if_match):
+    """
+    Expected contract version from a parsed If-Match header (request.if_match).
+    Returns None when there is no header or it is '*', meaning no version check.
+    An ETag that isn't one of ours can never match, so it maps to version -1.
+    """
+    if not if_match or if_match.star_tag:
+        return None
+    for etag in if_match:
+        if etag.startswith('v') and etag[1:].isdigit():
+            return int(etag[1:])
+    return -1
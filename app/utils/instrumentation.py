@@ -0,0 +1,71 @@
+# app/utils/instrumentation.py
+import json
+import logging
+import random
+import time
+from flask import Response, request
+from app.utils.metrics import (HTTP_REQUESTS, HTTP_REQUEST_SECONDS, end_request_timings, metrics, phase,
+                               register_mongo_listener, start_request_timings)
+
+logger = logging.getLogger('app.requests')
+
+def timed(output):
+    """Wraps a flask-restx representation so its time is reported as the 'serialization' phase."""
+    def timed_output(data, code, headers=None):
+        with phase("serialization"):
+            return output(data, code, headers)
+    return timed_output
+
+def record_request(method, route, path, status, elapsed, timings, sample_rate=0.01, slow_seconds=1.0):
+    """
+    Route metrics plus the sampled summary log event for one finished request.
+    Shared by the Flask hooks below and the native routes of the ASGI app.
+    """
+    HTTP_REQUESTS.inc(route, method, status)
+    HTTP_REQUEST_SECONDS.observe(elapsed, route, method)
+
+    sampled = status >= 500 or elapsed >= slow_seconds or random.random() < sample_rate
+    if sampled and logger.isEnabledFor(logging.INFO):
+        logger.info("%s", json.dumps({
+            "method": method,
+            "route": route,
+            "path": path,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "mongo_ops": timings["mongo_ops"] if timings else 0,
+            "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in (timings or {}).get("phases", {}).items()},
+        }))
+
+def init_app(app):
+    """
+    Per-request instrumentation: route and Mongo metrics for /metrics, plus one summary
+    log event per request, sampled, and always emitted for errors and slow requests.
+    Call before the Mongo client is created so the command listener sees its traffic.
+    """
+    register_mongo_listener()
+    sample_rate = app.config.get('REQUEST_LOG_SAMPLE_RATE', 0.01)
+    slow_seconds = app.config.get('REQUEST_LOG_SLOW_MS', 1000) / 1000
+
+    @app.before_request
+    def _start_timer():
+        request.environ['app.timings'] = start_request_timings()
+        request.environ['app.start'] = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = request.environ.get('app.start')
+        if start is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(request.method, route, request.path, response.status_code,
+                       time.perf_counter() - start, request.environ.get('app.timings'), sample_rate, slow_seconds)
+        return response
+
+    @app.teardown_request
+    def _clear(exc):
+        end_request_timings()
+
+    if app.config.get('METRICS_ENABLED', True):
+        @app.route('/metrics')
+        def _metrics():
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,245 @@
+# app/utils/metrics.py
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from pymongo import monitoring
+
+# Latency buckets in seconds, shared by every histogram
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Gauge(Counter):
+    """A value that goes up and down (e.g. open connections); inc() with a negative amount to decrease."""
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {} # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Minimal Prometheus-style registry, rendered in the text exposition format at /metrics."""
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """collect() returns extra exposition lines, for values owned elsewhere (e.g. cache stats)."""
+        if collect not in self._collectors:
+            self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter('http_requests_total', 'HTTP requests by route, method and status.', ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'HTTP request latency.', ('route', 'method'))
+MONGO_COMMAND_SECONDS = metrics.histogram('mongo_command_duration_seconds', 'MongoDB command latency.', ('command', 'collection'))
+MONGO_COMMAND_FAILURES = metrics.counter('mongo_command_failures_total', 'Failed MongoDB commands.', ('command', 'collection'))
+MONGO_POOL_CHECKOUT_SECONDS = metrics.histogram('mongo_pool_checkout_duration_seconds', 'Time spent waiting for a pooled connection.', ('pool',))
+MONGO_POOL_CHECKOUT_FAILURES = metrics.counter('mongo_pool_checkout_failures_total', 'Connection checkouts that failed, e.g. on waitQueueTimeoutMS.', ('pool', 'reason'))
+MONGO_POOL_CONNECTIONS = metrics.gauge('mongo_pool_connections', 'Open connections per pool.', ('pool',))
+MONGO_POOL_CONNECTIONS_IN_USE = metrics.gauge('mongo_pool_connections_in_use', 'Connections currently checked out per pool.', ('pool',))
+CONTRACT_EXPIRY_CONTRACTS = metrics.counter('contract_expiry_contracts_total', 'Contracts handled by the expiry processor, by outcome (expired, renewed, would_expire, would_renew, conflicts) and mode (apply, dry_run).', ('outcome', 'mode'))
+CONTRACT_EXPIRY_BATCH_SECONDS = metrics.histogram('contract_expiry_batch_duration_seconds', 'Time to read and write one expiry batch.', ('mode',))
+CONTRACT_EXPIRY_RUNS = metrics.counter('contract_expiry_runs_total', 'Expiry processor runs by result (completed, locked, lost_lock).', ('result',))
+
+# Per-request phase timings (seconds) and Mongo round-trip count; None outside a request
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+def start_request_timings():
+    timings = {"phases": {}, "mongo_ops": 0}
+    _request_timings.set(timings)
+    return timings
+
+def end_request_timings():
+    _request_timings.set(None)
+
+def record_phase(name, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings["phases"][name] = timings["phases"].get(name, 0.0) + seconds
+
+@contextmanager
+def phase(name):
+    """Times a block and adds it to the current request's phase breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every command the driver sends. GridFS traffic (fs.files / fs.chunks) is reported
+    as its own 'gridfs' phase so file transfers don't hide inside the Mongo numbers.
+    """
+    def __init__(self):
+        self._pending = {}
+
+    @staticmethod
+    def _collection(event):
+        target = event.command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        self._pending[event.request_id] = self._collection(event)
+
+    def _finish(self, event):
+        collection = self._pending.pop(event.request_id, "")
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_SECONDS.observe(seconds, event.command_name, collection)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings["mongo_ops"] += 1
+            record_phase("gridfs" if collection.startswith("fs.") else "mongo", seconds)
+        return collection
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        MONGO_COMMAND_FAILURES.inc(event.command_name, collection)
+
+_listener_registered = False
+
+def register_mongo_listener():
+    """Registers the command listener once per process. Must run before the MongoClient is created."""
+    global _listener_registered
+    if not _listener_registered:
+        monitoring.register(MongoCommandMetrics())
+        _listener_registered = True
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool metrics for one client, labelled with its pool name ('contracts', 'gridfs').
+    The time a request waits for a connection is also reported as its 'pool_wait' phase.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+
+    def reset(self):
+        # Connections counted before a fork belong to the parent's pool
+        MONGO_POOL_CONNECTIONS.set(0, self.pool)
+        MONGO_POOL_CONNECTIONS_IN_USE.set(0, self.pool)
+
+    def connection_checked_out(self, event):
+        seconds = event.duration or 0.0
+        MONGO_POOL_CHECKOUT_SECONDS.observe(seconds, self.pool)
+        MONGO_POOL_CONNECTIONS_IN_USE.inc(self.pool)
+        record_phase("pool_wait", seconds)
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_SECONDS.observe(event.duration or 0.0, self.pool)
+        MONGO_POOL_CHECKOUT_FAILURES.inc(self.pool, event.reason)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CONNECTIONS_IN_USE.inc(self.pool, amount=-1)
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc(self.pool)
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.inc(self.pool, amount=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
@@ -0,0 +1,45 @@
+# app/utils/pagination.py
+import base64
+import json
+import re
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+_FIELD_RE = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+def encode_cursor(updated_at, object_id):
+    """Opaque keyset cursor for the (updated_at, _id) position of the last returned document."""
+    payload = {"u": updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at, "i": str(object_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload["u"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor.")
+
+def parse_fields(fields, allowed_roots):
+    """Turns 'a,b.c' into a Mongo projection, rejecting anything outside allowed_roots."""
+    projection = {}
+    for field in (f.strip() for f in fields.split(',')):
+        if not field:
+            continue
+        if not _FIELD_RE.match(field) or field.split('.', 1)[0] not in allowed_roots:
+            raise ValueError(f"Unknown field '{field}'.")
+        projection[field] = 1
+    if not projection:
+        raise ValueError("No fields requested.")
+    return projection
+
+def parse_limit(value, default, maximum, name="limit"):
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer.")
+    if limit < 1:
+        raise ValueError(f"{name} must be positive.")
+    return min(limit, maximum) if maximum else limit
@@ -0,0 +1,59 @@
+# app/utils/search.py
+import re
+
+# Fields that keyword search looks at, with their relevance weight
+SEARCH_FIELDS = {
+    "contract_name": 3,
+    "contract_category": 2,
+    "party1": 1,
+    "party2": 1,
+}
+
+# Longest prefix stored per token; longer query terms are matched on this prefix and verified when scoring
+MAX_PREFIX_LENGTH = 20
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+def build_search_terms(details):
+    """
+    Returns the sorted list of every token prefix (edge n-gram) in the searchable fields.
+    Stored on the contract as 'search_terms' and served by the (status, search_terms) index.
+    """
+    terms = set()
+    for field in SEARCH_FIELDS:
+        for token in tokenize((details or {}).get(field)):
+            for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                terms.add(token[:length])
+    return sorted(terms)
+
+def query_terms(keyword):
+    """Splits a keyword string into the distinct lowercase terms used for matching."""
+    terms = []
+    for token in tokenize(keyword):
+        if token not in terms:
+            terms.append(token)
+    return terms
+
+def score(details, terms):
+    """
+    Relevance of a contract for the given terms: each term scores the field weight,
+    doubled when it matches a whole token rather than a prefix. Returns 0 if any term is missing.
+    """
+    total = 0
+    for term in terms:
+        best = 0
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize((details or {}).get(field)):
+                if token == term:
+                    best = max(best, weight * 2)
+                elif token.startswith(term):
+                    best = max(best, weight)
+        if not best:
+            return 0
+        total += best
+    return total
@@ -0,0 +1,44 @@
+# app/utils/serialization.py
+import json
+import logging
+from datetime import date, datetime
+from bson import ObjectId
+from flask import make_response
+from flask_restx.representations import output_json
+
+try:
+    import orjson # Optional: faster JSON encoding when installed
+except ImportError: # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def json_default(value):
+    """Encodes the BSON values that show up in contract documents (dates in details, ObjectIds)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def output_orjson(data, code, headers=None):
+    """flask-restx representation using orjson; same output as output_json, without the pretty-printing."""
+    response = make_response(orjson.dumps(data, default=json_default, option=orjson.OPT_NON_STR_KEYS) + b"\n", code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
+def json_output(app):
+    """The JSON representation to register on the Api, per JSON_RESPONSE_BACKEND."""
+    if app.config.get('JSON_RESPONSE_BACKEND') == 'orjson':
+        if orjson is not None:
+            return output_orjson
+        logger.warning("JSON_RESPONSE_BACKEND is 'orjson' but orjson isn't installed (requirements-optional.txt); "
+                       "using the stdlib json encoder.")
+    return output_json
+
+def dumps(data):
+    """One JSON document as a str, e.g. an NDJSON line."""
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default).decode('utf-8')
+    return json.dumps(data, default=json_default)
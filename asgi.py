@@ -0,0 +1,4 @@
+from app.asgi import create_asgi_app
+
+# ASGI entry point, e.g. `uvicorn asgi:app --workers 2`; `gunicorn run:app` keeps serving the WSGI app
+app = create_asgi_app()
@@ -0,0 +1,116 @@
+# benchmarks/bench_asgi.py
+# Load-test comparison of the sync gunicorn deployment and the ASGI mode, over HTTP against
+# running servers on the same mongod. Size the two so they use the same memory, e.g.
+#   gunicorn -w 4 -b :8000 run:app
+#   uvicorn asgi:app --workers 1 --port 8001
+# then
+#   BENCH_SYNC_URL=http://localhost:8000 BENCH_SYNC_PID=<gunicorn master pid> \
+#   BENCH_ASGI_URL=http://localhost:8001 BENCH_ASGI_PID=<uvicorn pid> python -m benchmarks.bench_asgi
+# The PIDs are optional; with them the resident memory of each server (master plus workers) is reported.
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import percentiles, sample_details
+
+N_CONTRACTS = int(os.environ.get('BENCH_CONTRACTS', 2000))
+CONCURRENCY = int(os.environ.get('BENCH_CONCURRENCY', 64))
+DURATION = float(os.environ.get('BENCH_DURATION', 30))
+
+def rss_mb(pid):
+    # Resident memory of pid and its direct children (gunicorn / uvicorn workers)
+    pids = [pid]
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        pids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    total = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+def request(conn, method, path, body=None):
+    conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+def seed(base_url, prefix):
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    for start in range(0, N_CONTRACTS, 1000):
+        numbers = [f"{prefix}-{i}" for i in range(start, min(start + 1000, N_CONTRACTS))]
+        request(conn, 'POST', '/api/contracts/batch', [{"contract_number": n, "details": sample_details(i)} for i, n in enumerate(numbers, start)])
+        for action in ('negotiate', 'approve', 'sign'):
+            request(conn, 'PUT', f'/api/contracts/batch/{action}', numbers)
+    for i in range(0, N_CONTRACTS, 4):
+        request(conn, 'PUT', f'/api/contracts/{prefix}-{i}/execute')
+    conn.close()
+
+def worker(base_url, prefix, deadline, latencies, errors, seed_value):
+    url = urlsplit(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    rng = random.Random(seed_value)
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < 0.8:
+            method, path, body = 'GET', f'/api/contracts/{prefix}-{rng.randrange(N_CONTRACTS)}', None
+        elif roll < 0.95:
+            method, path, body = 'GET', '/api/contracts/search?keyword=acme&limit=20', None
+        else:
+            # Renewing an executed contract is a transition that can be repeated
+            method, path, body = 'PUT', f'/api/contracts/{prefix}-{rng.randrange(0, N_CONTRACTS, 4)}/renew', None
+        start = time.perf_counter()
+        try:
+            status = request(conn, method, path, body)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+            status = 599
+        latencies.append(time.perf_counter() - start)
+        if status >= 500:
+            errors.append(status)
+    conn.close()
+
+def run(label, base_url, pid):
+    prefix = f"ASGI-BENCH-{label}-{int(time.time())}"
+    seed(base_url, prefix)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + DURATION
+    threads = [threading.Thread(target=worker, args=(base_url, prefix, deadline, latencies, errors, n))
+               for n in range(CONCURRENCY)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    peak_rss = 0.0
+    while any(thread.is_alive() for thread in threads):
+        if pid:
+            peak_rss = max(peak_rss, rss_mb(pid))
+        time.sleep(0.5)
+    elapsed = time.perf_counter() - start
+    latency = percentiles(latencies)
+    memory = f", peak RSS {peak_rss:,.0f} MB" if pid else ""
+    print(f"{label:>5}: {len(latencies) / elapsed:>8,.0f} req/s, p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+          f"p99 {latency['p99']:.1f} ms, {len(errors)} errors{memory}")
+
+if __name__ == '__main__':
+    for label in ('sync', 'asgi'):
+        base_url = os.environ.get(f'BENCH_{label.upper()}_URL')
+        if not base_url:
+            print(f"{label:>5}: skipped, set BENCH_{label.upper()}_URL")
+            continue
+        pid = os.environ.get(f'BENCH_{label.upper()}_PID')
+        run(label, base_url, int(pid) if pid else None)
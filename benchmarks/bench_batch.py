@@ -0,0 +1,32 @@
+# benchmarks/bench_batch.py
+# Compares ingesting N contracts through the single-item endpoints with the batch endpoints.
+import logging
+import time
+
+from benchmarks.common import make_app, sample_details
+
+N = 2000
+
+def single(client):
+    for i in range(N):
+        client.post('/api/contracts/', json={"contract_number": f"S-{i}", "details": sample_details(i)})
+    for i in range(N):
+        client.put(f'/api/contracts/S-{i}/negotiate', json={"negotiation_status": "open"})
+
+def batch(client):
+    client.post('/api/contracts/batch', json=[{"contract_number": f"B-{i}", "details": sample_details(i)} for i in range(N)])
+    client.put('/api/contracts/batch/negotiate', json=[{"contract_number": f"B-{i}", "negotiation": {"negotiation_status": "open"}} for i in range(N)])
+
+def run(label, ingest):
+    client = make_app().test_client()
+    start = time.perf_counter()
+    ingest(client)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>7}: {N} creates + {N} negotiations in {elapsed:.2f}s ({2 * N / elapsed:,.0f} items/s)")
+    return elapsed
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    before = run("single", single)
+    after = run("batch", batch)
+    print(f"speedup: {before / after:.1f}x")
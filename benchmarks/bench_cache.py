@@ -0,0 +1,34 @@
+# benchmarks/bench_cache.py
+# Read throughput of ContractService.get_contract with and without the contract cache.
+import logging
+import random
+import time
+
+from app.services.cache import LRUCache, LocalSharedClient, SharedCache, contract_cache
+from app.services.contract_service import ContractService
+from benchmarks.common import CountingDatabase, make_db, sample_details
+
+N_CONTRACTS = 1000
+N_READS = 5000
+
+def run(label, backend):
+    raw_db, _ = make_db()
+    ContractService.create_contracts_batch(raw_db, [{"contract_number": f"C-{i}", "details": sample_details(i)} for i in range(N_CONTRACTS)])
+    db = CountingDatabase(raw_db)
+    contract_cache.backend = backend
+    contract_cache.hits = contract_cache.misses = 0
+    rng = random.Random(7)
+    # Skewed access: most reads hit a small hot set, like polling clients do
+    keys = [f"C-{int(rng.paretovariate(1.2)) % N_CONTRACTS}" for _ in range(N_READS)]
+    start = time.perf_counter()
+    for key in keys:
+        ContractService.get_contract(db, key)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>8}: {N_READS / elapsed:>9,.0f} reads/s, {db.total()} Mongo round trips, {contract_cache.stats()}")
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    run("none", None)
+    run("lru", LRUCache(max_size=500, ttl=60))
+    run("shared", SharedCache(LocalSharedClient(), ttl=60))
+    contract_cache.backend = None
@@ -0,0 +1,59 @@
+# benchmarks/bench_download.py
+# Peak Python memory and throughput of the document endpoint for a large GridFS file,
+# compared with reading the whole file before responding.
+#   python -m benchmarks.bench_download 300   (size in MB)
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+from bson import ObjectId
+
+from app.services.contract_service import ContractService
+from benchmarks.common import make_app, sample_details
+
+def seed(app, size_mb):
+    file_id = ObjectId()
+    block = os.urandom(1024 * 1024)
+    with app.gridfs.new_file(_id=file_id, filename="BIG_final_contract.pdf", contract_number="BIG") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    ContractService.create_contract(app.db, {"contract_number": "BIG", "details": sample_details(0)})
+    app.db.contracts.update_one({"contract_number": "BIG"}, {"$set": {"status": "EXECUTED", "final_document_id": str(file_id)}})
+
+def measure(label, consume):
+    tracemalloc.start()
+    start = time.perf_counter()
+    total = consume()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>10}: {total / 2**20:,.0f} MB in {elapsed:.2f}s ({total / 2**20 / elapsed:,.0f} MB/s), peak {peak / 2**20:,.1f} MB")
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    app = make_app()
+    seed(app, size_mb)
+    client = app.test_client()
+
+    def buffered():
+        grid_out = ContractService.get_contract_document(app.db, app.gridfs, "BIG")
+        return len(grid_out.read())
+
+    def streamed():
+        response = client.get('/api/contracts/BIG/document', buffered=False)
+        total = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return total
+
+    def ranged():
+        response = client.get('/api/contracts/BIG/document', headers={'Range': f'bytes={2**20}-{2 * 2**20 - 1}'}, buffered=False)
+        total = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return total
+
+    measure("read()", buffered)
+    measure("streamed", streamed)
+    measure("range 1MB", ranged)
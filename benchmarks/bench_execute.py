@@ -0,0 +1,46 @@
+# benchmarks/bench_execute.py
+# Request latency and request-thread occupancy of PUT /execute with inline vs queued document generation.
+# Document rendering is slowed down artificially to stand in for a real PDF build.
+import logging
+import statistics
+import time
+
+from app.services.contract_service import ContractService
+from benchmarks.common import make_app, sample_details
+
+N = 100
+RENDER_SECONDS = 0.05
+
+_store = ContractService._store_final_document
+
+def slow_store(gridfs, contract, file_id, filename):
+    time.sleep(RENDER_SECONDS)
+    return _store(gridfs, contract, file_id, filename)
+
+def run(mode):
+    app = make_app(DOCUMENT_GENERATION_MODE=mode, JOB_WORKER_THREADS=4)
+    client = app.test_client()
+    ContractService.create_contracts_batch(app.db, [{"contract_number": f"C-{i}", "details": sample_details(i)} for i in range(N)])
+    app.db.contracts.update_many({}, {"$set": {"status": "SIGNED"}})
+    latencies = []
+    start = time.perf_counter()
+    for i in range(N):
+        t0 = time.perf_counter()
+        response = client.put(f'/api/contracts/C-{i}/execute')
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code in (200, 202), response.json
+    busy = time.perf_counter() - start
+    # Wait until every document exists, to compare end-to-end completion too
+    while app.db.fs.files.count_documents({}) < N:
+        time.sleep(0.01)
+    done = time.perf_counter() - start
+    print(f"{mode:>6}: p50 {statistics.median(latencies):6.1f} ms  max {max(latencies):6.1f} ms  "
+          f"request threads busy {busy:5.2f}s  all documents stored after {done:5.2f}s")
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    ContractService._store_final_document = staticmethod(slow_store)
+    run("inline")
+    run("async")
+    from app.services.jobs import job_worker
+    job_worker.stop()
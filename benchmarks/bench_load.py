@@ -0,0 +1,312 @@
+# benchmarks/bench_load.py
+# Reproducible load test of the Flask app: seeds contracts in every status, drives a weighted mix of
+# create / get / search / lifecycle / execute requests from concurrent clients and reports throughput,
+# p50/p95/p99 latency, Mongo round trips per request and peak RSS as JSON.
+#   python -m benchmarks.bench_load --mix all --output load.json
+#   python -m benchmarks.bench_load --mix all --baseline load.json   # exits 1 on a regression
+# Runs on mongomock by default; BENCH_MONGO_URI=mongodb://127.0.0.1:27017 runs it against a local mongod.
+# Compare reports taken on the same backend and machine only; short runs are noisy, so keep --duration
+# at 10s or more, or raise --tolerance.
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from app.services.changes import change_recorder
+from benchmarks.common import CountingDatabase, make_app, peak_rss_mb, percentiles, sample_details, seed_contracts
+
+# Scenario weights of each mix
+MIXES = {
+    "read_heavy": {"get": 80, "search": 15, "create": 5},
+    "mixed": {"get": 55, "search": 15, "create": 15, "lifecycle": 10, "execute": 5},
+    "write_heavy": {"create": 40, "lifecycle": 30, "execute": 20, "get": 10},
+}
+
+# Serial runs of each scenario used to count its Mongo round trips
+CALIBRATION_RUNS = 20
+
+# Flush interval while calibrating: longer than any calibration, so only the explicit flushes write
+CALIBRATION_FLUSH_HOLD = 3600
+
+# Mongo round trips per request may grow by this much before it counts as a regression
+OPS_SLACK = 0.01
+
+class CountingHandler(logging.Handler):
+    """Counts the records it sees; added to the root logger so warnings and errors fail the report."""
+    def __init__(self, level=logging.WARNING):
+        super().__init__(level)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+class Workload:
+    """The scenarios of one mix, against one app and its seeded contracts."""
+    def __init__(self, app, numbers, rng):
+        self.app = app
+        self.seeded = [n for status_numbers in numbers.values() for n in status_numbers]
+        self.signed = deque(numbers.get("SIGNED", []))
+        self.rng = rng
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _new_contract(self):
+        with self._lock:
+            i = next(self._ids)
+        return {"contract_number": f"L-{i}", "details": sample_details(i)}
+
+    def _pick(self):
+        with self._lock:
+            return self.rng.choice(self.seeded)
+
+    # Each scenario returns the (status code, seconds) of the requests it made
+    def get(self, client):
+        return [_timed(client.get, f'/api/contracts/{self._pick()}')]
+
+    def create(self, client):
+        return [_timed(client.post, '/api/contracts/', json=self._new_contract())]
+
+    def search(self, client):
+        with self._lock:
+            party = self.rng.randrange(50)
+        return [_timed(client.get, f'/api/contracts/search?keyword=acme+corp+{party}&limit=20')]
+
+    def lifecycle(self, client):
+        contract = self._new_contract()
+        number = contract["contract_number"]
+        requests = [_timed(client.post, '/api/contracts/', json=contract),
+                    _timed(client.put, f'/api/contracts/{number}/negotiate', json={"negotiation_status": "open"})]
+        for action in ("approve", "sign", "execute"):
+            requests.append(_timed(client.put, f'/api/contracts/{number}/{action}'))
+        return requests
+
+    def execute(self, client):
+        # Executes a seeded SIGNED contract: the transition plus the GridFS document
+        try:
+            number = self.signed.popleft()
+        except IndexError:
+            return None
+        return [_timed(client.put, f'/api/contracts/{number}/execute')]
+
+def _timed(method, path, **kwargs):
+    start = time.perf_counter()
+    status = method(path, **kwargs).status_code
+    return status, time.perf_counter() - start
+
+def _run_scenario(workload, name, client):
+    # execute falls back to a full lifecycle once the seeded SIGNED contracts run out
+    requests = getattr(workload, name)(client)
+    if requests is None:
+        name, requests = "lifecycle", workload.lifecycle(client)
+    return name, requests
+
+def calibrate(app, workload, scenarios):
+    """
+    Mongo round trips per request of each scenario, from serial runs with a counting database.
+    change_recorder's batched stats writes belong to no request and land at timer-driven moments,
+    so they are held back while a scenario is counted and flushed once it has been.
+    """
+    client = app.test_client()
+    deferred = change_recorder.deferred
+    if deferred:
+        interval = change_recorder.interval
+        change_recorder.stop()
+        change_recorder.interval = CALIBRATION_FLUSH_HOLD
+    ops = {}
+    try:
+        for name in scenarios:
+            app.db.reset()
+            requests = 0
+            for _ in range(CALIBRATION_RUNS):
+                _, made = _run_scenario(workload, name, client)
+                requests += len(made)
+            ops[name] = (app.db.total(), requests)
+            change_recorder.flush()
+    finally:
+        if deferred:
+            change_recorder.stop()
+            change_recorder.interval = interval
+    app.db.reset()
+    return ops
+
+def run_mix(name, weights, args, log_counter):
+    log_counter.count = 0
+    app = make_app()
+    counting = CountingDatabase(app.db)
+    numbers = seed_contracts(counting, args.contracts)
+    app.db = counting
+    rng = random.Random(args.seed)
+    workload = Workload(app, numbers, rng)
+    calibration = calibrate(app, workload, weights)
+
+    scenarios = list(weights)
+    cumulative = list(itertools.accumulate(weights[s] for s in scenarios))
+    results = []
+    stop = threading.Event()
+    measuring = threading.Event()
+
+    def client_loop(index):
+        client = app.test_client()
+        choose = random.Random(args.seed * 1000 + index)
+        local = []
+        while not stop.is_set():
+            scenario = choose.choices(scenarios, cum_weights=cumulative)[0]
+            started = time.perf_counter()
+            scenario, requests = _run_scenario(workload, scenario, client)
+            if measuring.is_set():
+                local.append((scenario, time.perf_counter() - started, requests))
+        results.append(local)
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(args.warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    # Operations still in flight finish unmeasured
+    measuring.clear()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for t in threads:
+        t.join()
+
+    operations = [item for local in results for item in local]
+    request_latencies = [seconds for _, _, made in operations for _, seconds in made]
+    errors = sum(1 for _, _, made in operations for status, _ in made if status >= 400)
+    by_scenario = {}
+    mongo_ops = 0.0
+    for scenario in sorted({s for s, _, _ in operations}):
+        runs = [(seconds, made) for s, seconds, made in operations if s == scenario]
+        requests = sum(len(made) for _, made in runs)
+        total_ops, calibrated_requests = calibration.get(scenario, (0, 0))
+        per_request = total_ops / calibrated_requests if calibrated_requests else 0.0
+        mongo_ops += per_request * requests
+        by_scenario[scenario] = {
+            "operations": len(runs),
+            "requests": requests,
+            "errors": sum(1 for _, made in runs for status, _ in made if status >= 400),
+            "latency_ms": percentiles([seconds for seconds, _ in runs]),
+            "mongo_ops_per_request": round(per_request, 3),
+        }
+    return {
+        "weights": weights,
+        "operations": len(operations),
+        "requests": len(request_latencies),
+        "errors": errors,
+        "throughput": {"ops_per_second": round(len(operations) / elapsed, 1),
+                       "requests_per_second": round(len(request_latencies) / elapsed, 1)},
+        "latency_ms": percentiles(request_latencies),
+        "mongo_ops_per_request": round(mongo_ops / len(request_latencies), 3) if request_latencies else 0.0,
+        "scenarios": by_scenario,
+        # Warnings and errors logged by the app during the mix, seeding included; any fails the run
+        "log_warnings": log_counter.count,
+    }
+
+def compare(report, baseline, tolerance):
+    """Lines describing each metric against the baseline, and whether any of them regressed."""
+    lines = []
+    regressed = False
+
+    def check(label, current, previous, worse):
+        nonlocal regressed
+        if previous is None or current is None:
+            return
+        bad = worse(current, previous)
+        regressed = regressed or bad
+        change = f"{(current - previous) / previous * 100:+.1f}%" if previous else "n/a"
+        lines.append(f"{'REGRESSION' if bad else 'ok':>10}  {label:<45} {previous:>10} -> {current:<10} ({change})")
+
+    slower = lambda current, previous: current > previous * (1 + tolerance)
+    for mix, result in report["mixes"].items():
+        previous = baseline.get("mixes", {}).get(mix)
+        if previous is None:
+            lines.append(f"{'new':>10}  {mix}: not in the baseline")
+            continue
+        check(f"{mix} requests/s", result["throughput"]["requests_per_second"],
+              previous["throughput"]["requests_per_second"], lambda c, p: c < p * (1 - tolerance))
+        for p in ("p50", "p95", "p99"):
+            check(f"{mix} {p} ms", result["latency_ms"][p], previous["latency_ms"][p], slower)
+        check(f"{mix} mongo ops/request", result["mongo_ops_per_request"], previous["mongo_ops_per_request"],
+              lambda c, p: c > p + OPS_SLACK)
+        check(f"{mix} errors", result["errors"], previous["errors"], lambda c, p: c > p)
+        check(f"{mix} log warnings", result["log_warnings"], previous.get("log_warnings", 0), lambda c, p: c > 0)
+        for scenario, stats in result["scenarios"].items():
+            before = previous.get("scenarios", {}).get(scenario)
+            if before is None:
+                continue
+            check(f"{mix}/{scenario} p95 ms", stats["latency_ms"]["p95"], before["latency_ms"]["p95"], slower)
+            check(f"{mix}/{scenario} mongo ops/request", stats["mongo_ops_per_request"],
+                  before["mongo_ops_per_request"], lambda c, p: c > p + OPS_SLACK)
+    check("peak RSS MB", report["peak_rss_mb"], baseline.get("peak_rss_mb"), slower)
+    return lines, regressed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the contract API with a JSON report.')
+    parser.add_argument('--mix', choices=sorted(MIXES) + ["all"], default="all")
+    parser.add_argument('--contracts', type=int, default=int(os.environ.get('BENCH_CONTRACTS', 2000)),
+                        help='Contracts seeded before each mix')
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('BENCH_CONCURRENCY', 8)),
+                        help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=float(os.environ.get('BENCH_DURATION', 10)),
+                        help='Measured seconds per mix')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Unmeasured seconds before each mix')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the scenario choices')
+    parser.add_argument('--output', help='Writes the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare with; exits 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative change of throughput, latency and RSS before it is a regression')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Request logs are noise at this rate; warnings and errors are shown and counted
+    logging.disable(logging.INFO)
+    logging.basicConfig(level=logging.WARNING)
+    log_counter = CountingHandler()
+    logging.getLogger().addHandler(log_counter)
+    mixes = MIXES if args.mix == "all" else {args.mix: MIXES[args.mix]}
+    report = {
+        "meta": {
+            "backend": "mongod" if os.environ.get('BENCH_MONGO_URI') else "mongomock",
+            "contracts": args.contracts,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "started_at": datetime.utcnow().isoformat() + "Z",
+        },
+        "mixes": {name: run_mix(name, weights, args, log_counter) for name, weights in mixes.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("backend") != report["meta"]["backend"]:
+            print(f"Baseline was taken on {baseline.get('meta', {}).get('backend')}, not {report['meta']['backend']}", file=sys.stderr)
+        lines, regressed = compare(report, baseline, args.tolerance)
+        print("\n".join(lines), file=sys.stderr)
+        return 1 if regressed else 0
+    warnings = sum(result["log_warnings"] for result in report["mixes"].values())
+    if warnings:
+        print(f"{warnings} warnings or errors were logged during the run", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# benchmarks/bench_negotiations.py
+# Contract document size and fetch latency as negotiation rounds pile up: history appended
+# inside the contract ($push) vs. the contract_negotiations collection.
+#   python -m benchmarks.bench_negotiations 10 100 1000
+# mongomock scans contract_negotiations for the history page; a mongod serves it from the index.
+import sys
+import time
+
+import bson
+
+from app.services.cache import contract_cache
+from app.services.contract_service import ContractService
+from benchmarks.common import make_db, sample_details
+
+GETS = 200
+
+def negotiation(i):
+    return {"negotiation_status": "open", "negotiator_notes": f"Round {i}: counter-proposal on payment terms and liability caps.",
+            "proposed_changes": [{"field": "payment_terms", "old_value": f"Net {30 + i % 30}", "new_value": f"Net {31 + i % 30}"}]}
+
+def embedded_round(db, contract_number, i):
+    # Appending to the contract itself: the document grows and is read back whole
+    db.contracts.update_one({"contract_number": contract_number},
+                            {"$set": {"status": "NEGOTIATION", "details.negotiation": negotiation(i)},
+                             "$push": {"details.negotiation_history": negotiation(i)}, "$inc": {"version": 1}})
+
+def current_round(db, contract_number, i):
+    ContractService.negotiate_contract(db, contract_number, negotiation(i))
+
+def run(label, negotiate, rounds):
+    db, _ = make_db()
+    contract_cache.backend = None # Measure the Mongo read, not the cache
+    ContractService.create_contract(db, {"contract_number": "N-1", "details": sample_details(1)})
+    for i in range(rounds):
+        negotiate(db, "N-1", i)
+    size = len(bson.encode(db.contracts.find_one({"contract_number": "N-1"})))
+    start = time.perf_counter()
+    for _ in range(GETS):
+        ContractService.get_contract(db, "N-1")
+    get_ms = (time.perf_counter() - start) * 1000 / GETS
+    start = time.perf_counter()
+    page, _ = ContractService.get_negotiations(db, "N-1", 20) if negotiate is current_round else ([], None)
+    page_ms = (time.perf_counter() - start) * 1000
+    history = f", first history page {page_ms:.2f} ms ({len(page)} rounds)" if negotiate is current_round else ""
+    print(f"{rounds:>6} rounds {label:>8}: contract {size / 1024:>8.1f} KiB, get {get_ms:.3f} ms{history}")
+
+if __name__ == '__main__':
+    for rounds in [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]:
+        run("embedded", embedded_round, rounds)
+        run("current", current_round, rounds)
@@ -0,0 +1,50 @@
+# benchmarks/bench_search.py
+# p50/p99 latency of keyword search: indexed search_terms path vs the legacy $regex path.
+#   python -m benchmarks.bench_search 10000 100000
+# Sizes beyond ~100k need a real mongod: BENCH_MONGO_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_search 1000000
+import logging
+import random
+import statistics
+import sys
+import time
+
+from app.models.contract import Contract
+from app.services.contract_service import ContractService
+from benchmarks.common import make_db, sample_details
+
+QUERIES = ["acme", "glob", "service agreement", "lease", "acme 7", "licens"]
+ROUNDS = 50
+
+def seed(db, size, chunk=10000):
+    for start in range(0, size, chunk):
+        documents = []
+        for i in range(start, min(start + chunk, size)):
+            contract = Contract(f"C-{i}", "EXECUTED" if i % 3 else "SIGNED", sample_details(i))
+            documents.append(ContractService._to_document(contract))
+        db.contracts.insert_many(documents)
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def measure(db, mode):
+    samples = []
+    rng = random.Random(42)
+    for _ in range(ROUNDS):
+        params = {"keyword": rng.choice(QUERIES)}
+        if mode == "regex":
+            params["mode"] = "regex"
+        start = time.perf_counter()
+        ContractService.search_executed_contracts(db, params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), percentile(samples, 99)
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000]
+    for size in sizes:
+        db, _ = make_db()
+        seed(db, size)
+        for mode in ("regex", "terms"):
+            p50, p99 = measure(db, mode)
+            print(f"{size:>9} contracts  {mode:>5}: p50 {p50:8.1f} ms  p99 {p99:8.1f} ms")
@@ -0,0 +1,91 @@
+# benchmarks/bench_serialization.py
+# Objects/sec and bytes per contract for Contract.from_dict / to_dict and JSON encoding,
+# comparing the previous plain-class model with the slotted one.
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.contract import Contract
+from app.utils.serialization import json_default, orjson
+from benchmarks.common import sample_details
+
+N = 100000
+
+class LegacyContract:
+    # The model as it was before __slots__
+    def __init__(self, contract_number, status, details):
+        self.contract_number = contract_number
+        self.status = status
+        self.details = details
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+
+    def to_dict(self):
+        return {
+            "contract_number": self.contract_number,
+            "status": self.status,
+            "details": self.details,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat()
+        }
+
+    @staticmethod
+    def from_dict(data):
+        contract = LegacyContract(data.get('contract_number'), data.get('status'), data.get('details', {}))
+        created_at_data = data.get('created_at')
+        if isinstance(created_at_data, str):
+            contract.created_at = datetime.fromisoformat(created_at_data)
+        elif isinstance(created_at_data, datetime):
+            contract.created_at = created_at_data
+        else:
+            contract.created_at = None
+        updated_at_data = data.get('updated_at')
+        if isinstance(updated_at_data, str):
+            contract.updated_at = datetime.fromisoformat(updated_at_data)
+        elif isinstance(updated_at_data, datetime):
+            contract.updated_at = updated_at_data
+        else:
+            contract.updated_at = None
+        return contract
+
+def raw_documents():
+    # What find() hands back: BSON-decoded dicts with an _id and real datetimes
+    now = datetime.utcnow()
+    return [{"_id": ObjectId(), "contract_number": f"C-{i}", "status": "EXECUTED", "details": sample_details(i),
+             "created_at": now.isoformat(), "updated_at": now, "version": 3} for i in range(N)]
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, N / (time.perf_counter() - start)
+
+def retained_bytes(build):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, (after - before) / N
+
+def run(label, model, documents):
+    objects, from_rate = timed(lambda: [model.from_dict(d) for d in documents])
+    _, per_object = retained_bytes(lambda: [model.from_dict(d) for d in documents])
+    dicts, to_rate = timed(lambda: [o.to_dict() for o in objects])
+    _, json_rate = timed(lambda: json.dumps(dicts, default=json_default))
+    line = (f"{label:>7}: from_dict {from_rate:>10,.0f}/s  to_dict {to_rate:>10,.0f}/s  "
+            f"json {json_rate:>10,.0f}/s  {per_object:,.0f} B/contract (incl. parsed datetimes)")
+    if orjson is not None:
+        _, orjson_rate = timed(lambda: orjson.dumps(dicts, default=json_default))
+        line += f"  orjson {orjson_rate:>10,.0f}/s"
+    print(line)
+
+if __name__ == '__main__':
+    documents = raw_documents()
+    run("legacy", LegacyContract, documents)
+    run("slotted", Contract, documents)
+    print(f"instance size: legacy {sys.getsizeof(LegacyContract('x', 'NEW', {})) + sys.getsizeof(LegacyContract('x', 'NEW', {}).__dict__)} B, "
+          f"slotted {sys.getsizeof(Contract('x', 'NEW', {}))} B")
@@ -0,0 +1,49 @@
+# benchmarks/bench_stats.py
+# Latency and documents read for dashboard counts: the contract_stats rollup vs scanning contracts.
+#   python -m benchmarks.bench_stats 2000 10000
+# The reconcile pipeline needs a real mongod: BENCH_MONGO_URI=mongodb://127.0.0.1:27017 python -m benchmarks.bench_stats 1000000
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+from app.services.stats import StatsService, bucket_keys
+from benchmarks.common import make_db, seed_contracts
+
+STATUSES = ("NEW", "NEGOTIATION", "APPROVED", "SIGNED", "EXECUTED", "RENEWED")
+
+def scan(db):
+    # What a dashboard had to do before: read every contract
+    counts = Counter()
+    documents = 0
+    for c in db.contracts.find({}, {"status": 1, "details": 1}):
+        documents += 1
+        for dimension, key in bucket_keys(c.get("details")):
+            counts[(dimension, key, c["status"])] += 1
+    return counts, documents
+
+def run(size):
+    db, _ = make_db()
+    seed_contracts(db, size, STATUSES)
+
+    start = time.perf_counter()
+    _, scanned = scan(db)
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    StatsService.get_stats(db)
+    rollup_ms = (time.perf_counter() - start) * 1000
+    buckets = db.contract_stats.count_documents({})
+    print(f"{size:>9,} contracts: scan {scan_ms:>9.1f} ms ({scanned:,} docs), "
+          f"rollup {rollup_ms:>7.1f} ms ({buckets:,} buckets)")
+
+    if os.environ.get('BENCH_MONGO_URI'):
+        start = time.perf_counter()
+        result = StatsService.reconcile(db)
+        print(f"{'':>9}  reconcile {(time.perf_counter() - start) * 1000:.1f} ms, {result}")
+
+if __name__ == '__main__':
+    logging.disable(logging.INFO)
+    for size in [int(arg) for arg in sys.argv[1:]] or [2000, 10000]:
+        run(size)
@@ -0,0 +1,66 @@
+# benchmarks/bench_transitions.py
+# Counts Mongo round trips per lifecycle transition, comparing the old
+# read-check-write flow with the single find_one_and_update transition, with the
+# stats rollup written in each transition ('inline') or folded and flushed in
+# batches by change_recorder ('deferred', as configured by default). The outbox
+# event is written in each transition either way.
+import io
+import time
+from datetime import datetime
+
+from app.services.changes import change_recorder
+from app.services.contract_service import ContractService
+from app.services.events import event_feed
+from benchmarks.common import CountingDatabase, make_db, sample_details
+
+N = 500
+
+def legacy_transition(db, contract_number, new_status, allowed_previous_statuses):
+    # The pre-state-machine flow: find_one, check in Python, update_one
+    contract = ContractService.get_contract(db, contract_number)
+    if not contract:
+        raise ValueError("Contract not found.")
+    if contract.status not in allowed_previous_statuses:
+        raise ValueError(f"Cannot transition from '{contract.status}' to '{new_status}'.")
+    db.contracts.update_one(
+        {"contract_number": contract_number},
+        {"$set": {"status": new_status, "updated_at": datetime.utcnow()}}
+    )
+    return contract
+
+def legacy_lifecycle(db, fs, contract_number):
+    legacy_transition(db, contract_number, "NEGOTIATION", ["NEW"])
+    db.contracts.update_one({"contract_number": contract_number}, {"$set": {"details.negotiation": {}}})
+    legacy_transition(db, contract_number, "APPROVED", ["NEGOTIATION"])
+    legacy_transition(db, contract_number, "SIGNED", ["APPROVED"])
+    contract = legacy_transition(db, contract_number, "EXECUTED", ["SIGNED"])
+    file_id = fs.put(io.BytesIO(str(contract.details).encode('utf-8')), contract_number=contract_number)
+    db.contracts.update_one({"contract_number": contract_number}, {"$set": {"final_document_id": str(file_id)}})
+
+def current_lifecycle(db, fs, contract_number):
+    ContractService.negotiate_contract(db, contract_number, {})
+    ContractService.approve_reject_contract(db, contract_number, "APPROVED")
+    ContractService.sign_contract(db, contract_number)
+    ContractService.execute_contract(db, fs, contract_number)
+
+def run(label, lifecycle, flush_interval=0.0):
+    change_recorder.interval = flush_interval
+    event_feed.backend = "outbox"
+    raw_db, fs = make_db()
+    for i in range(N):
+        ContractService.create_contract(raw_db, {"contract_number": f"C-{i}", "details": sample_details(i)})
+    db = CountingDatabase(raw_db)
+    start = time.perf_counter()
+    for i in range(N):
+        lifecycle(db, fs, f"C-{i}")
+    # Whatever is still queued counts too
+    change_recorder.stop()
+    elapsed = time.perf_counter() - start
+    transitions = N * 4
+    print(f"{label:>8}: {db.total() / transitions:.2f} round trips/transition "
+          f"({db.ops}), {transitions / elapsed:,.0f} transitions/s")
+
+if __name__ == '__main__':
+    run("before", legacy_lifecycle)
+    run("inline", current_lifecycle)
+    run("deferred", current_lifecycle, flush_interval=0.2)
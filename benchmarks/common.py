@@ -0,0 +1,176 @@
+# benchmarks/common.py
+# Shared helpers for the benchmark scripts. Run them from the repo root, e.g.
+#   python -m benchmarks.bench_transitions
+import functools
+import os
+import resource
+
+import mongomock
+import mongomock.collection
+import mongomock.gridfs
+import gridfs
+
+mongomock.gridfs.enable_gridfs_integration()
+
+def _drop_sort(method):
+    # pymongo >= 4.11 passes sort= to bulk update/replace builders, which mongomock doesn't know yet
+    @functools.wraps(method)
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+_builder = mongomock.collection.BulkOperationBuilder
+_builder.add_update = _drop_sort(_builder.add_update)
+_builder.add_replace = _drop_sort(_builder.add_replace)
+
+def _copy_projection(method):
+    # mongomock pops _id out of the projection dict and puts it back for every document it projects;
+    # the services share module-level projections, so concurrent clients would see it change size
+    @functools.wraps(method)
+    def wrapper(self, doc, fields, container):
+        return method(self, doc, dict(fields) if isinstance(fields, dict) else fields, container)
+    return wrapper
+
+mongomock.collection.Collection._copy_only_fields = _copy_projection(mongomock.collection.Collection._copy_only_fields)
+
+# Collection methods that each cost one round trip against a real mongod
+MONGO_OPS = (
+    "find", "find_one", "find_one_and_update", "insert_one", "insert_many",
+    "update_one", "update_many", "bulk_write", "delete_one", "delete_many",
+    "aggregate", "count_documents",
+)
+
+class CountingCollection:
+    """Wraps a collection and counts calls to the methods that hit the server."""
+    def __init__(self, collection, counter):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in MONGO_OPS:
+            def counted(*args, **kwargs):
+                self._counter[name] = self._counter.get(name, 0) + 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+class CountingDatabase:
+    """Database stand-in whose collections count round trips into a shared dict."""
+    def __init__(self, db):
+        self._db = db
+        self.ops = {}
+
+    @property
+    def name(self):
+        return self._db.name
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._db, name), self.ops)
+
+    def __getitem__(self, name):
+        return CountingCollection(self._db[name], self.ops)
+
+    def reset(self):
+        self.ops.clear()
+
+    def total(self):
+        return sum(self.ops.values())
+
+def make_db(name="clmp_bench"):
+    """
+    Returns a fresh (db, gridfs) pair with the registered indexes.
+    Uses mongomock unless BENCH_MONGO_URI points at a real mongod, in which case the database is dropped first.
+    """
+    from app.models.indexes import GRIDFS_INDEXES, ensure_indexes
+    from app.services.cache import contract_cache
+    contract_cache.clear()
+    uri = os.environ.get('BENCH_MONGO_URI')
+    if uri:
+        import pymongo
+        client = pymongo.MongoClient(uri)
+        client.drop_database(name)
+    else:
+        client = mongomock.MongoClient()
+    db = client[name]
+    ensure_indexes(db)
+    ensure_indexes(db, GRIDFS_INDEXES)
+    return db, gridfs.GridFS(db)
+
+def sample_details(i):
+    return {
+        "contract_name": f"Service agreement {i}",
+        "contract_category": ("Supply", "Services", "Lease", "Licensing")[i % 4],
+        "contract_type": "Standard",
+        "party1": f"Acme Corp {i % 50}",
+        "party2": f"Globex Ltd {i % 75}",
+        "start_date": "2024-01-01",
+        "end_date": "2025-01-01",
+    }
+
+# Every status a stored contract can be in
+ALL_STATUSES = ("NEW", "NEGOTIATION", "APPROVED", "REJECTED", "SIGNED", "EXECUTED", "RENEWED", "EXPIRED")
+
+def seed_contracts(db, size, statuses=ALL_STATUSES, prefix="C", chunk=10000):
+    """
+    Inserts size contracts spread round-robin over statuses, straight into the collection, and
+    records them in the stats rollup. Returns {status: [contract numbers]}.
+    """
+    from app.models.contract import Contract, parse_contract_dates
+    from app.services.contract_service import ContractService
+    from app.services.stats import StatsService
+    numbers = {status: [] for status in statuses}
+    for start in range(0, size, chunk):
+        documents = []
+        for i in range(start, min(start + chunk, size)):
+            contract = Contract(f"{prefix}-{i}", statuses[i % len(statuses)], parse_contract_dates(sample_details(i)))
+            documents.append(ContractService._to_document(contract))
+            numbers[contract.status].append(contract.contract_number)
+        db.contracts.insert_many(documents)
+        StatsService.record(db, [(d, None, d["status"]) for d in documents])
+    return numbers
+
+def percentiles(latencies):
+    """p50 / p95 / p99 in milliseconds of a list of latencies in seconds."""
+    values = sorted(latencies)
+    def pct(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3) if values else 0.0
+    return {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+
+def peak_rss_mb():
+    # Peak resident memory of this process so far (ru_maxrss is in KiB on Linux)
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def make_app(**overrides):
+    """
+    Builds the Flask app and points it at an in-memory mongomock database.
+    Keyword arguments override Config settings. Job workers only start once the
+    database has been swapped, so they never poll the configured MONGO_URI.
+    """
+    from app import create_app
+    from app.services.jobs import job_worker
+    from config import Config
+
+    settings = dict({
+        # make_db() ensures the indexes on the mongomock database instead
+        "MONGO_ENSURE_INDEXES": False,
+        "MONGO_CHECK_QUERY_PLANS": False,
+        "DOCUMENT_GENERATION_MODE": "inline",
+        "STATS_RECONCILE_INTERVAL": 0,
+        "EXPIRY_INTERVAL": 0,
+        "SEARCH_TERMS_BACKFILL": False,
+        # mongomock has no change streams; the outbox is a plain collection there
+        "CONTRACT_EVENTS_BACKEND": "outbox",
+    }, **overrides)
+    BenchmarkConfig = type("BenchmarkConfig", (Config,), dict(settings, JOB_WORKER_THREADS=0))
+
+    app = create_app(BenchmarkConfig)
+    db, fs = make_db()
+    app.db = db
+    app.gridfs = fs
+    if settings["DOCUMENT_GENERATION_MODE"] == "async" or "JOB_WORKER_THREADS" in overrides:
+        job_worker.stop()
+        job_worker.threads = settings.get("JOB_WORKER_THREADS", Config.JOB_WORKER_THREADS)
+        job_worker.poll_interval = settings.get("JOB_POLL_INTERVAL", 0.05)
+        job_worker.start()
+    return app
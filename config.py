@@ -2,11 +2,106 @@ import os
 
 class Config:
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/clmp_db')
-    GRIDFS_URI = os.environ.get('GRIDFS_URI', 'mongodb://127.0.0.1:27017/clmp_gridfs')
+    # GridFS gets its own client, so document transfers queue on their own pool and never take the
+    # connections contract lookups need. Defaults to the contracts database, where fs.* lives today;
+    # point it at another database or cluster only after moving the fs.* collections there.
+    GRIDFS_URI = os.environ.get('GRIDFS_URI', MONGO_URI)
+    # Pool sizing, per worker process. A checkout that waits longer than WAIT_QUEUE_TIMEOUT_MS fails
+    # instead of hanging the request; pool waits show up as mongo_pool_checkout_duration_seconds.
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    GRIDFS_MAX_POOL_SIZE = int(os.environ.get('GRIDFS_MAX_POOL_SIZE', 10))
+    GRIDFS_MIN_POOL_SIZE = int(os.environ.get('GRIDFS_MIN_POOL_SIZE', 0))
+    GRIDFS_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('GRIDFS_WAIT_QUEUE_TIMEOUT_MS', 10000))
+    GRIDFS_SOCKET_TIMEOUT_MS = int(os.environ.get('GRIDFS_SOCKET_TIMEOUT_MS', 60000))
+    GRIDFS_READ_PREFERENCE = os.environ.get('GRIDFS_READ_PREFERENCE', 'primary')
+    # Shared by both clients
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    # Upper bound on items accepted by the batch endpoints in one request
+    BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 5000))
+    # Create the indexes from app.models.indexes at startup (turn off in tests)
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'true').lower() == 'true'
+    # Run explain() on every service query at startup and warn on COLLSCAN
+    MONGO_CHECK_QUERY_PLANS = False
+    # Queue the one-off job that adds search_terms to contracts stored before keyword indexing
+    SEARCH_TERMS_BACKFILL = os.environ.get('SEARCH_TERMS_BACKFILL', 'true').lower() == 'true'
+    # Page size for /api/contracts/search when 'limit' is omitted, and the most a client may ask for
+    SEARCH_DEFAULT_LIMIT = 100
+    SEARCH_MAX_LIMIT = 1000
+    # Page size for /api/contracts/<id>/negotiations, and the most a client may ask for
+    NEGOTIATIONS_DEFAULT_LIMIT = 20
+    NEGOTIATIONS_MAX_LIMIT = 100
+    # Cache in front of get_contract: 'none', 'redis' (shared by every worker) or 'memory' (per-worker LRU).
+    # A per-worker cache can serve another worker's stale write for up to CONTRACT_CACHE_TTL seconds, so
+    # only use 'memory' with a single worker process; If-None-Match checks never read from it.
+    CONTRACT_CACHE_BACKEND = os.environ.get('CONTRACT_CACHE_BACKEND', 'none')
+    CONTRACT_CACHE_TTL = int(os.environ.get('CONTRACT_CACHE_TTL', 30))
+    CONTRACT_CACHE_MAX_SIZE = int(os.environ.get('CONTRACT_CACHE_MAX_SIZE', 10000))
+    # Seconds an invalidated contract stays uncached, so a read that started before the write can't cache
+    # the old document; longer than any get_contract read takes
+    CONTRACT_CACHE_INVALIDATION_HOLD = int(os.environ.get('CONTRACT_CACHE_INVALIDATION_HOLD', 5))
+    # redis://... for a real server, local:// for the in-process stand-in used in tests
+    CONTRACT_CACHE_REDIS_URL = os.environ.get('CONTRACT_CACHE_REDIS_URL', 'redis://127.0.0.1:6379/0')
+    # 'async' commits EXECUTED and builds the final document on the job workers; 'inline' builds it in the request
+    DOCUMENT_GENERATION_MODE = os.environ.get('DOCUMENT_GENERATION_MODE', 'async')
+    # Background job workers per process (document generation, migrations), and how they poll / retry
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 2))
+    JOB_POLL_INTERVAL = 1.0
+    JOB_LEASE_SECONDS = 60
+    JOB_RETRY_BACKOFF = 2
+    # Legacy exports for POST /api/contracts/migrate must live under this directory
+    MIGRATION_SOURCE_DIR = os.environ.get('MIGRATION_SOURCE_DIR', '/data/migrations')
+    MIGRATION_CHUNK_SIZE = 1000
+    MIGRATION_UPLOAD_THREADS = 8
+    # One summary log event per request: this fraction is sampled, errors and slow requests always logged
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 0.01))
+    REQUEST_LOG_SLOW_MS = int(os.environ.get('REQUEST_LOG_SLOW_MS', 1000))
+    # Prometheus-style counters and histograms at /metrics
+    METRICS_ENABLED = True
+    # 'orjson' encodes API responses with orjson when it is installed (requirements-optional.txt); without it
+    # the stdlib json is used and create_app logs a warning
+    JSON_RESPONSE_BACKEND = os.environ.get('JSON_RESPONSE_BACKEND', 'orjson')
+    # GET /api/contracts/stats: the contract_stats rollup is rebuilt by a job every STATS_RECONCILE_INTERVAL
+    # seconds (0 disables it), and 'expiring soon' means ending within STATS_EXPIRING_DAYS
+    STATS_RECONCILE_INTERVAL = int(os.environ.get('STATS_RECONCILE_INTERVAL', 3600))
+    STATS_EXPIRING_DAYS = 30
+    STATS_EXPIRING_LIMIT = 50
+    # Stats rollup counts moved by transitions are folded and written every CONTRACT_CHANGES_FLUSH_INTERVAL
+    # seconds in one batch (0 writes them in each request); outbox events are always written in the request.
+    # A request that finds CONTRACT_CHANGES_MAX_PENDING buckets queued writes them itself
+    CONTRACT_CHANGES_FLUSH_INTERVAL = float(os.environ.get('CONTRACT_CHANGES_FLUSH_INTERVAL', 0.2))
+    CONTRACT_CHANGES_MAX_PENDING = 5000
+    # ASGI mode (uvicorn asgi:app): batch requests are split into chunks of this size that run concurrently
+    ASGI_BATCH_CHUNK_SIZE = int(os.environ.get('ASGI_BATCH_CHUNK_SIZE', 500))
+    # Expiry processor, every EXPIRY_INTERVAL seconds (0 disables it): active contracts past their end date
+    # become EXPIRED, or RENEWED when details.auto_renew is set, by details.renewal_term_months or
+    # EXPIRY_RENEWAL_TERM_MONTHS. EXPIRY_DRY_RUN only reports what it would do.
+    EXPIRY_INTERVAL = int(os.environ.get('EXPIRY_INTERVAL', 3600))
+    EXPIRY_DRY_RUN = os.environ.get('EXPIRY_DRY_RUN', 'false').lower() == 'true'
+    EXPIRY_BATCH_SIZE = 500
+    EXPIRY_MAX_BATCHES = 200
+    EXPIRY_RENEWAL_TERM_MONTHS = 12
+    # Lease on the lock document, renewed after every batch
+    EXPIRY_LEASE_SECONDS = 120
+    # GET /api/contracts/events: 'change_stream' (replica set or mongos), 'outbox' (capped contract_events
+    # collection written by ContractService), 'auto' (change stream when the server supports it) or 'none'
+    CONTRACT_EVENTS_BACKEND = os.environ.get('CONTRACT_EVENTS_BACKEND', 'auto')
+    CONTRACT_EVENTS_OUTBOX_BYTES = int(os.environ.get('CONTRACT_EVENTS_OUTBOX_BYTES', 64 * 1024 * 1024))
+    # Recent events each worker keeps for reconnecting clients, and how far one subscriber may fall behind
+    CONTRACT_EVENTS_BUFFER = 1000
+    CONTRACT_EVENTS_QUEUE_SIZE = 1000
+    # Comment line sent on an idle event stream, and how long a long-poll request waits at most
+    CONTRACT_EVENTS_HEARTBEAT = 15
+    CONTRACT_EVENTS_POLL_TIMEOUT = 25
     # Add other configurations like secret keys, etc.
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    MONGO_CHECK_QUERY_PLANS = os.environ.get('MONGO_CHECK_QUERY_PLANS', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     DEBUG = False
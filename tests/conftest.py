@@ -0,0 +1,139 @@
+# tests/conftest.py
+# Shared fixtures. The tests run on mongomock, from the repo root:
+#   pip install -r requirements.txt -r tests/requirements.txt
+#   python -m pytest tests/
+import functools
+
+import gridfs as gridfs_module
+import mongomock
+import mongomock.collection
+import mongomock.gridfs
+import pytest
+
+from app import create_app
+from app.models.indexes import GRIDFS_INDEXES, ensure_indexes
+from app.services.cache import contract_cache
+from app.services.changes import change_recorder
+from app.services.events import event_feed
+from config import Config
+
+mongomock.gridfs.enable_gridfs_integration()
+
+class TestConfig(Config):
+    TESTING = True
+    # The db fixture ensures the indexes on the mongomock database instead
+    MONGO_ENSURE_INDEXES = False
+    MONGO_CHECK_QUERY_PLANS = False
+    DOCUMENT_GENERATION_MODE = "inline"
+    JOB_WORKER_THREADS = 0
+    STATS_RECONCILE_INTERVAL = 0
+    EXPIRY_INTERVAL = 0
+    SEARCH_TERMS_BACKFILL = False
+    # mongomock has no change streams; the outbox is a plain collection there
+    CONTRACT_EVENTS_BACKEND = "outbox"
+    # Stats are written in the request, so tests can read them back straight away
+    CONTRACT_CHANGES_FLUSH_INTERVAL = 0
+    CONTRACT_CACHE_BACKEND = "none"
+
+def _drop_sort(method):
+    # pymongo >= 4.11 passes sort= to bulk update/replace builders, which mongomock doesn't know yet
+    @functools.wraps(method)
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+@pytest.fixture(autouse=True)
+def mongomock_bulk_sort(monkeypatch):
+    builder = mongomock.collection.BulkOperationBuilder
+    monkeypatch.setattr(builder, "add_update", _drop_sort(builder.add_update))
+    monkeypatch.setattr(builder, "add_replace", _drop_sort(builder.add_replace))
+
+@pytest.fixture
+def mongo():
+    """A fresh (db, gridfs) pair on its own mongomock client, with the indexes ensured."""
+    contract_cache.clear()
+    db = mongomock.MongoClient()["clmp_test"]
+    ensure_indexes(db)
+    ensure_indexes(db, GRIDFS_INDEXES)
+    return db, gridfs_module.GridFS(db)
+
+@pytest.fixture
+def db(mongo):
+    return mongo[0]
+
+@pytest.fixture
+def gridfs(mongo):
+    return mongo[1]
+
+@pytest.fixture
+def make_app(mongo):
+    """Builds the app on the mongomock database; keyword arguments override TestConfig settings."""
+    def make(**settings):
+        app = create_app(type("Config", (TestConfig,), settings))
+        app.db, app.gridfs = mongo
+        return app
+    yield make
+    change_recorder.stop()
+    event_feed.stop(2)
+    contract_cache.backend = None
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def details():
+    """details(i): contract details, varied by i."""
+    def make(i=0, **fields):
+        return dict({
+            "contract_name": f"Service agreement {i}",
+            "contract_category": ("Supply", "Services", "Lease", "Licensing")[i % 4],
+            "contract_type": "Standard",
+            "party1": f"Acme Corp {i % 50}",
+            "party2": f"Globex Ltd {i % 75}",
+            "start_date": "2024-01-01",
+            "end_date": "2025-01-01",
+        }, **fields)
+    return make
+
+class CountingDatabase:
+    """Database stand-in whose collections count the calls that cost a round trip, in ops."""
+    OPS = ("find", "find_one", "find_one_and_update", "insert_one", "insert_many", "update_one",
+           "update_many", "bulk_write", "delete_one", "delete_many", "aggregate", "count_documents")
+
+    def __init__(self, db):
+        self._db = db
+        self.ops = {}
+
+    @property
+    def name(self):
+        return self._db.name
+
+    def __getattr__(self, name):
+        collection = getattr(self._db, name)
+        ops = self.ops
+
+        class CountingCollection:
+            def __getattr__(self, attr):
+                method = getattr(collection, attr)
+                if attr not in CountingDatabase.OPS:
+                    return method
+                def counted(*args, **kwargs):
+                    ops[attr] = ops.get(attr, 0) + 1
+                    return method(*args, **kwargs)
+                return counted
+        return CountingCollection()
+
+    __getitem__ = __getattr__
+
+    def total(self):
+        return sum(self.ops.values())
+
+@pytest.fixture
+def counting(db):
+    """The db fixture, counting round trips: counting.ops, counting.total()."""
+    return CountingDatabase(db)
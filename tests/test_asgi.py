@@ -0,0 +1,74 @@
+# tests/test_asgi.py
+import asyncio
+import json
+
+import pytest
+
+from app.asgi import ContractsASGI
+
+@pytest.fixture
+def asgi(app, monkeypatch):
+    """The ASGI app over the test app; native routes record their endpoint instead of calling async PyMongo."""
+    asgi = ContractsASGI(app)
+    asgi.native_calls = []
+
+    async def dispatch(rule, view_args, scope, receive, send):
+        asgi.native_calls.append((rule.endpoint, view_args))
+        await send({'type': 'http.response.start', 'status': 299, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    monkeypatch.setattr(asgi, "_dispatch", dispatch)
+    return asgi
+
+def call(asgi, method, path, body=None):
+    """(status, body) of one request through the ASGI app."""
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+             'query_string': query.encode(), 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+             'headers': [(b'host', b'testserver'), (b'content-type', b'application/json')]}
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi(scope, receive, send))
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    return status, b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+
+def test_stats_reaches_flask(asgi):
+    status, body = call(asgi, 'GET', '/api/contracts/stats')
+    assert status == 200
+    assert "by_status" in json.loads(body)
+    assert asgi.native_calls == []
+
+def test_events_reaches_flask(asgi):
+    status, body = call(asgi, 'GET', '/api/contracts/events?timeout=1')
+    assert status == 200
+    assert json.loads(body)["events"] == []
+    assert asgi.native_calls == []
+
+def test_expiry_reaches_flask(asgi):
+    status, body = call(asgi, 'POST', '/api/contracts/expiry', {"dry_run": True})
+    assert status == 200
+    assert json.loads(body)["dry_run"] is True
+    assert asgi.native_calls == []
+
+def test_contract_routes_are_served_natively(asgi):
+    assert call(asgi, 'GET', '/api/contracts/C-1')[0] == 299
+    assert call(asgi, 'PUT', '/api/contracts/C-1/sign')[0] == 299
+    assert call(asgi, 'GET', '/api/contracts/search?keyword=acme')[0] == 299
+    assert asgi.native_calls == [("contracts_contract", {"contract_number": "C-1"}),
+                                 ("contracts_sign_contract", {"contract_number": "C-1"}),
+                                 ("contracts_search_executed_contracts", {})]
+
+def test_other_methods_on_native_routes_reach_flask(asgi):
+    status, _ = call(asgi, 'HEAD', '/api/contracts/NOPE')
+    assert status == 404
+    assert asgi.native_calls == []
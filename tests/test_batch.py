@@ -0,0 +1,95 @@
+# tests/test_batch.py
+import pytest
+
+from app.services.contract_service import ContractService
+
+DETAILS = {"contract_name": "Batch", "contract_category": "Supply", "party1": "Acme", "party2": "Globex",
+           "start_date": "2024-01-01", "end_date": "2025-01-01"}
+
+def create(db, *numbers):
+    for number in numbers:
+        ContractService.create_contract(db, {"contract_number": number, "details": DETAILS})
+
+def set_status(db, number, status):
+    db.contracts.update_one({"contract_number": number}, {"$set": {"status": status}})
+
+def stats(db, status):
+    bucket = db.contract_stats.find_one({"_id": {"dimension": "total", "key": "all", "status": status}})
+    return bucket["count"] if bucket else 0
+
+def test_batch_create_reports_each_item(db, details):
+    create(db, "B-0")
+    results = ContractService.create_contracts_batch(db, [
+        {"contract_number": "B-1", "details": details(1)},
+        {"contract_number": "B-0", "details": details(0)},
+        {"contract_number": "B-1", "details": details(1)},
+        {"details": details(2)},
+        {"contract_number": "B-2", "details": details(2)},
+    ])
+    assert [r["success"] for r in results] == [True, False, False, False, True]
+    assert "already exists" in results[1]["message"]
+    assert "duplicated in the batch" in results[2]["message"]
+    assert results[0]["contract"]["status"] == "NEW"
+    assert db.contracts.count_documents({}) == 3
+    assert stats(db, "NEW") == 3
+
+def test_batch_transition_reports_each_item(db):
+    create(db, "B-1", "B-2", "B-3")
+    set_status(db, "B-1", "NEGOTIATION")
+    set_status(db, "B-2", "NEGOTIATION")
+    results = ContractService.transition_contracts_batch(db, "approve", ["B-1", {"contract_number": "B-2"}, "B-3", "NOPE", "B-1", {}])
+    assert results[0] == {"contract_number": "B-1", "success": True, "status": "APPROVED"}
+    assert results[1]["success"] is True
+    assert results[2]["message"] == "Cannot transition from 'NEW' to 'APPROVED'."
+    assert results[3]["message"] == "Contract not found."
+    assert "duplicated in the batch" in results[4]["message"]
+    assert results[5]["message"] == "Missing contract_number"
+    approved = db.contracts.find_one({"contract_number": "B-1"})
+    assert approved["status"] == "APPROVED"
+    assert approved["version"] == 2
+
+def test_batch_transition_rejects_unknown_actions(db):
+    with pytest.raises(ValueError):
+        ContractService.transition_contracts_batch(db, "execute", ["B-1"])
+
+def test_batch_negotiate_accepts_further_rounds(db):
+    create(db, "B-1")
+    first = ContractService.transition_contracts_batch(db, "negotiate", [{"contract_number": "B-1", "negotiation": {"round": 1}}])
+    second = ContractService.transition_contracts_batch(db, "negotiate", [{"contract_number": "B-1", "negotiation": {"round": 2}}])
+    assert first[0]["success"] and second[0]["success"]
+    contract = db.contracts.find_one({"contract_number": "B-1"})
+    assert contract["status"] == "NEGOTIATION"
+    assert contract["version"] == 3
+    assert contract["details"]["negotiation"] == {"round": 2}
+
+    rounds, _ = ContractService.get_negotiations(db, "B-1", limit=10)
+    assert [(r["version"], r["negotiation"]) for r in rounds] == [(3, {"round": 2}), (2, {"round": 1})]
+    # Only the first round is a transition
+    assert (stats(db, "NEW"), stats(db, "NEGOTIATION")) == (0, 1)
+
+def test_batch_transition_loses_to_a_concurrent_write(db, monkeypatch):
+    create(db, "B-1", "B-2")
+    set_status(db, "B-1", "NEGOTIATION")
+    set_status(db, "B-2", "NEGOTIATION")
+    plan = ContractService._batch_transition_operations
+
+    def racing_plan(*args):
+        planned = plan(*args)
+        # Someone else rejects B-2 between the batch's read and its write
+        ContractService.approve_reject_contract(db, "B-2", "REJECTED")
+        return planned
+
+    monkeypatch.setattr(ContractService, "_batch_transition_operations", staticmethod(racing_plan))
+    results = ContractService.transition_contracts_batch(db, "approve", ["B-1", "B-2"])
+    assert results[0]["success"] is True
+    assert results[1] == {"contract_number": "B-2", "success": False, "message": "Contract changed state concurrently."}
+    assert db.contracts.find_one({"contract_number": "B-2"})["status"] == "REJECTED"
+    assert (stats(db, "APPROVED"), stats(db, "REJECTED")) == (1, 1)
+
+def test_batch_endpoint(client, details):
+    client.post('/api/contracts/batch', json=[{"contract_number": f"B-{i}", "details": details(i)} for i in range(3)])
+    response = client.put('/api/contracts/batch/negotiate', json=["B-0", "B-1", "NOPE"])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert client.put('/api/contracts/batch/explode', json=["B-0"]).status_code == 400
@@ -0,0 +1,50 @@
+# tests/test_bench_load.py
+# Runs the load test as the CI job would, in a subprocess: the benchmark harness patches mongomock
+# for its own process, which must not leak into this test session.
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARGS = ["--mix", "read_heavy", "--contracts", "30", "--concurrency", "2", "--duration", "0.5", "--warmup", "0"]
+
+def bench_load(*args):
+    return subprocess.run([sys.executable, "-m", "benchmarks.bench_load", *ARGS, *args],
+                          cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "load.json"
+    result = bench_load("--output", str(path))
+    assert result.returncode == 0, result.stderr
+    return path
+
+def test_report(report):
+    data = json.loads(report.read_text())
+    assert data["meta"]["backend"] == "mongomock"
+    mix = data["mixes"]["read_heavy"]
+    assert mix["errors"] == 0 and mix["log_warnings"] == 0
+    assert set(mix["latency_ms"]) == {"p50", "p95", "p99"}
+    assert set(mix["scenarios"]) == {"get", "search", "create"}
+    # Calibrated serially, so exact: a get and a search are one read each
+    assert mix["scenarios"]["get"]["mongo_ops_per_request"] == 1.0
+    assert mix["scenarios"]["search"]["mongo_ops_per_request"] == 1.0
+    assert data["peak_rss_mb"] > 0
+
+def test_same_code_passes_against_its_baseline(report):
+    # Timings of half-second runs are noise; the round-trip counts are compared exactly
+    result = bench_load("--baseline", str(report), "--tolerance", "10", "--output", os.devnull)
+    assert result.returncode == 0, result.stderr
+    assert "REGRESSION" not in result.stderr
+
+def test_more_round_trips_fail_the_comparison(report, tmp_path):
+    baseline = json.loads(report.read_text())
+    baseline["mixes"]["read_heavy"]["scenarios"]["get"]["mongo_ops_per_request"] = 0.5
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+    result = bench_load("--baseline", str(path), "--tolerance", "10", "--output", os.devnull)
+    assert result.returncode == 1
+    assert "REGRESSION  read_heavy/get mongo ops/request" in result.stderr
@@ -0,0 +1,95 @@
+# tests/test_cache.py
+import pytest
+
+from app.services.cache import ContractCache, LRUCache, LocalSharedClient, SharedCache, contract_cache
+from app.services.contract_service import ContractService
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request, monkeypatch):
+    """The shared contract_cache on each backend."""
+    backend = LRUCache(ttl=60) if request.param == "memory" else SharedCache(LocalSharedClient(), ttl=60)
+    monkeypatch.setattr(contract_cache, "backend", backend)
+    monkeypatch.setattr(contract_cache, "invalidation_hold", 5)
+    return contract_cache
+
+def document(version, status="NEW"):
+    return {"contract_number": "C-1", "status": status, "version": version}
+
+def test_set_and_get(db, cache):
+    cache.set(db, document(1))
+    assert cache.get(db, "C-1") == document(1)
+
+def test_older_version_does_not_replace_a_newer_one(db, cache):
+    cache.set(db, document(2, "NEGOTIATION"))
+    cache.set(db, document(1))
+    assert cache.get(db, "C-1")["version"] == 2
+    cache.set(db, document(3, "APPROVED"))
+    assert cache.get(db, "C-1")["version"] == 3
+
+def test_invalidated_entry_is_not_refilled_during_the_hold(db, cache):
+    cache.set(db, document(1))
+    cache.invalidate(db, "C-1")
+    assert cache.get(db, "C-1") is None
+    cache.set(db, document(1))
+    assert cache.get(db, "C-1") is None
+
+def test_invalidated_entry_is_refilled_after_the_hold(db, cache):
+    cache.invalidation_hold = 0
+    cache.invalidate(db, "C-1")
+    cache.set(db, document(2))
+    assert cache.get(db, "C-1")["version"] == 2
+
+def test_invalidate_misses_count_as_misses(db, cache):
+    cache.invalidate(db, "C-1", "C-2")
+    cache.hits = cache.misses = 0
+    assert cache.get(db, "C-2") is None
+    assert cache.misses == 1
+
+class RacingDatabase:
+    """Database whose contracts.find_one runs write() after reading, as if a writer got in between."""
+    def __init__(self, db, write):
+        self._db = db
+        self._write = write
+
+    @property
+    def name(self):
+        return self._db.name
+
+    @property
+    def contracts(self):
+        racing = self
+
+        class Contracts:
+            def find_one(self, *args, **kwargs):
+                result = racing._db.contracts.find_one(*args, **kwargs)
+                racing._write()
+                return result
+
+            def __getattr__(self, name):
+                return getattr(racing._db.contracts, name)
+        return Contracts()
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+@pytest.mark.parametrize("writer", ["transition", "bulk"])
+def test_read_racing_a_write_does_not_cache_the_old_document(db, cache, details, writer):
+    ContractService.create_contract(db, {"contract_number": "C-1", "details": details(1)})
+    cache.clear()
+
+    def write():
+        db.contracts.update_one({"contract_number": "C-1"}, {"$set": {"status": "NEGOTIATION"}, "$inc": {"version": 1}})
+        if writer == "transition":
+            cache.set(db, db.contracts.find_one({"contract_number": "C-1"}))
+        else:
+            cache.invalidate(db, "C-1")
+
+    # The read misses, finds version 1, then the write lands before it fills the cache
+    assert ContractService.get_contract(RacingDatabase(db, write), "C-1").status == "NEW"
+    assert ContractService.get_contract(db, "C-1").status == "NEGOTIATION"
+    assert ContractService.get_contract_version(db, "C-1") == 2
+
+def test_init_app_caps_the_hold_at_the_ttl(make_app):
+    cache = ContractCache()
+    cache.init_app(make_app(CONTRACT_CACHE_BACKEND="memory", CONTRACT_CACHE_TTL=2))
+    assert cache.invalidation_hold == 2
@@ -0,0 +1,123 @@
+# tests/test_changes.py
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, CollectionInvalid
+
+from app.services.changes import ChangeRecorder
+from app.services.events import event_feed
+
+@pytest.fixture
+def outbox(monkeypatch):
+    monkeypatch.setattr(event_feed, "backend", "outbox")
+    monkeypatch.setattr(event_feed, "_outbox_pending", False)
+
+@pytest.fixture
+def recorder():
+    recorder = ChangeRecorder()
+    yield recorder
+    recorder.stop()
+
+DETAILS = {"contract_category": "Supply", "party1": "Acme", "party2": "Globex"}
+
+def changes(*statuses):
+    return [({"contract_number": f"C-{i}", "version": 2, "details": DETAILS}, old, new)
+            for i, (old, new) in enumerate(statuses)]
+
+def total(db, status):
+    bucket = db.contract_stats.find_one({"_id": {"dimension": "total", "key": "all", "status": status}})
+    return bucket["count"] if bucket else 0
+
+def test_inline_without_an_interval(db, recorder, outbox):
+    recorder.record(db, changes((None, "NEW")))
+    assert total(db, "NEW") == 1
+    assert db.contract_events.count_documents({}) == 1
+
+def test_deferred_stats_are_folded_into_one_write(db, counting, recorder, outbox):
+    recorder.interval = 60
+    recorder.record(counting, changes((None, "NEW"), (None, "NEW")))
+    recorder.record(counting, changes(("NEW", "NEGOTIATION")))
+    recorder.record(counting, changes(("NEGOTIATION", "APPROVED")))
+    # Events are written by each request, stats wait for the flush
+    assert counting.ops == {"insert_many": 3}
+    assert [e["status"] for e in db.contract_events.find().sort("_id", 1)] == ["NEW", "NEW", "NEGOTIATION", "APPROVED"]
+    assert total(db, "NEW") == 0
+
+    recorder.flush()
+    assert counting.ops == {"insert_many": 3, "bulk_write": 1}
+    assert (total(db, "NEW"), total(db, "NEGOTIATION"), total(db, "APPROVED")) == (1, 0, 1)
+    recorder.flush()
+    assert counting.total() == 4
+
+def test_background_thread_flushes(db, recorder, outbox):
+    recorder.interval = 0.01
+    recorder.record(db, changes((None, "NEW")))
+    for _ in range(100):
+        if total(db, "NEW"):
+            break
+        recorder._stop.wait(0.01)
+    assert total(db, "NEW") == 1
+
+def test_full_queue_is_written_by_the_request(db, recorder, outbox):
+    recorder.interval = 60
+    # Each change moves four buckets: total, category and both parties
+    recorder.max_pending = 5
+    recorder.record(db, changes((None, "NEW")))
+    assert total(db, "NEW") == 0
+    recorder.record(db, changes((None, "SIGNED")))
+    assert (total(db, "NEW"), total(db, "SIGNED")) == (1, 1)
+    assert recorder._pending == {}
+
+def test_stop_writes_what_is_queued(db, recorder, outbox):
+    recorder.interval = 60
+    recorder.record(db, changes((None, "NEW")))
+    recorder.stop()
+    assert total(db, "NEW") == 1
+
+def test_separate_stats_and_event_changes(db, recorder, outbox):
+    contract = {"contract_number": "C-1", "version": 3, "details": DETAILS}
+    recorder.record(db, [(contract, "EXECUTED", None)], [(contract, "EXECUTED", "RENEWED")])
+    assert total(db, "EXECUTED") == -1
+    assert db.contract_events.find_one()["status"] == "RENEWED"
+
+class UnreachableDatabase:
+    """Stands in for a database whose server is down until up is set."""
+    def __init__(self, db):
+        self.db = db
+        self.up = False
+
+    def create_collection(self, name, **kwargs):
+        if not self.up:
+            raise AutoReconnect("connection refused")
+        raise CollectionInvalid(f"collection {name} already exists")
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+def test_outbox_is_created_on_a_later_publish(db, outbox):
+    unreachable = UnreachableDatabase(db)
+    assert event_feed.ensure_outbox(unreachable) is False
+    assert event_feed.outbox_pending
+    event_feed.publish(unreachable, changes((None, "NEW")))
+    assert db.contract_events.count_documents({}) == 0
+
+    unreachable.up = True
+    event_feed.publish(unreachable, changes((None, "NEW")))
+    assert not event_feed.outbox_pending
+    assert db.contract_events.count_documents({}) == 1
+
+def test_current_token_of_an_empty_outbox_resumes_from_its_start(db, outbox):
+    token = event_feed.current_token(db)
+    assert event_feed.is_valid_token(token)
+    assert db.contract_events.find_one({"_id": ObjectId(token)}) is None
+
+def test_current_token_is_the_newest_outbox_event(db, outbox):
+    event_feed.publish(db, changes((None, "NEW"), (None, "NEW")))
+    newest = db.contract_events.find_one(sort=[("_id", -1)])
+    assert event_feed.current_token(db) == str(newest["_id"])
+
+def test_long_poll_without_events_returns_a_cursor(client):
+    response = client.get('/api/contracts/events?timeout=1')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["events"] == []
+    assert body["next"] == event_feed.current_token(client.application.db)
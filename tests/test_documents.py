@@ -0,0 +1,61 @@
+# tests/test_documents.py
+import pytest
+
+CONTENT = bytes(range(256)) * 4
+
+@pytest.fixture
+def client(app, db, gridfs, details):
+    client = app.test_client()
+    client.post('/api/contracts/', json={"contract_number": "D-1", "details": details(1)})
+    file_id = gridfs.put(CONTENT, filename="D-1.txt", contract_number="D-1")
+    db.contracts.update_one({"contract_number": "D-1"}, {"$set": {"final_document_id": str(file_id)}})
+    return client
+
+def download(client, range_header=None):
+    return client.get('/api/contracts/D-1/document', headers={'Range': range_header} if range_header else {})
+
+def test_whole_document(client):
+    response = download(client)
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['Content-Length'] == str(len(CONTENT))
+
+def test_single_range(client):
+    response = download(client, 'bytes=10-19')
+    assert response.status_code == 206
+    assert response.data == CONTENT[10:20]
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(CONTENT)}'
+
+def test_suffix_range(client):
+    response = download(client, 'bytes=-5')
+    assert response.status_code == 206
+    assert response.data == CONTENT[-5:]
+    assert response.headers['Content-Range'] == f'bytes {len(CONTENT) - 5}-{len(CONTENT) - 1}/{len(CONTENT)}'
+
+def test_open_ended_range_stops_at_the_end(client):
+    response = download(client, f'bytes={len(CONTENT) - 3}-')
+    assert response.status_code == 206
+    assert response.data == CONTENT[-3:]
+
+def test_multiple_ranges_get_the_whole_document(client):
+    response = download(client, 'bytes=0-9,20-29')
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'Content-Range' not in response.headers
+
+def test_unsatisfiable_range(client):
+    response = download(client, f'bytes={len(CONTENT)}-{len(CONTENT) + 10}')
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+def test_malformed_range_is_ignored(client):
+    response = download(client, 'bytes=abc')
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+def test_stale_if_range_gets_the_whole_document(client):
+    response = client.get('/api/contracts/D-1/document', headers={'Range': 'bytes=0-9', 'If-Range': '"other"'})
+    assert response.status_code == 200
+    assert response.data == CONTENT
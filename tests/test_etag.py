@@ -0,0 +1,72 @@
+# tests/test_etag.py
+import pytest
+
+@pytest.fixture(params=["none", "memory", "redis"])
+def client(request, make_app, details):
+    # Conditional requests must hold with and without the contract cache, per process or shared
+    app = make_app(CONTRACT_CACHE_BACKEND=request.param, CONTRACT_CACHE_REDIS_URL="local://")
+    client = app.test_client()
+    client.post('/api/contracts/', json={"contract_number": "T-1", "details": details(1)})
+    return client
+
+def signed(client):
+    client.put('/api/contracts/T-1/negotiate', json={"negotiation_status": "open"})
+    client.put('/api/contracts/T-1/approve')
+    client.put('/api/contracts/T-1/sign')
+
+def test_get_returns_the_version_etag(client):
+    response = client.get('/api/contracts/T-1')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v1"'
+
+@pytest.mark.parametrize("if_none_match", ['"v1"', 'W/"v1"', '"v0", "v1"', '*'])
+def test_matching_if_none_match_is_not_modified(client, if_none_match):
+    response = client.get('/api/contracts/T-1', headers={'If-None-Match': if_none_match})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"v1"'
+    assert response.data == b''
+
+def test_stale_if_none_match_gets_the_contract(client):
+    client.get('/api/contracts/T-1') # Cached at v1
+    client.put('/api/contracts/T-1/negotiate', json={"negotiation_status": "open"})
+    response = client.get('/api/contracts/T-1', headers={'If-None-Match': '"v1"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v2"'
+    assert response.get_json()["status"] == "NEGOTIATION"
+
+def test_unknown_contract_is_not_found(client):
+    assert client.get('/api/contracts/NOPE', headers={'If-None-Match': '"v1"'}).status_code == 404
+
+def test_if_match_mismatch_is_a_precondition_failure(client):
+    response = client.put('/api/contracts/T-1/negotiate', json={"negotiation_status": "open"}, headers={'If-Match': '"v7"'})
+    assert response.status_code == 412
+    assert client.get('/api/contracts/T-1').get_json()["status"] == "NEW"
+
+def test_if_match_on_the_current_version_applies(client):
+    response = client.put('/api/contracts/T-1/negotiate', json={"negotiation_status": "open"}, headers={'If-Match': '"v1"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v2"'
+    # The ETag of the response is the one to send next; the old one no longer matches
+    assert client.put('/api/contracts/T-1/approve', headers={'If-Match': '"v1"'}).status_code == 412
+    assert client.put('/api/contracts/T-1/approve', headers={'If-Match': '"v2"'}).status_code == 200
+
+def test_invalid_transition_with_matching_if_match_is_a_bad_request(client):
+    response = client.put('/api/contracts/T-1/sign', headers={'If-Match': '"v1"'})
+    assert response.status_code == 400
+
+def test_execute_honours_if_match(client):
+    signed(client)
+    assert client.put('/api/contracts/T-1/execute', headers={'If-Match': '"v3"'}).status_code == 412
+    response = client.put('/api/contracts/T-1/execute', headers={'If-Match': '"v4"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"v5"'
+
+def test_document_if_none_match(client):
+    signed(client)
+    client.put('/api/contracts/T-1/execute')
+    response = client.get('/api/contracts/T-1/document')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert client.get('/api/contracts/T-1/document', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/contracts/T-1/document', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+    assert client.get('/api/contracts/T-1/document', headers={'If-None-Match': '"other"'}).status_code == 200
@@ -0,0 +1,155 @@
+# tests/test_expiry.py
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.services.contract_service import ContractService
+from app.services.expiry import LOCK_NAME, ExpiryService, add_months, renewal_end_date
+from app.services.locks import LeaseLock
+
+NOW = datetime(2025, 3, 15, 10, 30)
+CUTOFF = datetime(2025, 3, 15)
+
+@pytest.mark.parametrize("value, months, expected", [
+    (datetime(2025, 1, 15), 1, datetime(2025, 2, 15)),
+    (datetime(2025, 1, 31), 1, datetime(2025, 2, 28)),
+    (datetime(2024, 1, 31), 1, datetime(2024, 2, 29)),
+    (datetime(2025, 3, 31), 1, datetime(2025, 4, 30)),
+    (datetime(2025, 11, 30), 3, datetime(2026, 2, 28)),
+    (datetime(2025, 12, 1), 1, datetime(2026, 1, 1)),
+    (datetime(2025, 5, 31), 24, datetime(2027, 5, 31)),
+])
+def test_add_months_clamps_to_the_end_of_the_month(value, months, expected):
+    assert add_months(value, months) == expected
+
+def test_renewal_needs_auto_renew():
+    assert renewal_end_date({"end_date": datetime(2025, 1, 31)}, CUTOFF, 12) is None
+    assert renewal_end_date({"end_date": datetime(2025, 1, 31), "auto_renew": "yes"}, CUTOFF, 12) is None
+
+def test_renewal_adds_one_term_when_enough():
+    details = {"end_date": datetime(2025, 1, 31), "auto_renew": True, "renewal_term_months": 6}
+    assert renewal_end_date(details, CUTOFF, 12) == datetime(2025, 7, 31)
+
+def test_renewal_adds_terms_until_the_cutoff():
+    # Ended three years ago: three yearly terms still leave it in the past, so four are added
+    details = {"end_date": datetime(2022, 3, 1), "auto_renew": True}
+    assert renewal_end_date(details, CUTOFF, 12) == datetime(2026, 3, 1)
+
+def test_renewal_ending_on_the_cutoff_day_is_enough():
+    details = {"end_date": datetime(2025, 2, 15), "auto_renew": True, "renewal_term_months": 1}
+    assert renewal_end_date(details, CUTOFF, 12) == CUTOFF
+
+def test_renewal_does_not_drift_on_clamped_days():
+    # Jan 31 + 1 + 1 month would be Mar 28; computed from the original end date it is Mar 31
+    details = {"end_date": datetime(2025, 1, 31), "auto_renew": True, "renewal_term_months": 1}
+    assert renewal_end_date(details, CUTOFF, 12) == datetime(2025, 3, 31)
+
+@pytest.mark.parametrize("term", [0, -1, "3", 1.5, None])
+def test_renewal_falls_back_to_the_default_term(term):
+    details = {"end_date": datetime(2025, 1, 31), "auto_renew": True, "renewal_term_months": term}
+    assert renewal_end_date(details, CUTOFF, 12) == datetime(2026, 1, 31)
+
+DETAILS = {"contract_name": "Expiry", "contract_category": "Supply", "party1": "Acme", "party2": "Globex",
+           "start_date": "2024-01-01"}
+
+def active_contract(db, number, status="EXECUTED", **details):
+    ContractService.create_contract(db, {"contract_number": number, "details": dict(DETAILS, **details)})
+    db.contracts.update_one({"contract_number": number}, {"$set": {"status": status}})
+
+def test_run_expires_and_renews_past_due_contracts(db):
+    active_contract(db, "E-1", end_date="2025-01-31")
+    active_contract(db, "E-2", status="RENEWED", end_date="2025-01-31", auto_renew=True, renewal_term_months=1)
+    active_contract(db, "E-3", end_date="2025-12-31")
+    active_contract(db, "E-4", status="SIGNED", end_date="2025-01-31")
+
+    summary = ExpiryService.run(db, now=NOW)
+    assert (summary["result"], summary["expired"], summary["renewed"], summary["conflicts"]) == ("completed", 1, 1, 0)
+
+    expired = db.contracts.find_one({"contract_number": "E-1"})
+    assert expired["status"] == "EXPIRED"
+    assert expired["version"] == 2
+    renewed = db.contracts.find_one({"contract_number": "E-2"})
+    assert renewed["status"] == "RENEWED"
+    assert renewed["details"]["end_date"] == datetime(2025, 3, 31)
+    assert renewed["details"]["last_renewal_date"] == NOW
+    assert db.contracts.find_one({"contract_number": "E-3"})["status"] == "EXECUTED"
+    assert db.contracts.find_one({"contract_number": "E-4"})["status"] == "SIGNED"
+    assert db.locks.count_documents({}) == 0
+
+    # The renewed contract moved to its new end_month bucket
+    buckets = {(b["_id"]["dimension"], b["_id"]["key"], b["_id"]["status"]): b["count"] for b in db.contract_stats.find()}
+    assert buckets[("end_month", "2025-03", "RENEWED")] == 1
+    assert buckets[("end_month", "2025-01", "EXPIRED")] == 1
+    assert ExpiryService.run(db, now=NOW)["expired"] == 0
+
+def test_dry_run_reports_without_writing(db):
+    active_contract(db, "E-1", end_date="2025-01-31")
+    active_contract(db, "E-2", end_date="2025-01-31", auto_renew=True)
+
+    summary = ExpiryService.run(db, now=NOW, dry_run=True)
+    assert (summary["would_expire"], summary["would_renew"]) == (1, 1)
+    assert "expired" not in summary
+    planned = {entry["contract_number"]: entry for entry in summary["planned"]}
+    assert planned["E-2"]["new_end_date"] == "2026-01-31"
+    assert planned["E-1"]["end_date"] == "2025-01-31"
+    assert {c["status"] for c in db.contracts.find()} == {"EXECUTED"}
+
+def test_run_is_skipped_while_another_worker_holds_the_lock(db):
+    active_contract(db, "E-1", end_date="2025-01-31")
+    assert LeaseLock(db, LOCK_NAME, owner="other-worker").acquire()
+    assert ExpiryService.run(db, now=NOW) == {"result": "locked"}
+    assert db.contracts.find_one({"contract_number": "E-1"})["status"] == "EXECUTED"
+
+def test_lease_lock_contention(db):
+    first = LeaseLock(db, "test", lease_seconds=60, owner="a")
+    second = LeaseLock(db, "test", lease_seconds=60, owner="b")
+    assert first.acquire()
+    assert first.acquire() # Its own lock
+    assert not second.acquire()
+    assert first.renew()
+    assert not second.renew()
+    second.release() # Not its lock: no effect
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+
+def test_expired_lease_can_be_taken_over(db):
+    first = LeaseLock(db, "test", lease_seconds=60, owner="a")
+    second = LeaseLock(db, "test", lease_seconds=60, owner="b")
+    assert first.acquire()
+    db.locks.update_one({"_id": "test"}, {"$set": {"expires_at": datetime(2000, 1, 1)}})
+    assert second.acquire()
+    # The first holder finds out on its next renew
+    assert not first.renew()
+    first.release()
+    assert db.locks.find_one({"_id": "test"})["owner"] == "b"
+
+def test_runs_in_the_same_process_exclude_each_other(db):
+    # The scheduled job holds the lock; a POST /expiry in another thread of the worker must not run
+    active_contract(db, "E-1", end_date="2025-01-31")
+    scheduled = LeaseLock(db, LOCK_NAME)
+    assert scheduled.acquire()
+    assert ExpiryService.run(db, now=NOW) == {"result": "locked"}
+    assert db.locks.find_one({"_id": LOCK_NAME})["owner"] == scheduled.owner
+
+def test_only_one_of_two_threads_acquires(db):
+    barrier = threading.Barrier(2)
+    acquired = {}
+
+    def take():
+        lock = LeaseLock(db, "test")
+        barrier.wait()
+        acquired[lock.owner] = lock.acquire()
+        barrier.wait()
+        if not acquired[lock.owner]:
+            lock.release() # Not its lock: the holder keeps it
+
+    threads = [threading.Thread(target=take) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(acquired.values()) == [False, True]
+    holder = next(owner for owner, ok in acquired.items() if ok)
+    assert db.locks.find_one({"_id": "test"})["owner"] == holder
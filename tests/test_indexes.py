@@ -0,0 +1,30 @@
+# tests/test_indexes.py
+import mongomock
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.models.indexes import ensure_indexes
+from app.services.contract_service import ContractService
+
+def index_names(db, collection_name):
+    return set(db[collection_name].index_information())
+
+def test_ensure_indexes_creates_the_registry(db):
+    assert {"contract_number_unique", "status_updated_at_id"} <= index_names(db, "contracts")
+    assert "job_key_unique" in index_names(db, "jobs")
+    ensure_indexes(db) # Already there: no-op
+
+def test_duplicate_contract_numbers_fail_startup():
+    db = mongomock.MongoClient()["clmp_duplicates"]
+    db.contracts.insert_many([{"contract_number": "C-1", "status": "NEW"}, {"contract_number": "C-1", "status": "NEW"}])
+    with pytest.raises(DuplicateKeyError):
+        ensure_indexes(db)
+    assert "contract_number_unique" not in index_names(db, "contracts")
+    # Raised before anything else is built
+    assert "status_updated_at_id" not in index_names(db, "contracts")
+
+def test_unique_index_rejects_a_duplicate_create(db, details):
+    ContractService.create_contract(db, {"contract_number": "C-1", "details": details(1)})
+    with pytest.raises(ValueError, match="already exists"):
+        ContractService.create_contract(db, {"contract_number": "C-1", "details": details(2)})
+    assert db.contracts.count_documents({}) == 1
@@ -0,0 +1,129 @@
+# tests/test_jobs.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import jobs
+from app.services.jobs import JobQueue, LeaseLost
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Registers test job kinds for the duration of a test: handlers(kind, handler, on_failure=None)."""
+    monkeypatch.setattr(jobs, "JOB_HANDLERS", dict(jobs.JOB_HANDLERS))
+    monkeypatch.setattr(jobs, "JOB_FAILURE_HANDLERS", dict(jobs.JOB_FAILURE_HANDLERS))
+    return jobs.register_job_handler
+
+def expire_lease(db, job):
+    db.jobs.update_one({"_id": job["_id"]}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+def test_enqueue_is_idempotent_per_job_key(db):
+    first = JobQueue.enqueue(db, "test", {"n": 1}, job_key="same")
+    second = JobQueue.enqueue(db, "test", {"n": 2}, job_key="same")
+    assert second["_id"] == first["_id"]
+    assert second["payload"] == {"n": 1}
+    assert db.jobs.count_documents({}) == 1
+
+def test_claim_skips_jobs_not_due_yet(db):
+    JobQueue.enqueue(db, "test", {}, job_key="later", run_at=datetime.utcnow() + timedelta(minutes=5))
+    assert JobQueue.claim(db, "w1") is None
+
+def test_claim_leases_the_job_to_one_worker(db):
+    JobQueue.enqueue(db, "test", {}, job_key="k")
+    job = JobQueue.claim(db, "w1", lease_seconds=30)
+    assert job["status"] == "running"
+    assert job["worker_id"] == "w1"
+    assert job["attempts"] == 1
+    assert job["lease_seconds"] == 30
+    assert job["lease_expires_at"] > datetime.utcnow() + timedelta(seconds=25)
+    assert JobQueue.claim(db, "w2") is None
+
+def test_expired_lease_is_taken_over(db):
+    JobQueue.enqueue(db, "test", {}, job_key="k")
+    stale = JobQueue.claim(db, "w1")
+    expire_lease(db, stale)
+    job = JobQueue.claim(db, "w2")
+    assert job["_id"] == stale["_id"]
+    assert job["worker_id"] == "w2"
+    assert job["attempts"] == 2
+    # The first worker can neither renew nor finish it any more
+    assert JobQueue.extend_lease(db, stale) is False
+    JobQueue.complete(db, stale, {"done": True})
+    assert JobQueue.get(db, job["_id"])["status"] == "running"
+
+def test_extend_lease_uses_the_claimed_lease(db):
+    JobQueue.enqueue(db, "test", {}, job_key="k")
+    job = JobQueue.claim(db, "w1", lease_seconds=600)
+    expire_lease(db, job)
+    assert JobQueue.extend_lease(db, job) is True
+    assert JobQueue.get(db, job["_id"])["lease_expires_at"] > datetime.utcnow() + timedelta(seconds=590)
+
+def test_failed_attempts_back_off_exponentially(db):
+    JobQueue.enqueue(db, "test", {}, job_key="k", max_attempts=3)
+    delays = []
+    for _ in range(2):
+        job = JobQueue.claim(db, "w1")
+        before = datetime.utcnow()
+        assert JobQueue.fail(db, job, "boom", backoff_seconds=10) is False
+        stored = JobQueue.get(db, job["_id"])
+        assert stored["status"] == "queued"
+        assert stored["error"] == "boom"
+        delays.append(round((stored["next_run_at"] - before).total_seconds()))
+        db.jobs.update_one({"_id": job["_id"]}, {"$set": {"next_run_at": datetime.utcnow()}})
+    assert delays == [10, 20]
+
+def test_fail_after_max_attempts_is_final(db):
+    JobQueue.enqueue(db, "test", {}, job_key="k", max_attempts=1)
+    job = JobQueue.claim(db, "w1")
+    assert JobQueue.fail(db, job, "boom") is True
+    stored = JobQueue.get(db, job["_id"])
+    assert stored["status"] == "failed"
+    assert "lease_expires_at" not in stored
+    assert JobQueue.claim(db, "w1") is None
+
+def test_run_one_completes_a_job(db, gridfs, handlers):
+    handlers("test", lambda db, gridfs, payload, job: {"doubled": payload["n"] * 2})
+    JobQueue.enqueue(db, "test", {"n": 21}, job_key="k")
+    assert JobQueue.run_one(db, gridfs, "w1") is True
+    job = db.jobs.find_one({"job_key": "k"})
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"doubled": 42}
+    assert JobQueue.run_one(db, gridfs, "w1") is False
+
+def test_run_one_retries_then_calls_the_failure_handler_once(db, gridfs, handlers):
+    failures = []
+
+    def handler(db, gridfs, payload, job):
+        raise RuntimeError(f"attempt {job['attempts']}")
+
+    handlers("test", handler, on_failure=lambda db, payload, error: failures.append((payload, error)))
+    JobQueue.enqueue(db, "test", {"n": 1}, job_key="k", max_attempts=2)
+    assert JobQueue.run_one(db, gridfs, "w1", backoff_seconds=0) is True
+    assert db.jobs.find_one({"job_key": "k"})["status"] == "queued"
+    assert failures == []
+    assert JobQueue.run_one(db, gridfs, "w1", backoff_seconds=0) is True
+    job = db.jobs.find_one({"job_key": "k"})
+    assert job["status"] == "failed"
+    assert job["error"] == "attempt 2"
+    assert failures == [({"n": 1}, "attempt 2")]
+
+def test_run_one_fails_jobs_without_a_handler(db, gridfs):
+    JobQueue.enqueue(db, "unknown-kind", {}, job_key="k", max_attempts=1)
+    JobQueue.run_one(db, gridfs, "w1")
+    job = db.jobs.find_one({"job_key": "k"})
+    assert job["status"] == "failed"
+    assert "No handler" in job["error"]
+
+def test_lease_lost_leaves_the_job_to_its_new_owner(db, gridfs, handlers):
+    def handler(db, gridfs, payload, job):
+        # Another worker claims the job while this one is still running it
+        expire_lease(db, job)
+        JobQueue.claim(db, "w2")
+        raise LeaseLost("taken over")
+
+    handlers("test", handler, on_failure=lambda db, payload, error: pytest.fail("failure handler called"))
+    JobQueue.enqueue(db, "test", {}, job_key="k", max_attempts=1)
+    assert JobQueue.run_one(db, gridfs, "w1") is True
+    job = db.jobs.find_one({"job_key": "k"})
+    assert job["status"] == "running"
+    assert job["worker_id"] == "w2"
+    assert job.get("error") is None
@@ -0,0 +1,96 @@
+# tests/test_metrics.py
+import json
+import logging
+from types import SimpleNamespace
+
+from app.services.contract_service import ContractService
+from app.utils import metrics as metrics_module
+from app.utils.instrumentation import record_request
+from app.utils.metrics import (Counter, Gauge, Histogram, MongoCommandMetrics, end_request_timings, phase,
+                               start_request_timings)
+
+def test_counter_renders_labels_escaped():
+    counter = Counter('test_total', 'Test counter.', ('route', 'status'))
+    counter.inc('/a"b', 200)
+    counter.inc('/a"b', 200, amount=2)
+    assert counter.render() == ['# HELP test_total Test counter.', '# TYPE test_total counter',
+                                'test_total{route="/a\\"b",status="200"} 3']
+
+def test_gauge_goes_both_ways():
+    gauge = Gauge('test_open', 'Test gauge.', ('pool',))
+    gauge.inc('contracts', amount=3)
+    gauge.inc('contracts', amount=-1)
+    assert gauge.render()[1:] == ['# TYPE test_open gauge', 'test_open{pool="contracts"} 2']
+    gauge.set(0, 'contracts')
+    assert gauge.render()[-1] == 'test_open{pool="contracts"} 0'
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Test histogram.', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == ['test_seconds_bucket{le="0.1"} 1', 'test_seconds_bucket{le="1.0"} 3',
+                                      'test_seconds_bucket{le="+Inf"} 4', 'test_seconds_sum 4.25',
+                                      'test_seconds_count 4']
+
+def test_phases_are_only_recorded_inside_a_request():
+    with phase("validation"):
+        pass # No request: nothing to record into
+    timings = start_request_timings()
+    try:
+        with phase("validation"):
+            pass
+        with phase("validation"):
+            pass
+    finally:
+        end_request_timings()
+    assert list(timings["phases"]) == ["validation"]
+    assert timings["phases"]["validation"] >= 0
+
+def command(request_id, name, collection, micros=1500):
+    return SimpleNamespace(request_id=request_id, command_name=name, command={name: collection}, duration_micros=micros)
+
+def test_mongo_commands_count_towards_the_request():
+    listener = MongoCommandMetrics()
+    timings = start_request_timings()
+    try:
+        for request_id, collection in enumerate(("contracts", "fs.chunks")):
+            listener.started(command(request_id, "find", collection))
+            listener.succeeded(command(request_id, "find", collection))
+        listener.started(command(9, "insert", "contracts"))
+        listener.failed(command(9, "insert", "contracts"))
+    finally:
+        end_request_timings()
+    assert timings["mongo_ops"] == 3
+    assert set(timings["phases"]) == {"mongo", "gridfs"}
+    assert 'mongo_command_failures_total{command="insert",collection="contracts"}' in metrics_module.metrics.render()
+
+def test_summary_event_is_sampled(caplog):
+    caplog.set_level(logging.INFO, logger='app.requests')
+    timings = {"mongo_ops": 2, "phases": {"mongo": 0.002}}
+    record_request("GET", "/api/contracts/<string:contract_number>", "/api/contracts/C-1", 200, 0.01, timings, sample_rate=0)
+    assert caplog.records == []
+    # Errors and slow requests are always logged
+    record_request("GET", "/api/contracts/stats", "/api/contracts/stats", 500, 0.01, timings, sample_rate=0)
+    record_request("GET", "/api/contracts/stats", "/api/contracts/stats", 200, 2.0, timings, sample_rate=0)
+    events = [json.loads(record.getMessage()) for record in caplog.records]
+    assert [(e["status"], e["duration_ms"]) for e in events] == [(500, 10.0), (200, 2000.0)]
+    assert events[0]["mongo_ops"] == 2
+    assert events[0]["phases_ms"] == {"mongo": 2.0}
+
+def test_metrics_endpoint(client):
+    client.get('/api/contracts/NOPE')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{route="/api/contracts/<string:contract_number>",method="GET",status="404"}' in body
+    assert 'http_request_duration_seconds_count{route="/api/contracts/<string:contract_number>",method="GET"}' in body
+    assert 'contract_cache_hits_total' in body
+
+def test_metrics_can_be_disabled(make_app):
+    assert make_app(METRICS_ENABLED=False).test_client().get('/metrics').status_code == 404
+
+def test_create_contract_logs_nothing_at_info(db, details, caplog):
+    caplog.set_level(logging.INFO)
+    ContractService.create_contract(db, {"contract_number": "C-1", "details": details(1)})
+    assert [r for r in caplog.records if r.name.startswith('app.')] == []
@@ -0,0 +1,75 @@
+# tests/test_migration.py
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.jobs import JobQueue, LeaseLost
+from app.services.migration import MigrationService, read_source
+
+@pytest.fixture
+def source(tmp_path):
+    """A legacy CSV export with rows L-0 .. L-4."""
+    path = tmp_path / "legacy.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["contract_number", "old_status", "old_text"])
+        writer.writeheader()
+        for i in range(5):
+            writer.writerow({"contract_number": f"L-{i}", "old_status": "ACTIVE", "old_text": f"text {i}"})
+    return str(path)
+
+def migrated_numbers(db):
+    return sorted(c["contract_number"] for c in db.contracts.find({"status": "MIGRATED"}))
+
+def test_run_migrates_every_row_in_chunks(db, gridfs, source):
+    run = MigrationService.start(db, source, chunk_size=2, upload_threads=2)
+    assert JobQueue.run_one(db, gridfs, "w1") is True
+    progress = MigrationService.get_run(db, run["_id"])
+    assert progress["status"] == "completed"
+    assert progress["rows_processed"] == 5
+    assert progress["migrated"] == 5
+    assert migrated_numbers(db) == [f"L-{i}" for i in range(5)]
+    assert len(list(gridfs.find({"migrated": True}))) == 5
+
+def test_resumed_run_starts_at_the_checkpoint(db, gridfs, source):
+    run = MigrationService.start(db, source, chunk_size=2)
+    # A worker migrated the first chunk and checkpointed it, then died
+    MigrationService.migrate_rows(db, gridfs, list(read_source(source, "csv"))[:2])
+    db.migrations.update_one({"_id": run["_id"]}, {"$set": {"checkpoint": 2, "migrated": 2}})
+    JobQueue.run_one(db, gridfs, "w2")
+    progress = MigrationService.get_run(db, run["_id"])
+    assert progress["status"] == "completed"
+    assert progress["rows_processed"] == 5
+    assert progress["migrated"] == 5
+    assert progress["skipped"] == 0
+    assert db.migrations.find_one({"_id": run["_id"]})["resumed_from"] == 2
+
+def test_chunk_repeated_after_a_crash_is_skipped_not_duplicated(db, gridfs, source):
+    # Crashed after the chunk was written but before its checkpoint
+    MigrationService.migrate_rows(db, gridfs, list(read_source(source, "csv"))[:2])
+    run = MigrationService.start(db, source, chunk_size=2)
+    JobQueue.run_one(db, gridfs, "w1")
+    progress = MigrationService.get_run(db, run["_id"])
+    assert progress["migrated"] == 3
+    assert progress["skipped"] == 2
+    assert migrated_numbers(db) == [f"L-{i}" for i in range(5)]
+    assert len(list(gridfs.find({"migrated": True}))) == 5
+
+def test_worker_that_lost_its_lease_stops_without_checkpointing(db, gridfs, source):
+    run = MigrationService.start(db, source, chunk_size=2)
+    job = JobQueue.claim(db, "w1")
+    # Another worker takes the job over once w1's lease has run out
+    db.jobs.update_one({"_id": job["_id"]}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+    JobQueue.claim(db, "w2")
+    with pytest.raises(LeaseLost):
+        MigrationService.run_job(db, gridfs, job["payload"], job)
+    assert db.migrations.find_one({"_id": run["_id"]})["checkpoint"] == 0
+
+def test_run_out_of_attempts_is_marked_failed(db, gridfs, tmp_path):
+    run = MigrationService.start(db, str(tmp_path / "missing.csv"))
+    db.jobs.update_one({"kind": "migrate_contracts"}, {"$set": {"max_attempts": 1}})
+    JobQueue.run_one(db, gridfs, "w1")
+    progress = MigrationService.get_run(db, run["_id"])
+    assert progress["status"] == "failed"
+    assert "missing.csv" in progress["error"]
+    assert db.jobs.find_one({"kind": "migrate_contracts"})["status"] == "failed"
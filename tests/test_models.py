@@ -0,0 +1,75 @@
+# tests/test_models.py
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.contract import Contract, format_contract_date, parse_contract_dates, response_details
+
+STORED = {
+    "_id": "ignored",
+    "contract_number": "C-1",
+    "status": "EXECUTED",
+    "details": {"contract_name": "Lease", "start_date": datetime(2024, 1, 1), "end_date": datetime(2025, 1, 1, 12, 30)},
+    "created_at": datetime(2024, 1, 1, 9, 0),
+    "updated_at": "2024-02-01T10:00:00",
+    "version": 4,
+}
+
+def test_contract_has_no_instance_dict():
+    contract = Contract("C-1", "NEW", {})
+    assert not hasattr(contract, "__dict__")
+    with pytest.raises(AttributeError):
+        contract.extra = 1
+
+def test_from_dict_accepts_raw_bson_and_iso_strings():
+    contract = Contract.from_dict(STORED)
+    assert contract.created_at == datetime(2024, 1, 1, 9, 0)
+    assert contract.updated_at == datetime(2024, 2, 1, 10, 0)
+    assert contract.version == 4
+    assert contract.details is STORED["details"]
+
+def test_from_dict_defaults():
+    contract = Contract.from_dict({"contract_number": "C-1"})
+    assert (contract.details, contract.created_at, contract.version) == ({}, None, 0)
+
+def test_to_dict_api_form():
+    assert Contract.from_dict(STORED).to_dict() == {
+        "contract_number": "C-1",
+        "status": "EXECUTED",
+        "details": {"contract_name": "Lease", "start_date": "2024-01-01", "end_date": "2025-01-01T12:30:00"},
+        "created_at": "2024-01-01T09:00:00",
+        "updated_at": "2024-02-01T10:00:00",
+        "version": 4,
+    }
+    # The stored details are left as they were
+    assert STORED["details"]["start_date"] == datetime(2024, 1, 1)
+
+def test_to_dict_shares_details_without_dates():
+    details = {"contract_name": "Lease"}
+    assert Contract("C-1", "NEW", details).to_dict()["details"] is details
+
+def test_round_trip():
+    contract = Contract("C-1", "NEW", {"contract_name": "Lease"})
+    again = Contract.from_dict(contract.to_dict())
+    assert (again.contract_number, again.status, again.created_at, again.version) == ("C-1", "NEW", contract.created_at, 1)
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-01", datetime(2024, 3, 1)),
+    ("2024-03-01T10:15:00", datetime(2024, 3, 1, 10, 15)),
+    ("2024-03-01T10:15:00+02:00", datetime(2024, 3, 1, 8, 15)),
+    (date(2024, 3, 1), datetime(2024, 3, 1)),
+    (datetime(2024, 3, 1, tzinfo=timezone(timedelta(hours=-5))), datetime(2024, 3, 1, 5, 0)),
+])
+def test_parse_contract_dates(value, expected):
+    parsed = parse_contract_dates({"start_date": value, "party1": "Acme"})
+    assert parsed == {"start_date": expected, "party1": "Acme"}
+
+@pytest.mark.parametrize("value", ["01/03/2024", 20240301, "soon"])
+def test_parse_contract_dates_rejects_other_values(value):
+    with pytest.raises(ValueError, match="expected YYYY-MM-DD"):
+        parse_contract_dates({"end_date": value})
+
+def test_format_and_response_details():
+    assert format_contract_date(datetime(2024, 3, 1)) == "2024-03-01"
+    assert format_contract_date("2024-03-01") == "2024-03-01"
+    assert response_details(None) is None
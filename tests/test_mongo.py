@@ -0,0 +1,51 @@
+# tests/test_mongo.py
+# The clients are created against an address nothing listens on: MongoClient connects lazily,
+# so nothing here waits on a server.
+import pytest
+from flask import Flask
+
+from app.services.mongo import MongoClients, client_options
+from app.utils.metrics import MongoPoolMetrics
+from config import Config
+
+URI = "mongodb://127.0.0.1:1/clmp_test"
+
+@pytest.fixture
+def clients():
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(MONGO_URI=URI, GRIDFS_URI="mongodb://127.0.0.1:2/clmp_files")
+    clients = MongoClients()
+    clients.init_app(app)
+    yield clients
+    clients.close()
+
+def test_client_options_use_the_prefixed_settings():
+    config = {"GRIDFS_MAX_POOL_SIZE": 7, "GRIDFS_READ_PREFERENCE": "secondaryPreferred", "MONGO_MAX_POOL_SIZE": 50}
+    metrics = MongoPoolMetrics("gridfs")
+    options = client_options(config, "GRIDFS", metrics)
+    assert options["maxPoolSize"] == 7
+    assert options["readPreference"] == "secondaryPreferred"
+    assert options["event_listeners"] == [metrics]
+
+def test_each_uri_gets_its_own_pool(clients):
+    app = clients.app
+    assert app.db.name == "clmp_test"
+    assert app.gridfs_db.name == "clmp_files"
+    assert app.mongo_client.options.pool_options.max_pool_size == Config.MONGO_MAX_POOL_SIZE
+    assert app.gridfs_client.options.pool_options.max_pool_size == Config.GRIDFS_MAX_POOL_SIZE
+
+def test_connect_is_a_no_op_in_the_same_process(clients):
+    client = clients.app.mongo_client
+    clients.connect()
+    assert clients.app.mongo_client is client
+
+def test_a_forked_worker_gets_new_clients(clients, monkeypatch):
+    parent = clients.app.mongo_client, clients.app.gridfs_client
+    # As seen from a worker forked after create_app
+    monkeypatch.setattr(clients, "_pid", -1)
+    clients.connect()
+    assert clients.app.mongo_client is not parent[0]
+    assert clients.app.gridfs_client is not parent[1]
+    parent[0].close()
+    parent[1].close()
@@ -0,0 +1,61 @@
+# tests/test_negotiations.py
+import pytest
+
+from app.services.contract_service import ContractService
+
+@pytest.fixture
+def negotiated(client, details):
+    """C-1 after five negotiation rounds, versions 2 to 6."""
+    client.post('/api/contracts/', json={"contract_number": "C-1", "details": details(1)})
+    for round_number in range(1, 6):
+        response = client.put('/api/contracts/C-1/negotiate', json={"negotiation_status": "open", "round": round_number})
+        assert response.status_code == 200
+    return "C-1"
+
+def negotiations(client, query=""):
+    response = client.get(f'/api/contracts/C-1/negotiations{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_every_round_is_kept_newest_first(client, negotiated):
+    page = negotiations(client)
+    assert [item["negotiation"]["round"] for item in page["items"]] == [5, 4, 3, 2, 1]
+    assert [item["version"] for item in page["items"]] == [6, 5, 4, 3, 2]
+    assert page["next_cursor"] is None
+
+def test_pages_follow_the_cursor(client, negotiated):
+    first = negotiations(client, "?limit=2")
+    second = negotiations(client, f"?limit=2&after={first['next_cursor']}")
+    third = negotiations(client, f"?limit=2&after={second['next_cursor']}")
+    rounds = [item["negotiation"]["round"] for page in (first, second, third) for item in page["items"]]
+    assert rounds == [5, 4, 3, 2, 1]
+    assert third["next_cursor"] is None
+
+def test_contract_keeps_only_the_latest_round(client, db, negotiated):
+    contract = client.get('/api/contracts/C-1').get_json()
+    assert contract["details"]["negotiation"] == {"negotiation_status": "open", "round": 5}
+    assert contract["version"] == 6
+    assert db.contract_negotiations.count_documents({"contract_number": "C-1"}) == 5
+
+def test_later_statuses_are_not_negotiable(client, negotiated):
+    client.put('/api/contracts/C-1/approve')
+    assert client.put('/api/contracts/C-1/negotiate', json={"round": 6}).status_code == 400
+    assert len(negotiations(client)["items"]) == 5
+
+def test_batch_negotiate_records_rounds(client, db, details):
+    client.post('/api/contracts/batch', json=[{"contract_number": f"B-{i}", "details": details(i)} for i in range(2)])
+    response = client.put('/api/contracts/batch/negotiate',
+                          json=[{"contract_number": "B-0", "negotiation": {"round": 1}}, "B-1"])
+    assert response.status_code == 200
+    rounds, _ = ContractService.get_negotiations(db, "B-0", 10)
+    assert [(r["version"], r["negotiation"]) for r in rounds] == [(2, {"round": 1})]
+
+def test_unknown_contract_and_bad_cursor(client, negotiated):
+    assert client.get('/api/contracts/NOPE/negotiations').status_code == 404
+    assert client.get('/api/contracts/C-1/negotiations?after=abc').status_code == 400
+    assert client.get('/api/contracts/C-1/negotiations?limit=0').status_code == 400
+
+def test_contract_without_rounds_has_an_empty_history(client, details):
+    client.post('/api/contracts/', json={"contract_number": "C-2", "details": details(2)})
+    response = client.get('/api/contracts/C-2/negotiations')
+    assert response.get_json() == {"items": [], "next_cursor": None}
@@ -0,0 +1,78 @@
+# tests/test_search.py
+import json
+from datetime import datetime
+
+import pytest
+
+from app.services.contract_service import ContractService
+
+# Both share the 20-character stored prefix 'interoperabilityfram'
+LONG_KEYWORD = "Interoperabilityframework"
+
+@pytest.fixture
+def executed(db, details):
+    """executed(i, **details): creates contract C-i and moves it to EXECUTED."""
+    def make(i, **fields):
+        ContractService.create_contract(db, {"contract_number": f"C-{i}", "details": details(i, **fields)})
+        # As execute_contract leaves it; create stores updated_at as a string
+        db.contracts.update_one({"contract_number": f"C-{i}"}, {"$set": {"status": "EXECUTED", "updated_at": datetime(2025, 1, 1, 0, 0, i)}})
+    return make
+
+@pytest.fixture
+def long_terms(executed):
+    for i in range(6):
+        name = "Interoperabilityframework licence" if i % 2 else "Interoperabilityframeset licence"
+        executed(i, contract_name=name)
+
+def numbers(items):
+    return sorted(item["contract_number"] for item in items)
+
+def test_long_keyword_search_drops_prefix_only_matches(db, long_terms):
+    contracts = ContractService.search_executed_contracts(db, {"keyword": LONG_KEYWORD})
+    assert sorted(c.contract_number for c in contracts) == ["C-1", "C-3", "C-5"]
+
+def test_long_keyword_iterator_drops_prefix_only_matches(db, long_terms):
+    contracts = ContractService.iter_executed_contracts(db, {"keyword": LONG_KEYWORD})
+    assert numbers(contracts) == ["C-1", "C-3", "C-5"]
+
+def test_long_keyword_pages_are_full_and_exact(db, long_terms):
+    items, cursor = ContractService.search_executed_page(db, {"keyword": LONG_KEYWORD}, 2)
+    assert len(items) == 2
+    rest, last = ContractService.search_executed_page(db, {"keyword": LONG_KEYWORD}, 2, cursor)
+    assert last is None
+    assert numbers(items + rest) == ["C-1", "C-3", "C-5"]
+
+def test_long_keyword_with_a_projection_returns_only_the_requested_fields(db, long_terms):
+    items, _ = ContractService.search_executed_page(db, {"keyword": LONG_KEYWORD}, 10, projection={"contract_number": 1})
+    assert items == [{"contract_number": n} for n in ("C-5", "C-3", "C-1")]
+    items, _ = ContractService.search_executed_page(db, {"keyword": LONG_KEYWORD}, 10, projection={"details.party1": 1})
+    assert [set(item["details"]) for item in items] == [{"party1"}] * 3
+
+def test_prefix_keyword_matches_both(db, long_terms):
+    contracts = ContractService.iter_executed_contracts(db, {"keyword": "interoperabilityframe"})
+    assert len(list(contracts)) == 6
+
+def ndjson(client, query):
+    response = client.get(f'/api/contracts/search?format=ndjson&{query}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+def test_ndjson_streams_every_match_newest_first(client, executed):
+    for i in range(5):
+        executed(i)
+    assert [c["contract_number"] for c in ndjson(client, "keyword=acme")] == ["C-4", "C-3", "C-2", "C-1", "C-0"]
+
+def test_ndjson_long_keyword_drops_prefix_only_matches(client, long_terms):
+    lines = ndjson(client, f"keyword={LONG_KEYWORD}")
+    assert [c["contract_number"] for c in lines] == ["C-5", "C-3", "C-1"]
+
+def test_ndjson_limit_and_fields(client, long_terms):
+    lines = ndjson(client, f"keyword={LONG_KEYWORD}&limit=2&fields=contract_number")
+    assert lines == [{"contract_number": "C-5"}, {"contract_number": "C-3"}]
+
+def test_ndjson_without_matches_is_empty(client, long_terms):
+    assert ndjson(client, "keyword=nothing") == []
+
+def test_ndjson_bad_cursor_is_a_bad_request(client, long_terms):
+    assert client.get('/api/contracts/search?format=ndjson&after=nope').status_code == 400
@@ -0,0 +1,40 @@
+# tests/test_serialization.py
+import json
+from datetime import date, datetime
+
+import pytest
+from bson import ObjectId
+
+from app.utils import serialization
+
+def test_missing_orjson_falls_back_with_a_warning(app, monkeypatch, caplog):
+    monkeypatch.setattr(serialization, "orjson", None)
+    app.config["JSON_RESPONSE_BACKEND"] = "orjson"
+    assert serialization.json_output(app) is serialization.output_json
+    assert "orjson isn't installed" in caplog.text
+
+DOCUMENT = {"contract_number": "C-1", "details": {"start_date": datetime(2024, 1, 1), "file": ObjectId("0" * 24)},
+            "count": 3, "ratio": 0.5, "tags": ["a", "é"], "missing": None}
+
+def test_json_default_encodes_bson_values():
+    assert serialization.json_default(date(2024, 1, 1)) == "2024-01-01"
+    assert serialization.json_default(ObjectId("0" * 24)) == "0" * 24
+    with pytest.raises(TypeError):
+        serialization.json_default(object())
+
+@pytest.mark.skipif(serialization.orjson is None, reason="orjson is optional")
+def test_orjson_and_stdlib_encode_the_same_values():
+    assert json.loads(serialization.dumps(DOCUMENT)) == json.loads(json.dumps(DOCUMENT, default=serialization.json_default))
+
+def test_stdlib_dumps_without_orjson(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(serialization.dumps(DOCUMENT))["details"]["file"] == "0" * 24
+
+@pytest.mark.skipif(serialization.orjson is None, reason="orjson is optional")
+def test_orjson_representation_is_registered(make_app):
+    app = make_app(JSON_RESPONSE_BACKEND="orjson")
+    assert serialization.json_output(app) is serialization.output_orjson
+    response = app.test_client().get('/api/contracts/stats')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert "by_status" in response.get_json()
@@ -0,0 +1,86 @@
+# tests/test_stats.py
+from datetime import date, datetime
+
+import pytest
+
+from app.services.contract_service import ContractService
+from app.services.stats import StatsService, bucket_keys
+
+# Transitions from NEW to each status
+PATHS = {"NEW": [], "NEGOTIATION": ["NEGOTIATION"], "APPROVED": ["NEGOTIATION", "APPROVED"],
+         "SIGNED": ["NEGOTIATION", "APPROVED", "SIGNED"], "EXECUTED": ["NEGOTIATION", "APPROVED", "SIGNED", "EXECUTED"],
+         "REJECTED": ["NEGOTIATION", "REJECTED"]}
+
+def lifecycle(db, gridfs, number, until):
+    for status in PATHS[until]:
+        if status == "NEGOTIATION":
+            ContractService.negotiate_contract(db, number, {})
+        elif status in ("APPROVED", "REJECTED"):
+            ContractService.approve_reject_contract(db, number, status)
+        elif status == "SIGNED":
+            ContractService.sign_contract(db, number)
+        else:
+            ContractService.execute_contract(db, gridfs, number)
+
+@pytest.fixture
+def contracts(db, gridfs, details):
+    """Eight contracts across the lifecycle; C-0 and C-4 end in 2025-01."""
+    statuses = ["NEW", "NEGOTIATION", "APPROVED", "SIGNED", "EXECUTED", "EXECUTED", "REJECTED", "NEW"]
+    for i, status in enumerate(statuses):
+        ContractService.create_contract(db, {"contract_number": f"C-{i}",
+                                             "details": details(i, end_date=f"2025-0{1 + i % 4}-15")})
+        lifecycle(db, gridfs, f"C-{i}", status)
+    return statuses
+
+def buckets(db):
+    return {(b["_id"]["dimension"], b["_id"]["key"], b["_id"]["status"]): b["count"]
+            for b in db.contract_stats.find() if b["count"]}
+
+def test_bucket_keys():
+    details = {"contract_category": "Lease", "party1": "Acme", "party2": "", "end_date": datetime(2025, 3, 31)}
+    assert bucket_keys(details) == [("total", "all"), ("category", "Lease"), ("party", "Acme"), ("end_month", "2025-03")]
+    assert bucket_keys({"end_date": "2024-12-01"}) == [("total", "all"), ("end_month", "2024-12")]
+    assert bucket_keys(None) == [("total", "all")]
+
+def test_deltas_move_a_contract_between_statuses():
+    contract = {"details": {"contract_category": "Lease"}}
+    deltas = StatsService.deltas([(contract, "NEW", "NEGOTIATION"), (contract, None, "NEW")])
+    assert {k: v for k, v in deltas.items() if v} == {("total", "all", "NEGOTIATION"): 1,
+                                                      ("category", "Lease", "NEGOTIATION"): 1}
+
+def test_every_write_path_keeps_the_rollup(db, contracts):
+    stats = StatsService.get_stats(db, today=date(2025, 1, 1))
+    assert stats["total"] == 8
+    assert stats["by_status"] == {"NEW": 2, "NEGOTIATION": 1, "APPROVED": 1, "SIGNED": 1, "EXECUTED": 2, "REJECTED": 1}
+    assert stats["by_category"]["Supply"] == {"total": 2, "by_status": {"NEW": 1, "EXECUTED": 1}}
+    assert stats["by_end_month"]["2025-01"]["total"] == 2
+
+def test_expiring_soon_lists_active_contracts_by_end_date(db, contracts):
+    stats = StatsService.get_stats(db, expiring_days=60, today=date(2025, 1, 1))
+    assert [c["contract_number"] for c in stats["expiring_soon"]["contracts"]] == ["C-4", "C-5"]
+    assert stats["expiring_soon"]["contracts"][0]["details"]["end_date"] == "2025-01-15"
+    assert StatsService.get_stats(db, expiring_days=10, today=date(2025, 1, 1))["expiring_soon"]["contracts"] == []
+
+def bucket_counts(db):
+    # What RECONCILE_PIPELINE returns, computed with bucket_keys. mongomock leaves the expressions inside
+    # its $project array literal unevaluated, so the pipeline itself needs a real server
+    deltas = StatsService.deltas([(c, None, c["status"]) for c in db.contracts.find()])
+    return [{"_id": {"dimension": d, "key": k, "status": s}, "count": n} for (d, k, s), n in deltas.items()]
+
+def test_reconcile_rebuilds_the_same_rollup(db, contracts, monkeypatch):
+    expected = buckets(db)
+    emptied = db.contract_stats.count_documents({"count": 0}) # Buckets every contract has moved out of
+    db.contract_stats.update_many({}, {"$inc": {"count": 5}})
+    db.contract_stats.insert_one({"_id": {"dimension": "party", "key": "Gone", "status": "NEW"}, "count": 1,
+                                  "updated_at": datetime(2000, 1, 1)})
+    monkeypatch.setattr(type(db.contracts), "aggregate", lambda self, pipeline, **kwargs: bucket_counts(db))
+    summary = StatsService.reconcile(db)
+    assert summary == {"buckets": len(expected), "removed": emptied + 1}
+    assert buckets(db) == expected
+
+def test_stats_endpoint(client, details):
+    client.post('/api/contracts/', json={"contract_number": "C-1", "details": details(1)})
+    response = client.get('/api/contracts/stats?days=5&limit=3')
+    assert response.status_code == 200
+    assert response.get_json()["by_status"] == {"NEW": 1}
+    assert client.get('/api/contracts/stats?days=0').status_code == 400
@@ -0,0 +1,65 @@
+# tests/test_transitions.py
+import pytest
+
+from app.services.contract_service import CONTRACT_TRANSITIONS, ContractService, VersionConflictError
+
+@pytest.fixture
+def contract(db, details):
+    ContractService.create_contract(db, {"contract_number": "C-1", "details": details(1)})
+    return "C-1"
+
+def test_lifecycle_is_one_round_trip_per_transition(counting, gridfs, contract):
+    steps = [
+        lambda: ContractService.approve_reject_contract(counting, contract, "APPROVED"),
+        lambda: ContractService.sign_contract(counting, contract),
+        lambda: ContractService.execute_contract(counting, gridfs, contract)[0],
+    ]
+    ContractService.negotiate_contract(counting, contract, {"negotiation_status": "open"})
+    for version, (step, status) in enumerate(zip(steps, ("APPROVED", "SIGNED", "EXECUTED")), start=3):
+        counting.ops.clear()
+        result = step()
+        assert (result.status, result.version) == (status, version)
+        # The guarded update, then the outbox and stats side effects; never a read first
+        assert counting.ops.get("find_one_and_update") == 1
+        assert "find_one" not in counting.ops and "update_one" not in counting.ops
+
+def test_execute_links_the_document_in_the_same_update(db, gridfs, contract):
+    ContractService.negotiate_contract(db, contract, {})
+    ContractService.approve_reject_contract(db, contract, "APPROVED")
+    ContractService.sign_contract(db, contract)
+    executed, document = ContractService.execute_contract(db, gridfs, contract)
+    stored = db.contracts.find_one({"contract_number": contract})
+    assert stored["status"] == "EXECUTED"
+    assert stored["final_document_id"] == document["document_id"]
+    assert gridfs.exists(filename=document["filename"])
+
+def test_wrong_state_and_missing_contract_are_told_apart(db, contract):
+    with pytest.raises(ValueError, match="Cannot transition from 'NEW' to 'SIGNED'"):
+        ContractService.sign_contract(db, contract)
+    with pytest.raises(ValueError, match="Contract not found"):
+        ContractService.sign_contract(db, "NOPE")
+    assert db.contracts.find_one({"contract_number": contract})["version"] == 1
+
+def test_stale_expected_version_is_a_conflict(db, contract):
+    ContractService.negotiate_contract(db, contract, {})
+    with pytest.raises(VersionConflictError):
+        ContractService.approve_reject_contract(db, contract, "APPROVED", expected_version=1)
+    assert ContractService.approve_reject_contract(db, contract, "APPROVED", expected_version=2).status == "APPROVED"
+
+def test_cannot_skip_a_stage(db, contract):
+    with pytest.raises(ValueError):
+        ContractService.approve_reject_contract(db, contract, "SIGNED")
+    with pytest.raises(ValueError, match="Unknown contract status"):
+        ContractService._update_contract_status(db, contract, "ARCHIVED")
+
+def test_every_transition_has_one_source_status():
+    # _update_contract_status records the change with the first allowed status as the old one
+    assert all(len(sources) == 1 for sources in CONTRACT_TRANSITIONS.values())
+
+def test_repeated_transition_fails_on_the_guard(db, contract):
+    # What the losing worker of a race sees: the status guard no longer matches
+    ContractService.negotiate_contract(db, contract, {})
+    ContractService.approve_reject_contract(db, contract, "APPROVED")
+    with pytest.raises(ValueError, match="Cannot transition from 'APPROVED' to 'REJECTED'"):
+        ContractService.approve_reject_contract(db, contract, "REJECTED")
+    assert db.contracts.find_one({"contract_number": contract})["version"] == 3